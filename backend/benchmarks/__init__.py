@@ -0,0 +1,3 @@
+"""
+Benchmarks, run from the backend directory with `uv run python -m benchmarks.<name>`.
+"""
@@ -0,0 +1,78 @@
+"""
+Group commit versus one commit per message on the append path.
+
+Every session sends its messages one after another (as a chat does) while all sessions
+run concurrently, first through the per-request commit and then through the group commit
+buffer, both via AsyncChatController.append_user_message. Run against a scratch database,
+since it creates a user, an agent and the sessions it writes to:
+
+    DATABASE_URL=postgresql://.../captor_bench uv run python -m benchmarks.group_commit --sessions 500
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlmodel import Session
+
+from src.controllers.chat_controller import AsyncChatController
+from src.database import create_db_and_tables, db_session, engine
+from src.database.group_commit import message_buffer
+from src.models.agent import Agent
+from src.models.chat import ChatSession
+from src.models.user import User
+
+
+def create_sessions(count: int) -> list:
+    with Session(engine) as session:
+        user = User(name="bench", email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="-")
+        session.add(user)
+        session.flush()
+        agent = Agent(name="bench", user_id=user.id)
+        session.add(agent)
+        session.flush()
+        chat_sessions = [ChatSession(agent_id=agent.id, customer_name=f"c{i}") for i in range(count)]
+        session.add_all(chat_sessions)
+        session.commit()
+        return [chat_session.id for chat_session in chat_sessions]
+
+
+async def chat(session_id: int, messages: int, latencies: list) -> None:
+    for i in range(messages):
+        start = time.perf_counter()
+        async with db_session() as session:
+            await AsyncChatController.append_user_message(session, content=f"message {i}", session_id=session_id)
+        latencies.append(time.perf_counter() - start)
+
+
+async def measure(label: str, session_ids: list, messages: int) -> None:
+    latencies: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*[chat(session_id, messages, latencies) for session_id in session_ids])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:<18} {len(latencies) / elapsed:>9.0f} msg/s"
+        f"   p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms"
+        f"   p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.2f} ms"
+    )
+
+
+async def main(sessions: int, messages: int) -> None:
+    create_db_and_tables()
+    await measure("per-request commit", create_sessions(sessions), messages)
+
+    message_buffer.start()
+    try:
+        await measure("group commit", create_sessions(sessions), messages)
+    finally:
+        await message_buffer.stop()
+    print(message_buffer.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent chat sessions")
+    parser.add_argument("--messages", type=int, default=10, help="messages sent by each session")
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.messages))
@@ -0,0 +1,83 @@
+"""
+ModelJSONResponse versus FastAPI's response_model serialization.
+
+Renders a get-session-details response (the largest chat payload) both ways: the
+default path (serialize_response, which dumps and re-validates the model, then
+JSONResponse's json.dumps) and ModelJSONResponse (pydantic's serializer straight to
+bytes). Both bodies are checked to decode to the same JSON first. Needs no database:
+
+    uv run python -m benchmarks.serialization --messages 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.controllers.chat_controller import GetSessionDetailsResponse
+from src.core.responses import ModelJSONResponse
+from src.models.chat import ChatSessionRead, MessageRead
+from src.models.data_schema import CollectedDataRead
+
+
+def build_response(messages: int) -> GetSessionDetailsResponse:
+    now = datetime.utcnow().isoformat()
+    return GetSessionDetailsResponse(
+        session=ChatSessionRead(id=1, agent_id=1, customer_name="Customer", created_at=now),
+        messages=[
+            MessageRead(id=i, session_id=1, sender="User", receiver="Assistant", content="hello world " * 20, created_at=now)
+            for i in range(messages)
+        ],
+        collected_data=[
+            CollectedDataRead(id=i, session_id=1, field_id=i, answer=f"answer {i}", created_at=now)
+            for i in range(10)
+        ],
+    )
+
+
+async def render_default(field, model) -> bytes:
+    content = await serialize_response(field=field, response_content=model, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def render_model(model) -> bytes:
+    return ModelJSONResponse(model).body
+
+
+def measure(label: str, render, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"{label:<18} {elapsed:8.3f} ms per response")
+    return elapsed
+
+
+def main(messages: int, rounds: int) -> None:
+    model = build_response(messages)
+    field = create_model_field(name="Response", type_=GetSessionDetailsResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def default() -> bytes:
+        return loop.run_until_complete(render_default(field, model))
+
+    body = render_model(model)
+    assert json.loads(default()) == json.loads(body), "bodies differ"
+    print(f"{messages} messages, {len(body) / 1024:.0f} KiB")
+
+    baseline = measure("response_model", default, rounds)
+    optimized = measure("ModelJSONResponse", lambda: render_model(model), rounds)
+    print(f"speedup            {baseline / optimized:8.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500, help="messages in the session")
+    parser.add_argument("--rounds", type=int, default=50, help="responses rendered per variant")
+    args = parser.parse_args()
+    main(args.messages, args.rounds)
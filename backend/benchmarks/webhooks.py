@@ -0,0 +1,112 @@
+"""
+Webhook dispatch with and without the per-agent and global concurrency caps.
+
+A stub webhook runs in process (through httpx.ASGITransport) and serves at most
+--stub-workers calls at a time, each taking --latency-ms, like an n8n instance with a
+fixed worker pool. One hot agent sends --hot-calls calls at once while every other agent
+sends its --calls calls one after another (as a chat does). Each run goes through
+WebhookDispatcher.post_json, first with caps no run can reach and then with the configured
+caps, and reports throughput and p50/p95 latency (including time waiting for a slot) for
+all calls and for the quiet agents alone:
+
+    uv run python -m benchmarks.webhooks --agents 50 --hot-calls 500 --per-agent 10
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+from src.core.webhooks import WebhookDispatcher
+
+HOT_AGENT_ID = 0
+
+
+def stub_app(workers: int, latency: float) -> FastAPI:
+    app = FastAPI()
+    capacity = asyncio.Semaphore(workers)
+
+    @app.post("/hook")
+    async def hook(request: Request):
+        payload = await request.json()
+        async with capacity:
+            await asyncio.sleep(latency)
+        return {"content": f"echo {payload['turn']}"}
+
+    return app
+
+
+def percentiles(latencies: list) -> str:
+    if not latencies:
+        return "p50     -      p95     -"
+    latencies = sorted(latencies)
+    return (
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms"
+        f"   p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.2f} ms"
+    )
+
+
+async def call(webhooks: WebhookDispatcher, agent_id: int, turn: int, latencies: list, failures: list) -> None:
+    start = time.perf_counter()
+    try:
+        await webhooks.post_json(agent_id, "http://webhook.stub/hook", {"turn": turn})
+    except HTTPException as exc:
+        failures.append(exc.status_code)
+    latencies.append(time.perf_counter() - start)
+
+
+async def chat(webhooks: WebhookDispatcher, agent_id: int, calls: int, latencies: list, failures: list) -> None:
+    for turn in range(calls):
+        await call(webhooks, agent_id, turn, latencies, failures)
+
+
+async def measure(label: str, webhooks: WebhookDispatcher, args: argparse.Namespace) -> None:
+    webhooks.start(transport=httpx.ASGITransport(stub_app(args.stub_workers, args.latency_ms / 1000)))
+    hot: list = []
+    quiet: list = []
+    failures: list = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *[call(webhooks, HOT_AGENT_ID, turn, hot, failures) for turn in range(args.hot_calls)],
+            *[chat(webhooks, agent_id, args.calls, quiet, failures) for agent_id in range(1, args.agents + 1)]
+        )
+    finally:
+        await webhooks.aclose()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<9} {(len(hot) + len(quiet)) / elapsed:>8.0f} msg/s"
+        f"   all {percentiles(hot + quiet)}"
+        f"   quiet agents {percentiles(quiet)}"
+        f"   failed {len(failures)}"
+    )
+
+
+def dispatcher(args: argparse.Namespace, connections: int, per_agent: int) -> WebhookDispatcher:
+    return WebhookDispatcher(
+        args.timeout, connections, connections, per_agent,
+        max_retries=0, retry_base_seconds=0.01, retry_max_seconds=0.01, allow_private_networks=True
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    # More slots than calls, so nothing ever waits in the dispatcher
+    unlimited = args.hot_calls + args.agents + 1
+    await measure("no caps", dispatcher(args, unlimited, unlimited), args)
+    capped = dispatcher(args, args.connections, args.per_agent)
+    await measure("caps", capped, args)
+    print({key: value for key, value in capped.stats().items() if key != "agents"})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=20, help="quiet agents, each chatting one call at a time")
+    parser.add_argument("--calls", type=int, default=20, help="calls sent by each quiet agent")
+    parser.add_argument("--hot-calls", type=int, default=400, help="concurrent calls sent by the hot agent")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="time the stub spends on each call")
+    parser.add_argument("--stub-workers", type=int, default=32, help="calls the stub serves at once")
+    parser.add_argument("--per-agent", type=int, default=10, help="WEBHOOK_MAX_CONCURRENCY_PER_AGENT for the capped run")
+    parser.add_argument("--connections", type=int, default=32, help="WEBHOOK_MAX_CONNECTIONS for the capped run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="WEBHOOK_TIMEOUT_SECONDS")
+    asyncio.run(main(parser.parse_args()))
@@ -1,170 +1,249 @@
 """
 Agent controller - Business logic for agent operations.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 from sqlmodel import Session, select
 from sqlmodel import func
+from sqlalchemy import Row, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from src.models.agent import Agent, AgentRead, AgentUpdate, AgentCreate
 from src.core.responses import APIResponse, success_response, paginated_response, MessageResponse
-from src.models.data_schema import AgentDataSchema, AgentDataField, AgentDataSchemaRead, AgentDataFieldRead, AgentDataSchemaUpdate, AgentDataFieldUpdate
-from src.models.chat import ChatSession, ChatSessionRead
+from src.models.data_schema import AgentDataSchema, AgentDataField, AgentDataSchemaUpdate, AgentDataFieldUpdate
+from src.models.chat import ChatSession
 from src.core.responses import PaginatedResponse
+from src.core.pagination import keyset_after, next_cursor
+from src.database import DBSession, run_db
+from src.database.pubsub import invalidation_bus
+from src.core.cache import agent_cache
+from src.core.webhooks import UnsafeWebhookURL, webhook_dispatcher
+from src.core.serializers import CHAT_SESSION_READ_COLUMNS, agent_read, agent_reads
+
+
+# Agent mutations in any worker evict this worker's cached copies
+invalidation_bus.subscribe("agent", agent_cache.invalidate, reset=agent_cache.clear)
+
+# AgentRead fields derived from the agent's sessions, which the agent cache leaves out
+AGENT_SESSION_SUMMARY_FIELDS = {"chat_session_count", "open_session_count", "recent_sessions"}
+
+# Schemas and fields AgentRead serializes, loaded with one SELECT per relationship level
+AGENT_READ_OPTIONS = (
+    selectinload(Agent.data_schemas).selectinload(AgentDataSchema.fields),
+)
+
 
 class AgentController:
     """Controller for agent operations."""
 
     @staticmethod
-    def get_agents(session: Session, user_id: int, skip: int = 0, limit: int = 100) -> PaginatedResponse[AgentRead]:
-        """Get all agents for a specific user, including their schemas and fields."""
+    def _cached_agent_read(key: Tuple[str, object]) -> Optional[AgentRead]:
+        """Return the cached AgentRead for ("id", id) or ("chat_url", url), if any, without session counts."""
+        cached = agent_cache.get(key)
+        return AgentRead.model_validate_json(cached) if cached is not None else None
+
+    @staticmethod
+    def _cache_agent_read(agent_data: AgentRead, version: int) -> None:
+        """
+        Cache an AgentRead under its id and chat_url, unless invalidated since `version`.
+
+        Only the agent's own fields and schemas are cached. Session counts change with every
+        new or closed session, which doesn't invalidate the agent, so they are read per request.
+        """
+        payload = agent_data.model_dump_json(exclude=AGENT_SESSION_SUMMARY_FIELDS).encode("utf-8")
+        tags = (agent_data.id,)
+        agent_cache.set(("id", agent_data.id), payload, tags, version)
+        if agent_data.chat_url:
+            agent_cache.set(("chat_url", agent_data.chat_url), payload, tags, version)
+
+    @staticmethod
+    def _load_agent(session: Session, agent_id: int) -> Optional[Agent]:
+        """Load an agent with the relationships AgentRead needs, replacing any stale state."""
+        statement = (
+            select(Agent)
+            .where(Agent.id == agent_id)
+            .options(*AGENT_READ_OPTIONS)
+            .execution_options(populate_existing=True)
+        )
+        return session.exec(statement).first()
+
+    @staticmethod
+    def _session_summaries(
+        session: Session,
+        agent_ids: List[int],
+        sessions_limit: int = 0,
+        sessions_offset: int = 0
+    ) -> Tuple[Dict[int, Tuple[int, int]], Optional[Dict[int, List[Row]]]]:
+        """
+        Count sessions per agent and, if sessions_limit > 0, load a window of each agent's
+        most recent sessions. Each part is a single query however many sessions exist.
+
+        Returns:
+            ({agent_id: (session count, open session count)}, {agent_id: [recent session rows]} or None)
+        """
+        counts: Dict[int, Tuple[int, int]] = {}
+        if not agent_ids:
+            return counts, ({} if sessions_limit > 0 else None)
+
+        count_statement = (
+            select(
+                ChatSession.agent_id,
+                func.count(ChatSession.id),
+                func.sum(case((ChatSession.session_closed.is_(False), 1), else_=0))
+            )
+            .where(ChatSession.agent_id.in_(agent_ids))
+            .group_by(ChatSession.agent_id)
+        )
+        for agent_id, session_count, open_count in session.exec(count_statement):
+            counts[agent_id] = (session_count, open_count or 0)
+
+        if sessions_limit <= 0:
+            return counts, None
+
+        # Number each agent's sessions newest first and keep only the requested window
+        row_number = func.row_number().over(
+            partition_by=ChatSession.agent_id,
+            order_by=(ChatSession.created_at.desc(), ChatSession.id.desc())
+        ).label("row_number")
+        ranked = (
+            select(ChatSession.id, row_number)
+            .where(ChatSession.agent_id.in_(agent_ids))
+            .subquery()
+        )
+        # No ORDER BY: sorting the joined rows needs a temporary B-tree, while each agent's
+        # window is at most sessions_limit rows and is put in order here
+        recent_statement = (
+            select(*CHAT_SESSION_READ_COLUMNS, ranked.c.row_number)
+            .join(ranked, ranked.c.id == ChatSession.id)
+            .where(
+                ranked.c.row_number > sessions_offset,
+                ranked.c.row_number <= sessions_offset + sessions_limit
+            )
+        )
+        recent: Dict[int, List[Row]] = {}
+        for chat_session in session.exec(recent_statement):
+            recent.setdefault(chat_session.agent_id, []).append(chat_session)
+        for chat_sessions in recent.values():
+            chat_sessions.sort(key=lambda chat_session: chat_session.row_number)
+
+        return counts, recent
+
+    @staticmethod
+    def _build_agent_read(
+        agent: Agent,
+        counts: Dict[int, Tuple[int, int]],
+        recent: Optional[Dict[int, List[Row]]] = None
+    ) -> AgentRead:
+        """Convert an agent with loaded schemas and fields, plus its session summary, to AgentRead."""
+        return agent_read(agent, *AgentController._agent_summary(agent.id, counts, recent))
 
-        # Build the statement to fetch agents for the user, eagerly loading data schemas and fields.
-        # This ensures all related data is retrieved in a single query.
+    @staticmethod
+    def _with_session_summary(session: Session, agent_data: AgentRead) -> AgentRead:
+        """Add the current session counts to an AgentRead served from the cache."""
+        counts, _ = AgentController._session_summaries(session, [agent_data.id])
+        chat_session_count, open_session_count, _ = AgentController._agent_summary(agent_data.id, counts)
+        return agent_data.model_copy(update={
+            "chat_session_count": chat_session_count,
+            "open_session_count": open_session_count
+        })
+
+    @staticmethod
+    def _agent_summary(
+        agent_id: int,
+        counts: Dict[int, Tuple[int, int]],
+        recent: Optional[Dict[int, List[Row]]] = None
+    ) -> Tuple[int, int, Optional[List[Row]]]:
+        """Session count, open session count and recent sessions (None when not requested) for an agent."""
+        chat_session_count, open_session_count = counts.get(agent_id, (0, 0))
+        return chat_session_count, open_session_count, None if recent is None else recent.get(agent_id, [])
+
+    @staticmethod
+    def get_agents(
+        session: Session,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        sessions_limit: int = 0,
+        sessions_offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> PaginatedResponse[AgentRead]:
+        """
+        Get all agents for a specific user, including their schemas, fields and session summary.
+
+        Pass the `next_cursor` from a previous page as `cursor` for keyset pagination;
+        `skip` is only used when no cursor is given.
+        """
+
+        # Build the statement to fetch agents for the user, eagerly loading data schemas
+        # and fields so the query count does not grow with the page size.
         statement = (
             select(Agent)
             .where(Agent.user_id == user_id)
-            .order_by(Agent.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+            .options(*AGENT_READ_OPTIONS)
+            .order_by(Agent.created_at.desc(), Agent.id.desc())
+            .limit(limit + 1)  # one extra row tells us whether there is a next page
         )
-        agents = session.exec(statement).all()
+        if cursor:
+            statement = statement.where(keyset_after(Agent.created_at, Agent.id, cursor))
+        else:
+            statement = statement.offset(skip)
+        agents, next_page_cursor = next_cursor(session.exec(statement).all(), limit)
 
         # Get total count for pagination
         total_statement = select(func.count(Agent.id)).where(Agent.user_id == user_id)
         total = session.exec(total_statement).one()
 
-        agents_data = []
-        for agent in agents:
-            agent_data = AgentRead(
-                id=agent.id,
-                name=agent.name,
-                description=agent.description,
-                system_prompt=agent.system_prompt,
-                user_instructions=agent.user_instructions,
-                webhook_url=agent.webhook_url,
-                chat_url=agent.chat_url,
-                user_id=agent.user_id,
-                created_at=agent.created_at.isoformat(),
-                updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-                data_schemas=[], # Initialize with empty list
-                chat_sessions=[] # Initialize with empty list
-            )
+        counts, recent = AgentController._session_summaries(
+            session, [agent.id for agent in agents], sessions_limit, sessions_offset
+        )
 
-            # Manually load data_schemas and fields
-            for schema in agent.data_schemas:
-                schema_read = AgentDataSchemaRead(
-                    id=schema.id,
-                    agent_id=schema.agent_id,
-                    type=schema.type,
-                    created_at=schema.created_at.isoformat(),
-                    fields=[] # Initialize with empty list
-                )
+        agents_data = agent_reads(
+            agents, (AgentController._agent_summary(agent.id, counts, recent) for agent in agents)
+        )
 
-                for field in schema.fields:
-                    field_read = AgentDataFieldRead(
-                        id=field.id,
-                        schema_id=field.schema_id,
-                        key=field.key,
-                        question=field.question,
-                        data_type=field.data_type,
-                        required=field.required,
-                        validation_rules=field.validation_rules,
-                        created_at=field.created_at.isoformat()
-                    )
-                    schema_read.fields.append(field_read)
-
-                agent_data.data_schemas.append(schema_read)
-
-            # Manually load chat_sessions
-            for session in agent.chat_sessions:
-                session_read = ChatSessionRead(
-                    id=session.id,
-                    agent_id=session.agent_id,
-                    customer_name=session.customer_name,
-                    customer_email=session.customer_email,
-                    started_at=session.started_at.isoformat(),
-                    ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                    created_at=session.created_at.isoformat(),
-                    updated_at=session.updated_at.isoformat() if session.updated_at else None
-                )
-                agent_data.chat_sessions.append(session_read)
 
-            agents_data.append(agent_data)
-        
         return paginated_response(
             data=agents_data,
             total=total,
             page=(skip // limit) + 1,
             page_size=limit,
-            message="Agents retrieved successfully"
+            message="Agents retrieved successfully",
+            next_cursor=next_page_cursor
         )
 
     @staticmethod
-    def get_agent_by_id(session: Session, agent_id: int) -> APIResponse[AgentRead]:
+    def get_agent_by_id(
+        session: Session,
+        agent_id: int,
+        sessions_limit: int = 0,
+        sessions_offset: int = 0
+    ) -> APIResponse[AgentRead]:
         """Get a single agent by ID with all related data (public endpoint)."""
 
+        # Plain lookups (no recent sessions) are served from the agent cache, plus fresh session counts
+        cacheable = sessions_limit == 0
+        if cacheable:
+            cached = AgentController._cached_agent_read(("id", agent_id))
+            if cached is not None:
+                return success_response(
+                    data=AgentController._with_session_summary(session, cached),
+                    message="Agent retrieved successfully"
+                )
+        cache_version = agent_cache.version
+
         # Get the agent
-        agent = session.get(Agent, agent_id)
+        agent = AgentController._load_agent(session, agent_id)
         if not agent:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found"
             )
 
-        # Create agent data with empty lists for relationships
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Initialize with empty list
-            chat_sessions=[] # Initialize with empty list
-        )
-
-        # Populate data_schemas and fields
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[] # Initialize with empty list
-            )
-
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions
-        for session_obj in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session_obj.id,
-                agent_id=session_obj.agent_id,
-                customer_name=session_obj.customer_name,
-                customer_email=session_obj.customer_email,
-                started_at=session_obj.started_at.isoformat(),
-                ended_at=session_obj.ended_at.isoformat() if session_obj.ended_at else None,
-                created_at=session_obj.created_at.isoformat(),
-                updated_at=session_obj.updated_at.isoformat() if session_obj.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        # Summarize sessions instead of embedding all of them
+        counts, recent = AgentController._session_summaries(session, [agent.id], sessions_limit, sessions_offset)
+        agent_data = AgentController._build_agent_read(agent, counts, recent)
+        if cacheable:
+            AgentController._cache_agent_read(agent_data, cache_version)
 
         return success_response(
             data=agent_data,
@@ -186,8 +265,7 @@ class AgentController:
             # chat_url is intentionally left out - will be null initially
         )
         session.add(agent)
-        session.commit()
-        session.refresh(agent)  # Now we have agent.id
+        session.flush()  # Now we have agent.id
 
         # 2. Create the AgentDataSchema linked to this Agent
         agent_data_schema = AgentDataSchema(
@@ -195,8 +273,7 @@ class AgentController:
             type=agent_create.type,
         )
         session.add(agent_data_schema)
-        session.commit()
-        session.refresh(agent_data_schema)  # Now we have schema.id
+        session.flush()  # Now we have schema.id
 
         # 3. Create the AgentDataFields linked to the schema
         for field in agent_create.agent_data_fields:
@@ -211,74 +288,44 @@ class AgentController:
             session.add(agent_data_field)
 
         session.commit()
-        # session.refresh(agent_data_field)
-
-        # 4. Refresh agent to load relationships and return agent details with schema/fields
-        session.refresh(agent)
-
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Initialize with empty list
-            chat_sessions=[] # Initialize with empty list
-        )
 
-        # Populate data_schemas and fields
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[] # Initialize with empty list
-            )
+        # 4. Reload agent with relationships and return agent details with schema/fields
+        agent = AgentController._load_agent(session, agent.id)
 
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions (initially empty for new agent)
-        for session in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session.id,
-                agent_id=session.agent_id,
-                customer_name=session.customer_name,
-                customer_email=session.customer_email,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat() if session.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        agent_data = AgentController._build_agent_read(agent, counts={})  # a new agent has no sessions yet
 
         return success_response(
             data=agent_data,
             message="Agent created successfully"
         )
 
+    @staticmethod
+    def _violates_chat_url_index(error: IntegrityError) -> bool:
+        """Whether an IntegrityError is a duplicate chat_url (ux_agents_chat_url)."""
+        diag = getattr(error.orig, "diag", None)
+        if diag is not None:  # PostgreSQL names the violated constraint
+            return getattr(diag, "constraint_name", None) == "ux_agents_chat_url"
+        # SQLite only names the columns: "UNIQUE constraint failed: agents.chat_url"
+        return "agents.chat_url" in str(error.orig)
+
+    @staticmethod
+    def _commit_agent(session: Session) -> None:
+        """Commit an agent change; a chat_url taken by a concurrent request is a 409, not a 500."""
+        try:
+            session.commit()
+        except IntegrityError as error:
+            session.rollback()
+            if not AgentController._violates_chat_url_index(error):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Chat URL is already in use by another agent"
+            )
+
     @staticmethod
     def update_agent(session: Session, agent_id: int, agent_update: AgentUpdate) -> APIResponse[AgentRead]:
         """Update agent information."""
-        agent = session.get(Agent, agent_id)
+        agent = AgentController._load_agent(session, agent_id)
         if not agent:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -291,96 +338,41 @@ class AgentController:
             if field not in ["type", "agent_data_fields"]:
                 setattr(agent, field, value)
         
-        session.add(agent)  
-        session.commit()
-        session.refresh(agent)
+        session.add(agent)
 
         # Update associated AgentDataSchema if type is provided
-        if agent_update.type is not None:
+        if agent_update.type is not None and agent.data_schemas:
             # Assuming an agent has only one data schema for now
-            agent_data_schema = session.exec(select(AgentDataSchema).where(AgentDataSchema.agent_id == agent.id)).first()
-            if agent_data_schema:
-                agent_data_schema.type = agent_update.type
-                session.add(agent_data_schema)
-                session.commit()
-                session.refresh(agent_data_schema)
+            agent.data_schemas[0].type = agent_update.type
 
         # Update or create AgentDataFields
         if agent_update.agent_data_fields is not None and agent.data_schemas:
             current_schema = agent.data_schemas[0] # Assuming one schema per agent
+            # Fields are already loaded with the agent, so only fields of this schema can match
+            existing_fields = {field.id: field for field in current_schema.fields}
             for field_update in agent_update.agent_data_fields:
                 if field_update.id is not None: # Update existing field
-                    agent_data_field = session.get(AgentDataField, field_update.id)
-                    if agent_data_field and agent_data_field.schema_id == current_schema.id:
+                    agent_data_field = existing_fields.get(field_update.id)
+                    if agent_data_field:
                         field_data = field_update.model_dump(exclude_unset=True)
-                        # Exclude schema_id from updates since it should never be changed
-                        field_data = {k: v for k, v in field_data.items() if k != 'schema_id'}
+                        # Exclude id and schema_id from updates since they should never be changed
+                        field_data = {k: v for k, v in field_data.items() if k not in ('id', 'schema_id')}
                         for key, value in field_data.items():
                             setattr(agent_data_field, key, value)
-                        session.add(agent_data_field)
-                        session.commit()
-                        session.refresh(agent_data_field)
                 else: # Create new field
                     new_field = AgentDataField(
                         schema_id=current_schema.id,
-                        **field_update.model_dump(exclude_unset=True)
+                        **field_update.model_dump(exclude_unset=True, exclude={'id'})
                     )
                     session.add(new_field)
-                    session.commit()
-                    session.refresh(new_field)
 
-        session.refresh(agent) # Refresh agent to load updated relationships
-        
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Re-initialize to populate with fresh data
-            chat_sessions=[] # Re-initialize to populate with fresh data
-        )
+        invalidation_bus.publish(session, "agent", agent_id)
+        AgentController._commit_agent(session)
 
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[]
-            )
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions
-        for session in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session.id,
-                agent_id=session.agent_id,
-                customer_name=session.customer_name,
-                customer_email=session.customer_email,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat() if session.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        agent = AgentController._load_agent(session, agent.id) # Reload agent with updated relationships
+        
+        counts, _ = AgentController._session_summaries(session, [agent.id])
+        agent_data = AgentController._build_agent_read(agent, counts)
 
         return success_response(
             data=agent_data,
@@ -404,73 +396,41 @@ class AgentController:
             session.delete(schema)
         
         session.delete(agent)
+        invalidation_bus.publish(session, "agent", agent_id)
         session.commit()
         
         return MessageResponse.success_message("Agent deleted successfully")
 
     @staticmethod
-    def get_agent_by_chat_url(session: Session, chat_url: str) -> APIResponse[AgentRead]:
+    def get_agent_by_chat_url(
+        session: Session,
+        chat_url: str,
+        sessions_limit: int = 0,
+        sessions_offset: int = 0
+    ) -> APIResponse[AgentRead]:
         """Get agent by chat URL."""
-        agent = session.exec(select(Agent).where(Agent.chat_url == chat_url)).first()
+        cacheable = sessions_limit == 0
+        if cacheable:
+            cached = AgentController._cached_agent_read(("chat_url", chat_url))
+            if cached is not None:
+                return success_response(
+                    data=AgentController._with_session_summary(session, cached),
+                    message="Agent retrieved successfully"
+                )
+        cache_version = agent_cache.version
+
+        statement = select(Agent).where(Agent.chat_url == chat_url).options(*AGENT_READ_OPTIONS)
+        agent = session.exec(statement).first()
         if not agent:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found"
             )
 
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Initialize with empty list
-            chat_sessions=[] # Initialize with empty list
-        )
-
-        # Populate data_schemas and fields
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[] # Initialize with empty list
-            )
-
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions
-        for session in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session.id,
-                agent_id=session.agent_id,
-                customer_name=session.customer_name,
-                customer_email=session.customer_email,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat() if session.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        counts, recent = AgentController._session_summaries(session, [agent.id], sessions_limit, sessions_offset)
+        agent_data = AgentController._build_agent_read(agent, counts, recent)
+        if cacheable:
+            AgentController._cache_agent_read(agent_data, cache_version)
 
         return success_response(
             data=agent_data,
@@ -504,63 +464,13 @@ class AgentController:
 
         agent.chat_url = chat_url
         session.add(agent)
-        session.commit()
-        session.refresh(agent)
+        invalidation_bus.publish(session, "agent", agent_id)
+        AgentController._commit_agent(session)
+        agent = AgentController._load_agent(session, agent_id)
 
         # Return updated agent data
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Initialize with empty list
-            chat_sessions=[] # Initialize with empty list
-        )
-
-        # Populate data_schemas and fields
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[] # Initialize with empty list
-            )
-
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions
-        for session in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session.id,
-                agent_id=session.agent_id,
-                customer_name=session.customer_name,
-                customer_email=session.customer_email,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat() if session.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        counts, _ = AgentController._session_summaries(session, [agent.id])
+        agent_data = AgentController._build_agent_read(agent, counts)
 
         return success_response(
             data=agent_data,
@@ -586,66 +496,66 @@ class AgentController:
 
         agent.chat_url = None
         session.add(agent)
+        invalidation_bus.publish(session, "agent", agent_id)
         session.commit()
-        session.refresh(agent)
+        agent = AgentController._load_agent(session, agent_id)
 
         # Return updated agent data
-        agent_data = AgentRead(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            system_prompt=agent.system_prompt,
-            user_instructions=agent.user_instructions,
-            webhook_url=agent.webhook_url,
-            chat_url=agent.chat_url,
-            user_id=agent.user_id,
-            created_at=agent.created_at.isoformat(),
-            updated_at=agent.updated_at.isoformat() if agent.updated_at else None,
-            data_schemas=[], # Initialize with empty list
-            chat_sessions=[] # Initialize with empty list
-        )
-
-        # Populate data_schemas and fields
-        for schema in agent.data_schemas:
-            schema_read = AgentDataSchemaRead(
-                id=schema.id,
-                agent_id=schema.agent_id,
-                type=schema.type,
-                created_at=schema.created_at.isoformat(),
-                fields=[] # Initialize with empty list
-            )
-
-            for field in schema.fields:
-                field_read = AgentDataFieldRead(
-                    id=field.id,
-                    schema_id=field.schema_id,
-                    key=field.key,
-                    question=field.question,
-                    data_type=field.data_type,
-                    required=field.required,
-                    validation_rules=field.validation_rules,
-                    created_at=field.created_at.isoformat()
-                )
-                schema_read.fields.append(field_read)
-
-            agent_data.data_schemas.append(schema_read)
-
-        # Populate chat_sessions
-        for session in agent.chat_sessions:
-            session_read = ChatSessionRead(
-                id=session.id,
-                agent_id=session.agent_id,
-                customer_name=session.customer_name,
-                customer_email=session.customer_email,
-                started_at=session.started_at.isoformat(),
-                ended_at=session.ended_at.isoformat() if session.ended_at else None,
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat() if session.updated_at else None
-            )
-            agent_data.chat_sessions.append(session_read)
+        counts, _ = AgentController._session_summaries(session, [agent.id])
+        agent_data = AgentController._build_agent_read(agent, counts)
 
         return success_response(
             data=agent_data,
             message="Chat URL removed successfully"
         )
 
+
+class AsyncAgentController:
+    """Async entry points for agent operations, backed by `AgentController` via `run_db`."""
+
+    @staticmethod
+    async def get_agents(session: DBSession, **kwargs) -> PaginatedResponse[AgentRead]:
+        return await run_db(session, AgentController.get_agents, **kwargs)
+
+    @staticmethod
+    async def get_agent_by_id(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        return await run_db(session, AgentController.get_agent_by_id, **kwargs)
+
+    @staticmethod
+    async def _check_webhook_url(url: Optional[str]) -> None:
+        """Refuse webhook URLs the gateway would not call (resolved here, off the sync controller)."""
+        if not url:
+            return
+        try:
+            await webhook_dispatcher.check_url(url)
+        except UnsafeWebhookURL as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid webhook URL: {exc}"
+            )
+
+    @staticmethod
+    async def create_agent(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        await AsyncAgentController._check_webhook_url(kwargs["agent_create"].webhook_url)
+        return await run_db(session, AgentController.create_agent, **kwargs)
+
+    @staticmethod
+    async def update_agent(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        await AsyncAgentController._check_webhook_url(kwargs["agent_update"].webhook_url)
+        return await run_db(session, AgentController.update_agent, **kwargs)
+
+    @staticmethod
+    async def delete_agent(session: DBSession, **kwargs) -> MessageResponse:
+        return await run_db(session, AgentController.delete_agent, **kwargs)
+
+    @staticmethod
+    async def get_agent_by_chat_url(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        return await run_db(session, AgentController.get_agent_by_chat_url, **kwargs)
+
+    @staticmethod
+    async def add_chat_url(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        return await run_db(session, AgentController.add_chat_url, **kwargs)
+
+    @staticmethod
+    async def remove_chat_url(session: DBSession, **kwargs) -> APIResponse[AgentRead]:
+        return await run_db(session, AgentController.remove_chat_url, **kwargs)
@@ -5,31 +5,44 @@ from datetime import timedelta
 from typing import Optional
 from fastapi import HTTPException, status
 from sqlmodel import Session, select
+from sqlalchemy import update
 
 from ..models.user import User, UserRead
-from ..core.auth import verify_password, get_password_hash, create_access_token
+from ..core.auth import verify_password, get_password_hash, create_access_token, password_hasher, password_needs_rehash
 from ..core.config import ACCESS_TOKEN_EXPIRE_MINUTES
-from ..core.responses import APIResponse, success_response, error_response
+from ..core.types import Principal
+from ..core.serializers import user_read
+from ..core.responses import APIResponse, success_response, error_response, MessageResponse
+from ..database import DBSession, run_db
+from ..database.pubsub import invalidation_bus
 
 
 class AuthController:
     """Controller for authentication operations."""
     
     @staticmethod
-    def create_user(session: Session, name: str, email: str, password: str) -> APIResponse[UserRead]:
-        """Create a new user account."""
-        # Check if user already exists
-        statement = select(User).where(User.email == email)
-        existing_user = session.exec(statement).first()
-        
-        if existing_user:
+    def ensure_email_available(session: Session, email: str) -> None:
+        """Raise a 400 if a user already has this email."""
+        existing_user = session.exec(select(User.id).where(User.email == email)).first()
+        if existing_user is not None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
+
+    @staticmethod
+    def create_user(
+        session: Session,
+        name: str,
+        email: str,
+        password: str,
+        password_hash: Optional[str] = None
+    ) -> APIResponse[UserRead]:
+        """Create a new user account. A pre-computed `password_hash` skips hashing here."""
+        AuthController.ensure_email_available(session, email)
+
         # Create new user
-        hashed_password = get_password_hash(password)
+        hashed_password = password_hash or get_password_hash(password)
         db_user = User(
             name=name,
             email=email,
@@ -40,13 +53,7 @@ class AuthController:
         session.commit()
         session.refresh(db_user)
         
-        user_data = UserRead(
-            id=db_user.id,
-            name=db_user.name,
-            email=db_user.email,
-            created_at=db_user.created_at.isoformat(),
-            updated_at=db_user.updated_at.isoformat() if db_user.updated_at else None
-        )
+        user_data = user_read(db_user)
         
         return success_response(
             data=user_data,
@@ -57,20 +64,62 @@ class AuthController:
     def authenticate_user(session: Session, email: str, password: str) -> APIResponse[dict]:
         """Authenticate user and return access token."""
         # Find user by email
-        statement = select(User).where(User.email == email)
-        user = session.exec(statement).first()
+        user = AuthController.get_user_by_email(session, email)
         
         if not user or not verify_password(password, user.password_hash):
+            raise AuthController.invalid_credentials()
+        
+        return AuthController.token_response(user)
+    
+    @staticmethod
+    def replace_password_hash(session: Session, user_id: int, old_hash: str, new_hash: str) -> None:
+        """Store a rehashed password, unless the password changed in the meantime."""
+        session.exec(
+            update(User)
+            .where(User.id == user_id, User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+        )
+        session.commit()
+
+    @staticmethod
+    def get_user_by_email(session: Session, email: str) -> Optional[User]:
+        """Find a user by email."""
+        statement = select(User).where(User.email == email)
+        return session.exec(statement).first()
+    
+    @staticmethod
+    def invalid_credentials() -> HTTPException:
+        """Build the error raised for a failed login."""
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    @staticmethod
+    def revoke_tokens(session: Session, user_id: int) -> MessageResponse:
+        """Revoke every token issued to the user so far by bumping their token version."""
+        user = session.get(User, user_id)
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password",
-                headers={"WWW-Authenticate": "Bearer"},
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
             )
-        
+
+        user.token_version += 1
+        session.add(user)
+        invalidation_bus.publish(session, "user", user_id)
+        session.commit()
+
+        return MessageResponse.success_message("All tokens revoked successfully")
+
+    @staticmethod
+    def token_response(user: User) -> APIResponse[dict]:
+        """Issue an access token for an authenticated user."""
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.email},
+            data={"sub": user.email, "uid": user.id, "ver": user.token_version},
             expires_delta=access_token_expires
         )
         
@@ -82,17 +131,56 @@ class AuthController:
         )
     
     @staticmethod
-    def get_user_profile(user: User) -> APIResponse[UserRead]:
+    def get_user_profile(user: Principal) -> APIResponse[UserRead]:
         """Get user profile information."""
-        user_data = UserRead(
-            id=user.id,
-            name=user.name,
-            email=user.email,
-            created_at=user.created_at.isoformat(),
-            updated_at=user.updated_at.isoformat() if user.updated_at else None
-        )
+        user_data = user_read(user)
         
         return success_response(
             data=user_data,
             message="User profile retrieved successfully"
         )
+
+
+class AsyncAuthController:
+    """Async entry points for authentication.
+
+    Database work goes through `run_db`; bcrypt runs on the bounded `password_hasher`
+    pool so it never blocks the event loop or the request threadpool.
+    """
+
+    @staticmethod
+    async def create_user(session: DBSession, name: str, email: str, password: str) -> APIResponse[UserRead]:
+        """Create a new user account."""
+        # A taken email is refused before paying for bcrypt; create_user checks again
+        await run_db(session, AuthController.ensure_email_available, email)
+        password_hash = await password_hasher.hash(password)
+        return await run_db(
+            session,
+            AuthController.create_user,
+            name=name,
+            email=email,
+            password=password,
+            password_hash=password_hash
+        )
+
+    @staticmethod
+    async def authenticate_user(session: DBSession, email: str, password: str) -> APIResponse[dict]:
+        """Authenticate user and return access token."""
+        user = await run_db(session, AuthController.get_user_by_email, email)
+
+        if not user or not await password_hasher.verify(password, user.password_hash):
+            raise AuthController.invalid_credentials()
+
+        # Issue the token first: the rehash commit expires `user`
+        response = AuthController.token_response(user)
+
+        # Upgrade the hash to the configured work factor while we have the password
+        if password_needs_rehash(user.password_hash):
+            new_hash = await password_hasher.hash(password)
+            await run_db(session, AuthController.replace_password_hash, user.id, user.password_hash, new_hash)
+
+        return response
+
+    @staticmethod
+    async def revoke_tokens(session: DBSession, **kwargs) -> MessageResponse:
+        return await run_db(session, AuthController.revoke_tokens, **kwargs)
@@ -1,16 +1,35 @@
 """
 Chat controller - Business logic for chat session operations.
 """
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Literal, Optional, Set, Tuple
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
-from pydantic import BaseModel
+from sqlmodel import Session, select, func, and_, or_
+from sqlalchemy import Row, Select, insert, literal, null, union_all, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from pydantic import BaseModel, Field
+from pydantic_core import to_json
 
 from src.models.chat import ChatSession, ChatSessionCreate, ChatSessionRead, Message, MessageRead, MessageCreate, AgentOutput, AgentOutputRead
 from src.models.customer import Customer, CustomerCreate, CustomerRead
-from src.models.data_schema import CollectedData, CollectedDataRead, AgentDataField
-from src.models.agent import Agent
-from src.core.responses import APIResponse, success_response, MessageResponse
+from src.models.data_schema import CollectedData, CollectedDataRead, AgentDataField, AgentDataSchema
+from src.models.agent import Agent, AgentRead
+from src.core.responses import APIResponse, success_response, MessageResponse, pagination_meta
+from src.core.pagination import keyset_after, next_cursor
+from src.core.serializers import (
+    MESSAGE_READ_COLUMNS,
+    COLLECTED_DATA_READ_COLUMNS,
+    iso,
+    chat_session_read,
+    collected_data_reads,
+    customer_read,
+    message_reads,
+)
+from src.controllers.agent_controller import AgentController
+from src.database import DBSession, run_db, record_write, index_available
+from src.database.group_commit import message_buffer
+from src.database.broadcast import StreamEvent, session_broadcaster
 
 
 class GetOrCreateSessionRequest(BaseModel):
@@ -18,6 +37,7 @@ class GetOrCreateSessionRequest(BaseModel):
     agent_id: int
     customer_name: Optional[str] = None
     customer_email: Optional[str] = None
+    message_limit: Optional[int] = Field(default=None, ge=1, le=500)  # only the last N messages
 
 
 class GetOrCreateSessionResponse(BaseModel):
@@ -27,6 +47,7 @@ class GetOrCreateSessionResponse(BaseModel):
     messages: List[MessageRead]
     collected_data: List[CollectedDataRead]
     is_new_session: bool
+    has_more_messages: bool = False
 
 
 class AppendFirstMessageRequest(BaseModel):
@@ -86,6 +107,27 @@ class AppendAiMessageWithDataResponse(BaseModel):
     collected_data: List[CollectedDataRead]
 
 
+class BatchMessageItem(BaseModel):
+    """Model for one message in an append-batch request."""
+    session_id: int
+    content: str
+    role: Literal["user", "assistant"]  # "user" is sent as User -> Assistant, "assistant" the reverse
+
+
+class AppendBatchRequest(BaseModel):
+    """Request model for append-batch endpoint (one or more n8n turns)."""
+    messages: List[BatchMessageItem] = Field(default_factory=list, max_length=200)  # stored in this order
+    collected_data: List[CollectedDataItem] = Field(default_factory=list, max_length=500)
+    close_session_ids: List[int] = Field(default_factory=list, max_length=200)
+
+
+class AppendBatchResponse(BaseModel):
+    """Response model for append-batch endpoint."""
+    messages: List[MessageRead]
+    collected_data: List[CollectedDataRead]
+    closed_session_ids: List[int]
+
+
 class ConversationWithAgent(BaseModel):
     """Model for conversation with agent details."""
     id: int
@@ -108,11 +150,25 @@ class ConversationWithAgent(BaseModel):
 class GetConversationsResponse(BaseModel):
     """Response model for get-conversations endpoint."""
     conversations: List[ConversationWithAgent]
+    meta: Optional[dict] = None
+
+
+# Columns get-conversations can be sorted by
+CONVERSATION_SORT_COLUMNS = {
+    "created_at": ChatSession.created_at,
+    "started_at": ChatSession.started_at,
+    "updated_at": ChatSession.updated_at,
+    "customer_name": ChatSession.customer_name,
+    "customer_email": ChatSession.customer_email,
+}
 
 
 class GetSessionDetailsRequest(BaseModel):
     """Request model for get-session-details endpoint."""
     session_id: int
+    message_limit: Optional[int] = Field(default=None, ge=1, le=500)  # window size; all messages when omitted
+    before_id: Optional[int] = None  # scroll back: messages older than this message
+    after_id: Optional[int] = None  # catch up: messages newer than this message
 
 
 class GetSessionDetailsResponse(BaseModel):
@@ -120,167 +176,444 @@ class GetSessionDetailsResponse(BaseModel):
     session: ChatSessionRead
     messages: List[MessageRead]
     collected_data: List[CollectedDataRead]
+    has_more_messages: bool = False  # more messages exist past the window
+
+
+class GatewayContext(BaseModel):
+    """Session state the WebSocket gateway sends to the agent webhook with every turn."""
+    customer: Optional[CustomerRead] = None
+    session: ChatSessionRead
+    messages: List[MessageRead]
+    collected_data: List[CollectedDataRead]
+    agent: AgentRead
+
+
+# Sender and receiver stored for each batch message role
+BATCH_MESSAGE_ROLES = {
+    "user": ("User", "Assistant"),
+    "assistant": ("Assistant", "User"),
+}
+
+# Dialects with INSERT ... ON CONFLICT ... RETURNING
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
 
 
 class ChatController:
     """Controller for chat session operations."""
 
     @staticmethod
-    def get_or_create_session(session: Session, agent_id: int, customer_name: Optional[str] = None, customer_email: Optional[str] = None) -> GetOrCreateSessionResponse:
-        """Get existing session or create new customer and session."""
+    def _message_window(
+        session: Session,
+        session_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[List[Row], bool]:
+        """
+        Load a window of a session's messages, as MessageRead column rows, in chronological order.
+
+        Without a limit every matching message is returned. With a limit, the newest `limit`
+        messages (before `before_id` when given) are returned, or the oldest `limit` after
+        `after_id`. The flag tells whether more messages exist past the window in that direction.
+        """
+        statement, newest_first = ChatController._message_window_statement(session_id, limit, before_id, after_id)
+        return ChatController._trim_message_window(list(session.exec(statement).all()), limit, newest_first)
 
-        # Validate that agent exists
-        agent = session.get(Agent, agent_id)
-        if not agent:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Agent not found"
-            )
+    @staticmethod
+    def _message_window_statement(
+        session_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[Select, bool]:
+        """The SELECT behind _message_window, and whether it reads newest first."""
+        statement = select(*MESSAGE_READ_COLUMNS).where(Message.session_id == session_id)
+
+        # Cursors compare on (created_at, id) of the anchor message, looked up inline
+        if before_id is not None:
+            anchor = select(Message.created_at).where(
+                Message.id == before_id, Message.session_id == session_id
+            ).scalar_subquery()
+            statement = statement.where(or_(
+                Message.created_at < anchor,
+                and_(Message.created_at == anchor, Message.id < before_id)
+            ))
+        if after_id is not None:
+            anchor = select(Message.created_at).where(
+                Message.id == after_id, Message.session_id == session_id
+            ).scalar_subquery()
+            statement = statement.where(or_(
+                Message.created_at > anchor,
+                and_(Message.created_at == anchor, Message.id > after_id)
+            ))
 
-        is_new_session = False
+        newest_first = limit is not None and after_id is None
+        if newest_first:
+            statement = statement.order_by(Message.created_at.desc(), Message.id.desc())
+        else:
+            statement = statement.order_by(Message.created_at.asc(), Message.id.asc())
+        if limit is not None:
+            statement = statement.limit(limit + 1)  # one extra row tells us whether there is more
+        return statement, newest_first
 
-        # Try to find existing customer by email for this agent
-        customer = None
-        if customer_email:
-            customer = session.exec(
-                select(Customer).where(
-                    Customer.agent_id == agent_id,
-                    Customer.email == customer_email
-                )
-            ).first()
+    @staticmethod
+    def _trim_message_window(messages: List[Row], limit: Optional[int], newest_first: bool) -> Tuple[List[Row], bool]:
+        """Drop the look-ahead row of a window read and put it in chronological order."""
+        has_more = limit is not None and len(messages) > limit
+        if has_more:
+            messages = messages[:limit]
+        if newest_first:
+            messages.reverse()
+
+        return messages, has_more
 
-        # If customer doesn't exist, create one
+    @staticmethod
+    def _upsert_customer(
+        session: Session,
+        agent_id: int,
+        customer_name: Optional[str],
+        customer_email: Optional[str]
+    ) -> Customer:
+        """
+        Insert the customer, or return the existing one for (agent_id, email).
+
+        On PostgreSQL and SQLite this is a single INSERT ... SELECT ... ON CONFLICT ... RETURNING
+        that also checks the agent exists; the no-op DO UPDATE locks the existing row until commit.
+        ON CONFLICT needs the unique (agent_id, email) index, so databases without it look up first.
+        """
+        dialect_insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if dialect_insert is None or not index_available("ux_customers_agent_id_email"):
+            # Generic fallback: look up, then insert
+            if not session.get(Agent, agent_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Agent not found"
+                )
+            customer = None
+            if customer_email:
+                customer = session.exec(
+                    select(Customer).where(Customer.agent_id == agent_id, Customer.email == customer_email)
+                ).first()
+            if not customer:
+                customer = Customer(agent_id=agent_id, name=customer_name, email=customer_email)
+                session.add(customer)
+                session.flush()
+            return customer
+
+        columns = Customer.__table__.c
+        statement = dialect_insert(Customer).from_select(
+            ["agent_id", "name", "email", "created_at"],
+            select(
+                Agent.id,
+                literal(customer_name, columns.name.type),
+                literal(customer_email, columns.email.type),
+                literal(datetime.utcnow(), columns.created_at.type)
+            ).where(Agent.id == agent_id)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["agent_id", "email"],
+            set_={"email": statement.excluded.email}
+        ).returning(Customer)
+        customer = session.exec(
+            statement, execution_options={"populate_existing": True}
+        ).scalars().first()
+
+        # No row selected from agents means nothing was inserted
         if not customer:
-            customer = Customer(
-                agent_id=agent_id,
-                name=customer_name,
-                email=customer_email
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Agent not found"
             )
-            session.add(customer)
-            session.commit()
-            session.refresh(customer)
+        return customer
+
+    @staticmethod
+    def _session_history(
+        session: Session,
+        session_id: int,
+        message_limit: Optional[int] = None
+    ) -> Tuple[List[Row], bool, List[Row]]:
+        """
+        Load a session's message window and its collected data with a single UNION ALL read.
+
+        Returns:
+            (messages in chronological order, whether older messages exist, collected data rows)
+        """
+        window, _ = ChatController._message_window_statement(session_id, message_limit)
+        window = window.subquery()
+        messages = select(
+            literal("message").label("kind"), window.c.id, window.c.session_id, window.c.sender,
+            window.c.receiver, window.c.content, null().label("field_id"), null().label("answer"),
+            window.c.created_at
+        )
+        collected_data = select(
+            literal("collected_data").label("kind"), CollectedData.id, CollectedData.session_id, null(), null(),
+            null(), CollectedData.field_id, CollectedData.answer, CollectedData.created_at
+        ).where(CollectedData.session_id == session_id)
+
+        rows = session.exec(union_all(messages, collected_data)).all()
+        # A union keeps no order; both parts are put back in (created_at, id) order here
+        rows = sorted(rows, key=lambda row: (row.created_at, row.id))
+        messages = [row for row in rows if row.kind == "message"]
+        has_more_messages = message_limit is not None and len(messages) > message_limit
+        if has_more_messages:
+            messages = messages[1:]  # the look-ahead row is the oldest one
+        return messages, has_more_messages, [row for row in rows if row.kind == "collected_data"]
 
-        # Check if there's an active session for this customer
-        # For now, we'll get the most recent session or create a new one
-        chat_session = session.exec(
+    @staticmethod
+    def _insert_session(session: Session, agent_id: int, customer: Customer) -> Tuple[ChatSession, bool]:
+        """
+        Create the customer's session, or return the one that already exists.
+
+        On PostgreSQL and SQLite this is an INSERT ... ON CONFLICT DO NOTHING RETURNING on the
+        unique (agent_id, customer_name, customer_email) index: of two concurrent first visits
+        one inserts and the other gets no row back and reads the winner's session. Databases
+        without the index look up first, as _upsert_customer does.
+
+        Returns:
+            (session, whether it was created by this call)
+        """
+        latest = (
             select(ChatSession).where(
                 ChatSession.agent_id == agent_id,
                 ChatSession.customer_name == customer.name,
                 ChatSession.customer_email == customer.email
-            ).order_by(ChatSession.created_at.desc())
-        ).first()
+            ).order_by(ChatSession.created_at.desc()).limit(1)
+        )
 
-        if not chat_session:
-            # Create new session
-            chat_session = ChatSession(
-                agent_id=agent_id,
-                customer_name=customer.name,
-                customer_email=customer.email
-            )
+        dialect_insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if dialect_insert is None or not index_available("ux_chat_sessions_agent_id_customer"):
+            # Generic fallback: look up, then insert
+            chat_session = session.exec(latest).first()
+            if chat_session:
+                return chat_session, False
+            chat_session = ChatSession(agent_id=agent_id, customer_name=customer.name, customer_email=customer.email)
             session.add(chat_session)
-            session.commit()
-            session.refresh(chat_session)
-            is_new_session = True
+            session.flush()
+            return chat_session, True
+
+        now = datetime.utcnow()
+        statement = dialect_insert(ChatSession).values(
+            agent_id=agent_id,
+            customer_name=customer.name,
+            customer_email=customer.email,
+            session_closed=False,
+            started_at=now,
+            created_at=now
+        ).on_conflict_do_nothing(
+            index_elements=["agent_id", "customer_name", "customer_email"]
+        ).returning(ChatSession)
+        chat_session = session.exec(statement).scalars().first()
+        if chat_session:
+            return chat_session, True
+        # The conflicting row is committed (ON CONFLICT waited for it), so it is visible now
+        return session.exec(latest).one(), False
 
-        # Get messages for the session
-        messages = session.exec(
-            select(Message).where(Message.session_id == chat_session.id)
-            .order_by(Message.created_at.asc())
-        ).all()
+    @staticmethod
+    def get_or_create_session(
+        session: Session,
+        agent_id: int,
+        customer_name: Optional[str] = None,
+        customer_email: Optional[str] = None,
+        message_limit: Optional[int] = None
+    ) -> GetOrCreateSessionResponse:
+        """
+        Get existing session or create new customer and session.
+
+        A returning customer is resolved with a single read. Otherwise the customer is
+        upserted on (agent_id, email) and the session inserted on the unique session index
+        in one transaction, so concurrent first visits share one customer and one session.
+        History is read in one more query.
+        """
+        customer = None
+        chat_session = None
+        is_new_session = False
+        wrote = False
 
-        # Get collected data for the session
-        collected_data = session.exec(
-            select(CollectedData).where(CollectedData.session_id == chat_session.id)
-            .order_by(CollectedData.created_at.asc())
-        ).all()
+        # Fast path: existing customer and their latest session in one query
+        if customer_email:
+            row = session.exec(
+                select(Customer, ChatSession)
+                .join(Agent, Agent.id == Customer.agent_id)
+                .outerjoin(ChatSession, and_(
+                    ChatSession.agent_id == Customer.agent_id,
+                    ChatSession.customer_name == Customer.name,
+                    ChatSession.customer_email == Customer.email
+                ))
+                .where(Customer.agent_id == agent_id, Customer.email == customer_email)
+                .order_by(ChatSession.created_at.desc())
+                .limit(1)
+            ).first()
+            if row:
+                customer, chat_session = row
 
-        # Convert to response models
-        customer_read = CustomerRead(
-            id=customer.id,
-            agent_id=customer.agent_id,
-            name=customer.name,
-            email=customer.email,
-            created_at=customer.created_at.isoformat()
-        )
+        if not customer:
+            customer = ChatController._upsert_customer(session, agent_id, customer_name, customer_email)
+            wrote = True
 
-        session_read = ChatSessionRead(
-            id=chat_session.id,
-            agent_id=chat_session.agent_id,
-            customer_name=chat_session.customer_name,
-            customer_email=chat_session.customer_email,
-            started_at=chat_session.started_at.isoformat(),
-            ended_at=chat_session.ended_at.isoformat() if chat_session.ended_at else None,
-            created_at=chat_session.created_at.isoformat(),
-            updated_at=chat_session.updated_at.isoformat() if chat_session.updated_at else None
-        )
+        if not chat_session:
+            # A concurrent first visit may have inserted it since the read above
+            chat_session, is_new_session = ChatController._insert_session(session, agent_id, customer)
+            wrote = wrote or is_new_session
+
+        if is_new_session:
+            # A brand-new session has no history yet
+            messages, has_more_messages, collected_data = [], False, []
+        else:
+            # Messages (the latest window when message_limit is set) and collected data
+            messages, has_more_messages, collected_data = ChatController._session_history(
+                session, chat_session.id, message_limit
+            )
 
-        messages_read = []
-        for message in messages:
-            messages_read.append(MessageRead(
-                id=message.id,
-                session_id=message.session_id,
-                sender=message.sender,
-                receiver=message.receiver,
-                content=message.content,
-                created_at=message.created_at.isoformat()
-            ))
+        # Convert to response models
+        customer_data = customer_read(customer)
+        session_read = chat_session_read(chat_session)
+        messages_read = message_reads(messages)
+        collected_data_read = collected_data_reads(collected_data)
 
-        collected_data_read = []
-        for data in collected_data:
-            collected_data_read.append(CollectedDataRead(
-                id=data.id,
-                session_id=data.session_id,
-                field_id=data.field_id,
-                answer=data.answer,
-                created_at=data.created_at.isoformat()
-            ))
+        # Single commit for everything written above; the fast path is read-only
+        if wrote:
+            session.commit()
 
         return GetOrCreateSessionResponse(
-            customer=customer_read,
+            customer=customer_data,
             session=session_read,
             messages=messages_read,
             collected_data=collected_data_read,
-            is_new_session=is_new_session
+            is_new_session=is_new_session,
+            has_more_messages=has_more_messages
         )
 
     @staticmethod
-    def append_first_message(
+    def _insert_message(
         session: Session,
+        session_id: int,
         sender: str,
         receiver: str,
-        content: str,
-        session_id: int
-    ) -> AppendFirstMessageResponse:
-        """Append a message to an existing session."""
+        content: str
+    ) -> MessageRead:
+        """
+        Insert a message into an existing chat session and return it (not committed).
+
+        Where the dialect supports RETURNING this is one INSERT ... SELECT FROM chat_sessions,
+        so the session check, the insert and the generated id come back in a single round trip.
+        """
+        created_at = datetime.utcnow()
+        if session.get_bind().dialect.insert_returning:
+            columns = Message.__table__.c
+            message_id = session.exec(
+                insert(Message).from_select(
+                    ["session_id", "sender", "receiver", "content", "created_at"],
+                    select(
+                        ChatSession.id,
+                        literal(sender, columns.sender.type),
+                        literal(receiver, columns.receiver.type),
+                        literal(content, columns.content.type),
+                        literal(created_at, columns.created_at.type)
+                    ).where(ChatSession.id == session_id)
+                ).returning(Message.id)
+            ).scalar()
+        else:
+            message_id = None
+            if session.get(ChatSession, session_id):
+                message = Message(
+                    session_id=session_id,
+                    sender=sender,
+                    receiver=receiver,
+                    content=content,
+                    created_at=created_at
+                )
+                session.add(message)
+                session.flush()
+                message_id = message.id
 
-        # Validate that session exists
-        chat_session = session.get(ChatSession, session_id)
-        if not chat_session:
+        # Nothing selected from chat_sessions means the session doesn't exist
+        if message_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
 
-        # Create the message
-        message = Message(
+        message_data = MessageRead(
+            id=message_id,
             session_id=session_id,
             sender=sender,
             receiver=receiver,
-            content=content
+            content=content,
+            created_at=iso(created_at)
         )
-        session.add(message)
+        session_broadcaster.publish(session, "message", session_id, message_id, message_data)
+        return message_data
+
+    @staticmethod
+    def _valid_collected_fields(session: Session, items: Iterable[CollectedDataItem]) -> Set[Tuple[int, int]]:
+        """
+        Return the (session_id, field_id) pairs whose field belongs to the session's agent.
+
+        All pairs are checked with one query, however many items there are.
+        """
+        pairs = {(item.session_id, item.field_id) for item in items}
+        if not pairs:
+            return set()
+
+        rows = session.exec(
+            select(ChatSession.id, AgentDataField.id)
+            .join(AgentDataSchema, AgentDataSchema.agent_id == ChatSession.agent_id)
+            .join(AgentDataField, AgentDataField.schema_id == AgentDataSchema.id)
+            .where(
+                ChatSession.id.in_({session_id for session_id, _ in pairs}),
+                AgentDataField.id.in_({field_id for _, field_id in pairs})
+            )
+        ).all()
+        return pairs & {(session_id, field_id) for session_id, field_id in rows}
+
+    @staticmethod
+    def _insert_collected_data(session: Session, items: List[CollectedDataItem]) -> List[CollectedDataRead]:
+        """
+        Insert the valid collected data items with one multi-row INSERT (not committed).
+
+        Items whose field isn't part of the session's agent schema are skipped. Rows are
+        read back through RETURNING where supported, so the statement count stays constant.
+        """
+        valid_fields = ChatController._valid_collected_fields(session, items)
+        created_at = datetime.utcnow()
+        rows = [
+            {"session_id": item.session_id, "field_id": item.field_id, "answer": item.answer, "created_at": created_at}
+            for item in items
+            if (item.session_id, item.field_id) in valid_fields
+        ]
+        if not rows:
+            return []
+
+        if session.get_bind().dialect.insert_returning:
+            inserted = session.exec(
+                insert(CollectedData).values(rows).returning(*COLLECTED_DATA_READ_COLUMNS)
+            ).all()
+        else:
+            inserted = [CollectedData(**row) for row in rows]
+            session.add_all(inserted)
+            session.flush()
+
+        collected_data_read = collected_data_reads(sorted(inserted, key=lambda data: data.id))
+        for data in collected_data_read:
+            session_broadcaster.publish(session, "collected_data", data.session_id, data.id, data)
+        return collected_data_read
+
+    @staticmethod
+    def append_first_message(
+        session: Session,
+        sender: str,
+        receiver: str,
+        content: str,
+        session_id: int
+    ) -> AppendFirstMessageResponse:
+        """Append a message to an existing session."""
+
+        # Validate the session and insert the message in one statement
+        message_read = ChatController._insert_message(session, session_id, sender, receiver, content)
         session.commit()
-        session.refresh(message)
-
-        # Convert to response model
-        message_read = MessageRead(
-            id=message.id,
-            session_id=message.session_id,
-            sender=message.sender,
-            receiver=message.receiver,
-            content=message.content,
-            created_at=message.created_at.isoformat()
-        )
 
         return AppendFirstMessageResponse(
             message=message_read
@@ -291,75 +624,32 @@ class ChatController:
         session: Session,
         content: str,
         session_id: int,
-        collected_data: Optional[List[dict]] = None,
+        collected_data: Optional[List[CollectedDataItem]] = None,
         session_closed: Optional[bool] = False
     ) -> AppendAiMessageWithDataResponse:
         """Append an AI message and collected data to an existing session. This endpoint is used by n8n, not our frontend."""
 
-        # Validate that session exists
-        chat_session = session.get(ChatSession, session_id)
-        if not chat_session:
+        # Items carry their own session_id; they may only write to the session of the request
+        other_session_ids = {item.session_id for item in collected_data or []} - {session_id}
+        if other_session_ids:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Collected data for session {min(other_session_ids)} sent to session {session_id}"
             )
 
-        # Create the message with default sender and receiver for AI
-        message = Message(
-            session_id=session_id,
-            sender="Assistant",
-            receiver="User",
-            content=content
-        )
-        session.add(message)
+        # Validate the session and insert the message in one statement
+        message_read = ChatController._insert_message(session, session_id, "Assistant", "User", content)
 
         # If session_closed is True, mark the session as closed
         if session_closed:
-            chat_session.session_closed = True
-
-        session.commit()
-        session.refresh(message)
-
-        # Create collected data if provided
-        collected_data_objects = []
-        if collected_data:
-            for data_item in collected_data:
-                # Validate that the field exists
-                field = session.get(AgentDataField, data_item.field_id)
-                if field:
-                    collected_data_obj = CollectedData(
-                        session_id=data_item.session_id,
-                        field_id=data_item.field_id,
-                        answer=data_item.answer
-                    )
-                    session.add(collected_data_obj)
-                    collected_data_objects.append(collected_data_obj)
-
-            session.commit()
+            session.exec(
+                update(ChatSession).where(ChatSession.id == session_id).values(session_closed=True)
+            )
 
-            # Refresh all collected data objects
-            for data_obj in collected_data_objects:
-                session.refresh(data_obj)
+        # Validate all fields with one query, then insert them with one statement
+        collected_data_read = ChatController._insert_collected_data(session, collected_data or [])
 
-        # Convert to response models
-        message_read = MessageRead(
-            id=message.id,
-            session_id=message.session_id,
-            sender=message.sender,
-            receiver=message.receiver,
-            content=message.content,
-            created_at=message.created_at.isoformat()
-        )
-
-        collected_data_read = []
-        for data in collected_data_objects:
-            collected_data_read.append(CollectedDataRead(
-                id=data.id,
-                session_id=data.session_id,
-                field_id=data.field_id,
-                answer=data.answer,
-                created_at=data.created_at.isoformat()
-            ))
+        session.commit()
 
         return AppendAiMessageWithDataResponse(
             message=message_read,
@@ -374,34 +664,9 @@ class ChatController:
     ) -> AppendUserMessageResponse:
         """Append a user message to an existing session. Used by n8n"""
 
-        # Validate that session exists
-        chat_session = session.get(ChatSession, session_id)
-        if not chat_session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
-
-        # Create the message with default sender and receiver
-        message = Message(
-            session_id=session_id,
-            sender="User",
-            receiver="Assistant",
-            content=content
-        )
-        session.add(message)
+        # Validate the session and insert the message in one statement
+        message_read = ChatController._insert_message(session, session_id, "User", "Assistant", content)
         session.commit()
-        session.refresh(message)
-
-        # Convert to response model
-        message_read = MessageRead(
-            id=message.id,
-            session_id=message.session_id,
-            sender=message.sender,
-            receiver=message.receiver,
-            content=message.content,
-            created_at=message.created_at.isoformat()
-        )
 
         return AppendUserMessageResponse(
             message=message_read
@@ -416,94 +681,207 @@ class ChatController:
     ) -> AppendAiMessageResponse:
         """Append an AI message to an existing session. Used by n8n"""
 
-        # Validate that session exists
-        chat_session = session.get(ChatSession, session_id)
-        if not chat_session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
-
-        # Create the message with default sender and receiver for AI
-        message = Message(
-            session_id=session_id,
-            sender="Assistant",
-            receiver="User",
-            content=content
-        )
-        session.add(message)
+        # Validate the session and insert the message in one statement
+        message_read = ChatController._insert_message(session, session_id, "Assistant", "User", content)
 
         # If session_closed is True, mark the session as closed
         if session_closed:
-            chat_session.session_closed = True
+            session.exec(
+                update(ChatSession).where(ChatSession.id == session_id).values(session_closed=True)
+            )
 
         session.commit()
-        session.refresh(message)
-
-        # Convert to response model
-        message_read = MessageRead(
-            id=message.id,
-            session_id=message.session_id,
-            sender=message.sender,
-            receiver=message.receiver,
-            content=message.content,
-            created_at=message.created_at.isoformat()
-        )
 
         return AppendAiMessageResponse(
             message=message_read
         )
 
     @staticmethod
-    def get_conversations(session: Session, user_id: int) -> GetConversationsResponse:
-        """Get all chat sessions for a user's agents."""
+    def append_batch(
+        session: Session,
+        messages: List[BatchMessageItem],
+        collected_data: List[CollectedDataItem],
+        close_session_ids: List[int]
+    ) -> AppendBatchResponse:
+        """
+        Append messages and collected data, and close sessions, in one transaction.
+
+        The batch may span several sessions; every referenced session must exist or
+        nothing is written. Collected data whose field isn't part of the session's
+        agent schema is skipped, as in append-ai-message-with-data.
+        """
+
+        # Validate all referenced sessions at once
+        session_ids = (
+            {item.session_id for item in messages}
+            | {item.session_id for item in collected_data}
+            | set(close_session_ids)
+        )
+        if session_ids:
+            found = set(session.exec(select(ChatSession.id).where(ChatSession.id.in_(session_ids))).all())
+            if found != session_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Session not found: {min(session_ids - found)}"
+                )
 
-        # Get all agents for the user with their sessions
-        from src.models.agent import Agent
-        agents = session.exec(
-            select(Agent).where(Agent.user_id == user_id)
-        ).all()
+        # Messages keep their order; ids come back through RETURNING on flush
+        message_objects = []
+        for item in messages:
+            sender, receiver = BATCH_MESSAGE_ROLES[item.role]
+            message_objects.append(Message(
+                session_id=item.session_id,
+                sender=sender,
+                receiver=receiver,
+                content=item.content
+            ))
+        session.add_all(message_objects)
+        session.flush()
 
-        # Get all sessions for these agents
-        agent_ids = [agent.id for agent in agents]
-        if not agent_ids:
-            return GetConversationsResponse(conversations=[])
+        collected_data_read = ChatController._insert_collected_data(session, collected_data)
 
-        chat_sessions = session.exec(
-            select(ChatSession).where(ChatSession.agent_id.in_(agent_ids))
-        ).all()
+        closed_session_ids = sorted(set(close_session_ids))
+        if closed_session_ids:
+            session.exec(
+                update(ChatSession).where(ChatSession.id.in_(closed_session_ids)).values(session_closed=True)
+            )
 
-        # Create a mapping of agent_id to agent for quick lookup
-        agent_map = {agent.id: agent for agent in agents}
+        # Build the response before the commit expires the objects
+        messages_read = message_reads(message_objects)
+        for message in messages_read:
+            session_broadcaster.publish(session, "message", message.session_id, message.id, message)
+        response = AppendBatchResponse(
+            messages=messages_read,
+            collected_data=collected_data_read,
+            closed_session_ids=closed_session_ids
+        )
+        session.commit()
+
+        return response
+
+    @staticmethod
+    def get_conversations(
+        session: Session,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        agent_id: Optional[int] = None,
+        session_closed: Optional[bool] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        customer_email: Optional[str] = None
+    ) -> GetConversationsResponse:
+        """
+        Get chat sessions for a user's agents with their agent details.
+
+        Sessions and agents are read with one JOIN that selects only the listed columns,
+        filtered and sorted in the database. Pass a previous page's `next_cursor` as `cursor`
+        for keyset pagination (created_at sort only); otherwise `skip` is used.
+        """
+        descending = sort_order == "desc"
+        if cursor and sort_by != "created_at":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is only supported when sorting by created_at"
+            )
 
-        # Convert to response models with agent information
+        # Filters shared by the page query and the total count
+        conditions = [Agent.user_id == user_id]
+        if agent_id is not None:
+            conditions.append(ChatSession.agent_id == agent_id)
+        if session_closed is not None:
+            conditions.append(ChatSession.session_closed.is_(session_closed))
+        if date_from is not None:
+            conditions.append(ChatSession.created_at >= date_from)
+        if date_to is not None:
+            conditions.append(ChatSession.created_at <= date_to)
+        if customer_email:
+            conditions.append(ChatSession.customer_email == customer_email)
+
+        sort_column = CONVERSATION_SORT_COLUMNS[sort_by]
+        statement = (
+            select(
+                ChatSession.id,
+                ChatSession.agent_id,
+                ChatSession.started_at,
+                ChatSession.ended_at,
+                ChatSession.customer_name,
+                ChatSession.customer_email,
+                ChatSession.session_closed,
+                ChatSession.created_at,
+                ChatSession.updated_at,
+                Agent.name.label("agent_name"),
+                Agent.description.label("agent_description"),
+                Agent.webhook_url.label("agent_webhook_url"),
+                Agent.chat_url.label("agent_chat_url"),
+            )
+            .join(Agent, Agent.id == ChatSession.agent_id)
+            .where(*conditions)
+            .order_by(
+                sort_column.desc() if descending else sort_column.asc(),
+                ChatSession.id.desc() if descending else ChatSession.id.asc()
+            )
+            .limit(limit + 1)  # one extra row tells us whether there is a next page
+        )
+        if cursor:
+            statement = statement.where(keyset_after(ChatSession.created_at, ChatSession.id, cursor, descending))
+        else:
+            statement = statement.offset(skip)
+        rows = session.exec(statement).all()
+        has_next = len(rows) > limit
+        rows, next_page_cursor = next_cursor(rows, limit)
+        if sort_by != "created_at":
+            next_page_cursor = None  # cursors encode created_at; other sorts page with skip
+
+        total = session.exec(
+            select(func.count(ChatSession.id))
+            .join(Agent, Agent.id == ChatSession.agent_id)
+            .where(*conditions)
+        ).one()
+
+        # Convert rows to response models with agent information
         conversations = []
-        for chat_session in chat_sessions:
-            agent = agent_map.get(chat_session.agent_id)
-            if agent:
-                conversation = ConversationWithAgent(
-                    id=chat_session.id,
-                    agent_id=chat_session.agent_id,
-                    started_at=chat_session.started_at.isoformat() if chat_session.started_at else None,
-                    ended_at=chat_session.ended_at.isoformat() if chat_session.ended_at else None,
-                    customer_name=chat_session.customer_name,
-                    customer_email=chat_session.customer_email,
-                    session_closed=chat_session.session_closed,
-                    created_at=chat_session.created_at.isoformat(),
-                    updated_at=chat_session.updated_at.isoformat() if chat_session.updated_at else None,
-                    # Agent information
-                    agent_name=agent.name,
-                    agent_description=agent.description,
-                    agent_webhook_url=agent.webhook_url,
-                    agent_chat_url=agent.chat_url
-                )
-                conversations.append(conversation)
+        for row in rows:
+            conversation = ConversationWithAgent(
+                id=row.id,
+                agent_id=row.agent_id,
+                started_at=iso(row.started_at),
+                ended_at=iso(row.ended_at),
+                customer_name=row.customer_name,
+                customer_email=row.customer_email,
+                session_closed=row.session_closed,
+                created_at=row.created_at.isoformat(),
+                updated_at=iso(row.updated_at),
+                # Agent information
+                agent_name=row.agent_name,
+                agent_description=row.agent_description,
+                agent_webhook_url=row.agent_webhook_url,
+                agent_chat_url=row.agent_chat_url
+            )
+            conversations.append(conversation)
 
-        return GetConversationsResponse(conversations=conversations)
+        return GetConversationsResponse(
+            conversations=conversations,
+            meta=pagination_meta(total, (skip // limit) + 1, limit, next_page_cursor, has_next=has_next)
+        )
 
     @staticmethod
-    def get_session_details(session: Session, session_id: int) -> GetSessionDetailsResponse:
-        """Get all messages and collected data for a specific session."""
+    def get_session_details(
+        session: Session,
+        session_id: int,
+        message_limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> GetSessionDetailsResponse:
+        """
+        Get messages and collected data for a specific session.
+
+        All messages are returned unless `message_limit` is set; `before_id` and `after_id`
+        move the window backwards or forwards from a known message.
+        """
 
         # Get the chat session
         chat_session = session.get(ChatSession, session_id)
@@ -513,56 +891,168 @@ class ChatController:
                 detail="Session not found"
             )
 
-        # Get all messages for this session
-        messages = session.exec(
-            select(Message).where(Message.session_id == session_id).order_by(Message.created_at)
-        ).all()
+        # Get the requested window of messages for this session
+        messages, has_more_messages = ChatController._message_window(
+            session, session_id, message_limit, before_id, after_id
+        )
 
         # Get all collected data for this session
         collected_data = session.exec(
-            select(CollectedData).where(CollectedData.session_id == session_id)
+            select(*COLLECTED_DATA_READ_COLUMNS).where(CollectedData.session_id == session_id)
         ).all()
 
-        # Convert session to response model
-        session_read = ChatSessionRead(
-            id=chat_session.id,
-            agent_id=chat_session.agent_id,
-            started_at=chat_session.started_at.isoformat() if chat_session.started_at else None,
-            ended_at=chat_session.ended_at.isoformat() if chat_session.ended_at else None,
-            customer_name=chat_session.customer_name,
-            customer_email=chat_session.customer_email,
-            session_closed=chat_session.session_closed,
-            created_at=chat_session.created_at.isoformat(),
-            updated_at=chat_session.updated_at.isoformat() if chat_session.updated_at else None
+        return GetSessionDetailsResponse(
+            session=chat_session_read(chat_session),
+            messages=message_reads(messages),
+            collected_data=collected_data_reads(collected_data),
+            has_more_messages=has_more_messages
         )
 
-        # Convert messages to response models
-        messages_read = []
-        for message in messages:
-            message_read = MessageRead(
-                id=message.id,
-                session_id=message.session_id,
-                sender=message.sender,
-                receiver=message.receiver,
-                content=message.content,
-                created_at=message.created_at.isoformat()
-            )
-            messages_read.append(message_read)
-
-        # Convert collected data to response models
-        collected_data_read = []
-        for data in collected_data:
-            data_read = CollectedDataRead(
-                id=data.id,
-                session_id=data.session_id,
-                field_id=data.field_id,
-                answer=data.answer,
-                created_at=data.created_at.isoformat()
+    @staticmethod
+    def get_gateway_context(session: Session, session_id: int, message_limit: Optional[int] = None) -> GatewayContext:
+        """Load the session, its latest `message_limit` messages, customer and agent for a WebSocket gateway connection."""
+        details = ChatController.get_session_details(session, session_id, message_limit=message_limit)
+        agent = AgentController.get_agent_by_id(session, details.session.agent_id).data
+
+        customer = None
+        if details.session.customer_email:
+            customer = session.exec(
+                select(Customer).where(
+                    Customer.agent_id == details.session.agent_id,
+                    Customer.email == details.session.customer_email
+                )
+            ).first()
+
+        return GatewayContext(
+            customer=customer_read(customer) if customer else None,
+            session=details.session,
+            messages=details.messages,
+            collected_data=details.collected_data,
+            agent=agent
+        )
+
+    @staticmethod
+    def get_stream_backlog(
+        session: Session,
+        session_id: int,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Tuple[Tuple[int, int], List[StreamEvent]]:
+        """
+        Resolve where a live session stream starts.
+
+        `after` is the (message id, collected data id) cursor from the client's Last-Event-ID;
+        rows past it are returned for replay, oldest first. A new stream starts at the
+        newest existing rows and replays nothing.
+
+        Returns:
+            (starting cursor, [(kind, session_id, row_id, JSON payload), ...])
+        """
+        if not session.get(ChatSession, session_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
             )
-            collected_data_read.append(data_read)
 
-        return GetSessionDetailsResponse(
-            session=session_read,
-            messages=messages_read,
-            collected_data=collected_data_read
+        if after is None:
+            last_message_id, last_data_id = session.exec(
+                select(
+                    select(func.max(Message.id)).where(Message.session_id == session_id).scalar_subquery(),
+                    select(func.max(CollectedData.id)).where(CollectedData.session_id == session_id).scalar_subquery()
+                )
+            ).one()
+            return (last_message_id or 0, last_data_id or 0), []
+
+        after_message_id, after_data_id = after
+        messages = message_reads(session.exec(
+            select(*MESSAGE_READ_COLUMNS)
+            .where(Message.session_id == session_id, Message.id > after_message_id)
+            .order_by(Message.id)
+        ))
+        collected_data = collected_data_reads(session.exec(
+            select(*COLLECTED_DATA_READ_COLUMNS)
+            .where(CollectedData.session_id == session_id, CollectedData.id > after_data_id)
+            .order_by(CollectedData.id)
+        ))
+
+        # Interleave both kinds in the order they were written
+        backlog = sorted(
+            [(row.created_at, "message", row) for row in messages]
+            + [(row.created_at, "collected_data", row) for row in collected_data],
+            key=lambda item: item[0]
         )
+        return after, [(kind, session_id, row.id, to_json(row)) for _created_at, kind, row in backlog]
+
+
+class AsyncChatController:
+    """Async entry points for chat operations.
+
+    Each method runs the matching `ChatController` implementation through `run_db`,
+    so routes can await it without holding a worker thread.
+    """
+
+    @staticmethod
+    async def get_or_create_session(session: DBSession, **kwargs) -> GetOrCreateSessionResponse:
+        return await run_db(session, ChatController.get_or_create_session, **kwargs)
+
+    @staticmethod
+    async def _buffered_append(
+        session: DBSession,
+        session_id: int,
+        sender: str,
+        receiver: str,
+        content: str,
+        close_session: bool = False
+    ) -> MessageRead:
+        """Append through the group commit buffer; returns once the message is committed."""
+        message = await message_buffer.submit(session_id, sender, receiver, content, close_session)
+        record_write(session)
+        return message
+
+    @staticmethod
+    async def append_first_message(session: DBSession, **kwargs) -> AppendFirstMessageResponse:
+        if message_buffer.running:
+            return AppendFirstMessageResponse(message=await AsyncChatController._buffered_append(
+                session, kwargs["session_id"], kwargs["sender"], kwargs["receiver"], kwargs["content"]
+            ))
+        return await run_db(session, ChatController.append_first_message, **kwargs)
+
+    @staticmethod
+    async def append_ai_message_with_data(session: DBSession, **kwargs) -> AppendAiMessageWithDataResponse:
+        return await run_db(session, ChatController.append_ai_message_with_data, **kwargs)
+
+    @staticmethod
+    async def append_user_message(session: DBSession, **kwargs) -> AppendUserMessageResponse:
+        if message_buffer.running:
+            return AppendUserMessageResponse(message=await AsyncChatController._buffered_append(
+                session, kwargs["session_id"], "User", "Assistant", kwargs["content"]
+            ))
+        return await run_db(session, ChatController.append_user_message, **kwargs)
+
+    @staticmethod
+    async def append_ai_message(session: DBSession, **kwargs) -> AppendAiMessageResponse:
+        if message_buffer.running:
+            return AppendAiMessageResponse(message=await AsyncChatController._buffered_append(
+                session, kwargs["session_id"], "Assistant", "User", kwargs["content"],
+                close_session=bool(kwargs.get("session_closed"))
+            ))
+        return await run_db(session, ChatController.append_ai_message, **kwargs)
+
+    @staticmethod
+    async def append_batch(session: DBSession, **kwargs) -> AppendBatchResponse:
+        return await run_db(session, ChatController.append_batch, **kwargs)
+
+    @staticmethod
+    async def get_conversations(session: DBSession, **kwargs) -> GetConversationsResponse:
+        return await run_db(session, ChatController.get_conversations, **kwargs)
+
+    @staticmethod
+    async def get_session_details(session: DBSession, **kwargs) -> GetSessionDetailsResponse:
+        return await run_db(session, ChatController.get_session_details, **kwargs)
+
+    @staticmethod
+    async def get_gateway_context(session: DBSession, **kwargs) -> GatewayContext:
+        return await run_db(session, ChatController.get_gateway_context, **kwargs)
+
+    @staticmethod
+    async def get_stream_backlog(session: DBSession, **kwargs) -> Tuple[Tuple[int, int], List[StreamEvent]]:
+        return await run_db(session, ChatController.get_stream_backlog, **kwargs)
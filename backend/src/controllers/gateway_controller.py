@@ -0,0 +1,166 @@
+"""
+Gateway controller - WebSocket chat turns relayed to the agent webhook.
+
+The browser keeps one socket per chat session. Each turn the gateway stores the
+user's message, posts the conversation to the agent's `webhook_url` over the shared
+webhook client, and pushes the reply back on the socket, replacing the browser ->
+n8n -> append-* round trips with one socket frame in each direction.
+
+Frames from the client:
+    {"type": "message", "content": "..."}
+
+Frames to the client:
+    {"type": "ack", "message": {...}}                     user message stored
+    {"type": "reply", "ai_message": {...}, "collected_data": [...], "session": {...}}
+    {"type": "error", "detail": "..."}
+
+The webhook receives the same payload the chat page used to send (customer, session,
+messages, collected_data, is_new_session, user_message, agent) plus `user_message_id`,
+since the user message is already stored (and, as `Idempotency-Key: message-<id>`, in
+the headers of every attempt). `messages` holds the most recent
+WEBHOOK_MAX_HISTORY_MESSAGES messages (the new one included), so long sessions don't
+grow every request. It may reply in either form:
+
+- `{"ai_message": {... "id": ...}, "collected_data": [...], "session": {...}}` when it
+  stored the reply itself through /api/chat/append-*; relayed as is.
+- `{"content": "...", "collected_data": [{"field_id": ..., "answer": ...}], "session_closed": false}`
+  to have the gateway store the reply, saving the callback round trip.
+"""
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel, ValidationError
+
+from src.controllers.chat_controller import AsyncChatController, CollectedDataItem, GatewayContext
+from src.core.config import WEBHOOK_MAX_HISTORY_MESSAGES
+from src.core.webhooks import webhook_dispatcher
+from src.database import db_session
+from src.models.chat import MessageRead
+from src.models.data_schema import CollectedDataRead
+
+
+class GatewayMessage(BaseModel):
+    """A chat message frame from the client."""
+    type: str = "message"
+    content: str
+
+
+class WebhookReplyItem(BaseModel):
+    """Collected data in a webhook reply the gateway stores itself."""
+    field_id: int
+    answer: str
+
+
+class WebhookReply(BaseModel):
+    """Webhook reply carrying only the assistant's text, to be stored by the gateway."""
+    content: str
+    collected_data: List[WebhookReplyItem] = []
+    session_closed: bool = False
+
+
+class ChatGateway:
+    """One WebSocket connection relaying a chat session's turns to its agent webhook."""
+
+    def __init__(self, websocket: WebSocket, session_id: int):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.context: Optional[GatewayContext] = None
+
+    async def run(self) -> None:
+        """Serve turns until the client disconnects or the session is closed."""
+        await self.websocket.accept()
+        try:
+            async with db_session() as session:
+                self.context = await AsyncChatController.get_gateway_context(
+                    session, session_id=self.session_id, message_limit=WEBHOOK_MAX_HISTORY_MESSAGES
+                )
+        except HTTPException as exc:
+            await self._send_error(exc.detail)
+            await self.websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        if not self.context.agent.webhook_url:
+            await self._send_error("Agent has no webhook configured")
+            await self.websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        try:
+            while not self.context.session.session_closed:
+                frame = await self.websocket.receive_text()
+                try:
+                    message = GatewayMessage.model_validate_json(frame)
+                except ValidationError:
+                    await self._send_error("Expected {\"type\": \"message\", \"content\": \"...\"}")
+                    continue
+                try:
+                    await self._turn(message.content)
+                except HTTPException as exc:
+                    await self._send_error(exc.detail)
+            await self.websocket.close()
+        except WebSocketDisconnect:
+            pass
+
+    async def _turn(self, content: str) -> None:
+        """Store the user's message, call the webhook and push its reply."""
+        context = self.context
+        async with db_session() as session:
+            user_message = (await AsyncChatController.append_user_message(
+                session, content=content, session_id=self.session_id
+            )).message
+        await self.websocket.send_json({"type": "ack", "message": user_message.model_dump()})
+
+        is_new_session = not context.messages
+        context.messages.append(user_message)
+        del context.messages[:-WEBHOOK_MAX_HISTORY_MESSAGES]
+        reply = await webhook_dispatcher.post_json(context.agent.id, context.agent.webhook_url, {
+            **context.model_dump(),
+            "is_new_session": is_new_session,
+            "user_message": content,
+            "user_message_id": user_message.id,
+        }, idempotency_key=f"message-{user_message.id}")
+
+        if isinstance(reply, dict) and isinstance(reply.get("ai_message"), dict) and "id" in reply["ai_message"]:
+            # The webhook stored the reply through the append endpoints
+            ai_message = MessageRead.model_validate(reply["ai_message"])
+            collected_data = [CollectedDataRead.model_validate(item) for item in reply.get("collected_data") or []]
+            session_closed = bool((reply.get("session") or {}).get("session_closed"))
+        else:
+            ai_message, collected_data, session_closed = await self._store_reply(reply)
+
+        context.messages.append(ai_message)
+        del context.messages[:-WEBHOOK_MAX_HISTORY_MESSAGES]
+        context.collected_data.extend(collected_data)
+        if session_closed:
+            context.session.session_closed = True
+
+        await self.websocket.send_json({
+            "type": "reply",
+            "ai_message": ai_message.model_dump(),
+            "collected_data": [item.model_dump() for item in collected_data],
+            "session": context.session.model_dump(mode="json"),
+        })
+
+    async def _store_reply(self, reply: Any):
+        """Store a content-only webhook reply as the assistant's message."""
+        try:
+            data = WebhookReply.model_validate(reply)
+        except ValidationError:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Agent webhook reply has no ai_message or content"
+            )
+        async with db_session() as session:
+            stored = await AsyncChatController.append_ai_message_with_data(
+                session,
+                content=data.content,
+                session_id=self.session_id,
+                collected_data=[
+                    CollectedDataItem(session_id=self.session_id, field_id=item.field_id, answer=item.answer)
+                    for item in data.collected_data
+                ],
+                session_closed=data.session_closed
+            )
+        return stored.message, stored.collected_data, data.session_closed
+
+    async def _send_error(self, detail: str) -> None:
+        await self.websocket.send_json({"type": "error", "detail": detail})
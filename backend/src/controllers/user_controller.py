@@ -6,28 +6,31 @@ from fastapi import HTTPException, status
 from sqlmodel import Session, select
 
 from src.models.user import User, UserRead, UserUpdate
-from src.core.auth import get_password_hash
+from src.core.auth import get_password_hash, password_hasher
 from src.core.responses import APIResponse, success_response, paginated_response, MessageResponse
+from src.core.pagination import keyset_after, next_cursor
+from src.core.serializers import user_read
+from src.database import DBSession, run_db
+from src.database.pubsub import invalidation_bus
 
 class UserController:
     """Controller for user operations."""
     
     @staticmethod
-    def get_users(session: Session, skip: int = 0, limit: int = 100) -> APIResponse:
-        """Get list of users."""
-        statement = select(User).offset(skip).limit(limit)
-        users = session.exec(statement).all()
+    def get_users(session: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> APIResponse:
+        """Get list of users. Pass a previous page's `next_cursor` as `cursor` for keyset pagination."""
+        statement = (
+            select(User)
+            .order_by(User.created_at, User.id)
+            .limit(limit + 1)  # one extra row tells us whether there is a next page
+        )
+        if cursor:
+            statement = statement.where(keyset_after(User.created_at, User.id, cursor, descending=False))
+        else:
+            statement = statement.offset(skip)
+        users, next_page_cursor = next_cursor(session.exec(statement).all(), limit)
         
-        users_data = [
-            UserRead(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                created_at=user.created_at.isoformat(),
-                updated_at=user.updated_at.isoformat() if user.updated_at else None
-            )
-            for user in users
-        ]
+        users_data = [user_read(user) for user in users]
         
         # Get total count for pagination
         from sqlmodel import func
@@ -39,7 +42,8 @@ class UserController:
             total=total,
             page=(skip // limit) + 1,
             page_size=limit,
-            message="Users retrieved successfully"
+            message="Users retrieved successfully",
+            next_cursor=next_page_cursor
         )
     
     @staticmethod
@@ -52,13 +56,7 @@ class UserController:
                 detail="User not found"
             )
         
-        user_data = UserRead(
-            id=user.id,
-            name=user.name,
-            email=user.email,
-            created_at=user.created_at.isoformat(),
-            updated_at=user.updated_at.isoformat() if user.updated_at else None
-        )
+        user_data = user_read(user)
         
         return success_response(
             data=user_data,
@@ -66,8 +64,13 @@ class UserController:
         )
     
     @staticmethod
-    def update_user(session: Session, user_id: int, user_update: UserUpdate) -> APIResponse[UserRead]:
-        """Update user information."""
+    def update_user(
+        session: Session,
+        user_id: int,
+        user_update: UserUpdate,
+        password_hash: Optional[str] = None
+    ) -> APIResponse[UserRead]:
+        """Update user information. A pre-computed `password_hash` skips hashing here."""
         user = session.get(User, user_id)
         if not user:
             raise HTTPException(
@@ -80,21 +83,17 @@ class UserController:
         for field, value in update_data.items():
             if field == "password":
                 # Hash password before storing
-                user.password_hash = get_password_hash(value)
+                user.password_hash = password_hash or get_password_hash(value)
             else:
                 setattr(user, field, value)
         
         session.add(user)
+        # Other workers drop any cached copy of this user once the update commits
+        invalidation_bus.publish(session, "user", user_id)
         session.commit()
         session.refresh(user)
         
-        user_data = UserRead(
-            id=user.id,
-            name=user.name,
-            email=user.email,
-            created_at=user.created_at.isoformat(),
-            updated_at=user.updated_at.isoformat() if user.updated_at else None
-        )
+        user_data = user_read(user)
         
         return success_response(
             data=user_data,
@@ -112,6 +111,37 @@ class UserController:
             )
         
         session.delete(user)
+        invalidation_bus.publish(session, "user", user_id)
         session.commit()
         
         return MessageResponse.success_message("User deleted successfully")
+
+
+class AsyncUserController:
+    """Async entry points for user operations, backed by `UserController` via `run_db`."""
+
+    @staticmethod
+    async def get_users(session: DBSession, **kwargs) -> APIResponse:
+        return await run_db(session, UserController.get_users, **kwargs)
+
+    @staticmethod
+    async def get_user_by_id(session: DBSession, **kwargs) -> APIResponse[UserRead]:
+        return await run_db(session, UserController.get_user_by_id, **kwargs)
+
+    @staticmethod
+    async def update_user(session: DBSession, user_id: int, user_update: UserUpdate) -> APIResponse[UserRead]:
+        # Hash outside the session so bcrypt never runs on the event loop
+        password_hash = None
+        if user_update.password is not None:
+            password_hash = await password_hasher.hash(user_update.password)
+        return await run_db(
+            session,
+            UserController.update_user,
+            user_id=user_id,
+            user_update=user_update,
+            password_hash=password_hash
+        )
+
+    @staticmethod
+    async def delete_user(session: DBSession, **kwargs) -> MessageResponse:
+        return await run_db(session, UserController.delete_user, **kwargs)
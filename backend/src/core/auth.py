@@ -1,11 +1,25 @@
 """
 Authentication utilities for password hashing and JWT tokens.
 """
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, TypeVar
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 import bcrypt
-from .config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from .config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+)
+
+T = TypeVar("T")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -14,10 +28,124 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        # $2b$<rounds>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool.
+
+    Logins and signups can't take over the shared request threadpool: at most
+    `workers` hashes run at once, and once `max_queue` calls are waiting new ones
+    are refused with 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.wait_time_total = 0.0
+        self.run_time_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        submitted = time.perf_counter()
+        # Cleared under the lock by whichever side takes the call off the queue first
+        waiting = True
+
+        def task() -> T:
+            nonlocal waiting
+            started = time.perf_counter()
+            with self._lock:
+                if not waiting:
+                    # The caller was cancelled or timed out before a worker got here
+                    raise CancelledError()
+                waiting = False
+                self.queued -= 1
+                self.running += 1
+                self.wait_time_total += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.run_time_total += time.perf_counter() - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), task)
+        finally:
+            with self._lock:
+                if waiting:
+                    waiting = False
+                    self.queued -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop and the request threadpool."""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password off the event loop and the request threadpool."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Report queue depth and timing for the internal stats endpoint."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_time_total * 1000 / self.completed, 3) if self.completed else 0.0,
+                "avg_run_ms": round(self.run_time_total * 1000 / self.completed, 3) if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,154 @@
+"""
+In-process LRU + TTL caches for rarely-changing, frequently-read data.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from src.core.config import (
+    AGENT_CACHE_TTL_SECONDS,
+    AGENT_CACHE_MAX_ENTRIES,
+    AGENT_CACHE_MAX_BYTES,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_ENTRIES,
+    PRINCIPAL_CACHE_MAX_BYTES,
+    TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class _Entry:
+    value: bytes
+    expires_at: float
+    tags: Tuple[Hashable, ...]
+
+
+class TTLLRUCache:
+    """
+    Thread-safe LRU cache of serialized values with a per-entry TTL.
+
+    Bounded both by entry count and by the total size of the stored bytes. Entries
+    carry tags so every key derived from one object can be dropped together.
+    Invalidation bumps `version`; a `set` that read its data under an older version
+    is ignored, so a slow reader can't put back what a writer just invalidated.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the cached value, or None when missing or expired."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: bytes, tags: Iterable[Hashable] = (), version: Optional[int] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, time.monotonic() + self.ttl_seconds, tuple(tags))
+            self._entries[key] = entry
+            self._bytes += len(value)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag: Hashable) -> int:
+        """Drop every entry carrying `tag`; returns how many were removed."""
+        with self._lock:
+            self.version += 1
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.value)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        """Report size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Serialized AgentRead without session counts by ("id", agent_id) and ("chat_url", chat_url), tagged with the agent id
+agent_cache = TTLLRUCache("agents", AGENT_CACHE_MAX_ENTRIES, AGENT_CACHE_MAX_BYTES, AGENT_CACHE_TTL_SECONDS)
+
+# Serialized Principal by token subject (email), tagged with the user id
+principal_cache = TTLLRUCache(
+    "principals", PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_MAX_BYTES, PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# Current token version by user id, for stateless token checks
+token_version_cache = TTLLRUCache(
+    "token_versions", PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_MAX_BYTES, TOKEN_VERSION_CACHE_TTL_SECONDS
+)
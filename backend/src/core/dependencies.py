@@ -1,63 +1,153 @@
 """
 FastAPI dependencies for authentication and database sessions.
 """
+import secrets
 from typing import Optional, Annotated
-from .types import JWTPayload
-from fastapi import Depends, HTTPException, status
+from .types import JWTPayload, Principal
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
 # from ..database import get_session
 # from ..models.user import User
 # from .auth import verify_token
-from src.database import get_session
+from src.database import get_db_session, run_db, DBSession
+from src.database.pubsub import invalidation_bus
 from src.models.user import User
 from src.core.auth import verify_token
+from src.core.config import INTERNAL_API_TOKEN, STATELESS_AUTH
+from src.core.cache import principal_cache, token_version_cache
 
 # Security scheme
 security = HTTPBearer()
 
+# User updates and deletes in any worker evict cached principals and token versions
+invalidation_bus.subscribe("user", principal_cache.invalidate, reset=principal_cache.clear)
+invalidation_bus.subscribe("user", token_version_cache.invalidate, reset=token_version_cache.clear)
 
-def get_current_user(
+
+def _get_user_by_email(session: Session, email: str) -> Optional[User]:
+    """Find a user by email."""
+    statement = select(User).where(User.email == email)
+    return session.exec(statement).first()
+
+
+def _credentials_error(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_payload(credentials: HTTPAuthorizationCredentials) -> JWTPayload:
+    """Verify the bearer token and return its claims."""
+    payload = verify_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_error()
+    return payload
+
+
+def _check_token_version(payload: JWTPayload, token_version: int) -> None:
+    """Reject tokens issued before the user's current token version (legacy tokens have none)."""
+    if "ver" in payload and payload["ver"] != token_version:
+        raise _credentials_error("Token has been revoked")
+
+
+def _get_token_version(session: Session, user_id: int) -> Optional[int]:
+    """Read a user's current token version."""
+    return session.exec(select(User.token_version).where(User.id == user_id)).first()
+
+
+async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    session: Annotated[Session, Depends(get_session)]
-) -> User:
-    """Get the current authenticated user."""
-    token = credentials.credentials
-    
-    # Verify token
-    payload = verify_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    # Get user email from token
-    email = payload.get("sub")
-    if email is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
+    session: Annotated[DBSession, Depends(get_db_session)]
+) -> Principal:
+    """
+    Get the current authenticated user.
+
+    Principals are cached by token subject, so most requests don't query the database.
+    """
+    payload = _token_payload(credentials)
+    email = payload["sub"]
+
+    cached = principal_cache.get(email)
+    if cached is not None:
+        principal = Principal.model_validate_json(cached)
+        _check_token_version(payload, principal.token_version)
+        return principal
+    cache_version = principal_cache.version
+
     # Find user in database
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = await run_db(session, _get_user_by_email, email)
     
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
+        raise _credentials_error("User not found")
+
+    principal = Principal(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        token_version=user.token_version,
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    )
+    principal_cache.set(email, principal.model_dump_json().encode("utf-8"), (user.id,), cache_version)
+    _check_token_version(payload, principal.token_version)
+
+    return principal
+
+
+async def get_current_user_id(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    session: Annotated[DBSession, Depends(get_db_session)]
+) -> int:
+    """
+    Get the current user's id, for routes that need nothing else.
 
+    With STATELESS_AUTH, tokens carrying `uid` and `ver` claims are authorized from
+    the claims alone; only the user's current token version is needed, and that comes
+    from a cache kept fresh by user invalidation events. Otherwise this resolves the
+    full principal like `get_current_user`.
+    """
+    payload = _token_payload(credentials)
+    if not STATELESS_AUTH or "uid" not in payload or "ver" not in payload:
+        principal = await get_current_user(credentials, session)
+        return principal.id
 
-def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
+    user_id = payload["uid"]
+    cached = token_version_cache.get(user_id)
+    if cached is not None:
+        token_version = int(cached)
+    else:
+        cache_version = token_version_cache.version
+        token_version = await run_db(session, _get_token_version, user_id)
+        if token_version is None:
+            raise _credentials_error("User not found")
+        token_version_cache.set(user_id, str(token_version).encode("ascii"), (user_id,), cache_version)
+
+    _check_token_version(payload, token_version)
+    return user_id
+
+
+async def get_current_active_user(
+    current_user: Annotated[Principal, Depends(get_current_user)]
+) -> Principal:
     """Get the current active user (for future use if we add user status)."""
     return current_user
+
+
+def require_internal_access(
+    x_internal_token: Annotated[Optional[str], Header()] = None
+) -> None:
+    """Guard operational endpoints with the internal API token; without one they are not served."""
+    if INTERNAL_API_TOKEN is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token, str(INTERNAL_API_TOKEN)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
@@ -0,0 +1,39 @@
+"""
+ASGI middleware shared by the application.
+"""
+import math
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import REPLICA_STALENESS_SECONDS
+from src.database.connection import LAST_WRITE_HEADER, LAST_WRITE_COOKIE
+
+
+class ReadYourWritesMiddleware:
+    """Tell clients when their request committed, so follow-up reads skip the replica.
+
+    The timestamp is returned both as a header (for API clients to echo back) and as
+    a short-lived cookie (picked up automatically by the browser).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.get("db_last_write") is not None:
+                value = f"{state['db_last_write']:.3f}"
+                max_age = math.ceil(REPLICA_STALENESS_SECONDS)
+                headers = MutableHeaders(scope=message)
+                headers.append(LAST_WRITE_HEADER, value)
+                headers.append("set-cookie", f"{LAST_WRITE_COOKIE}={value}; Max-Age={max_age}; Path=/; SameSite=Lax")
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
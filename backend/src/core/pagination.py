@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination helpers for lists ordered by (created_at, id).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_after(created_at_column: Any, id_column: Any, cursor: str, descending: bool = True) -> ColumnElement[bool]:
+    """Build the WHERE clause selecting rows that sort after the cursor."""
+    created_at, row_id = decode_cursor(cursor)
+    if descending:
+        return or_(
+            created_at_column < created_at,
+            and_(created_at_column == created_at, id_column < row_id)
+        )
+    return or_(
+        created_at_column > created_at,
+        and_(created_at_column == created_at, id_column > row_id)
+    )
+
+
+def next_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with `limit + 1` rows.
+
+    Returns:
+        (the rows to return, the cursor for the next page or None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
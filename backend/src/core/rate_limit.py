@@ -0,0 +1,276 @@
+"""
+Token-bucket rate limiting for login attempts.
+
+Buckets live in process memory by default. Set RATE_LIMIT_REDIS_URL (and install the
+optional `redis` extra) to share them between workers; if Redis can't be reached the
+limiter falls back to the local buckets rather than blocking logins, and only tries
+Redis again every RATE_LIMIT_REDIS_RETRY_SECONDS.
+
+Successful logins give their tokens back, so only failed attempts use up a bucket. Behind
+a reverse proxy the client IP is taken from FORWARDED_FOR_HEADER, but only when the
+request comes from one of TRUSTED_PROXIES; otherwise the header is ignored.
+"""
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, status
+
+from src.core.config import (
+    LOGIN_RATE_LIMIT_ENABLED,
+    LOGIN_RATE_IP_BURST,
+    LOGIN_RATE_IP_PER_MINUTE,
+    LOGIN_RATE_EMAIL_BURST,
+    LOGIN_RATE_EMAIL_PER_MINUTE,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_REDIS_RETRY_SECONDS,
+    TRUSTED_PROXIES,
+)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBucketStore:
+    """Token buckets for one process, pruned to the `max_keys` most recently used."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; returns 0 when allowed, else the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    async def give_back(self, key: str, capacity: float) -> None:
+        """Return one token taken by `take`."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                tokens, updated_at = bucket
+                self._buckets[key] = (min(capacity, tokens + 1), updated_at)
+
+
+# Atomic refill-and-take on a Redis hash; returns the retry delay (0 when allowed)
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+# Return one token, if the bucket still exists
+_REDIS_GIVE_BACK = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+end
+return 0
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis, with local buckets while it is down."""
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "captor:ratelimit:",
+        retry_seconds: float = RATE_LIMIT_REDIS_RETRY_SECONDS,
+        timeout: float = 1.0
+    ):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed") from exc
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        # A login never waits long on an unresponsive Redis
+        self._client = redis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout)
+        self._take = self._client.register_script(_REDIS_TAKE)
+        self._give_back = self._client.register_script(_REDIS_GIVE_BACK)
+        self._fallback = InMemoryBucketStore()
+        # Monotonic time before which Redis is not tried again; 0 while it is healthy
+        self._down_until = 0.0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return not self._down_until
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        retry_after = await self._call(self._take, key, [capacity, rate, time.time()])
+        if retry_after is None:
+            return await self._fallback.take(key, capacity, rate)
+        return float(retry_after)
+
+    async def give_back(self, key: str, capacity: float) -> None:
+        if await self._call(self._give_back, key, [capacity]) is None:
+            await self._fallback.give_back(key, capacity)
+
+    async def _call(self, script, key: str, args: list):
+        """Run a bucket script; None while Redis is down, and the local buckets are used instead."""
+        if self._down_until and time.monotonic() < self._down_until:
+            return None
+        try:
+            result = await script(keys=[self.prefix + key], args=args)
+        except Exception as exc:
+            self.failures += 1
+            if not self._down_until:
+                # Logged once per outage, not on every login
+                logger.warning(
+                    "Rate limit store unavailable (%s), using local buckets; retrying every %ss",
+                    exc, self.retry_seconds
+                )
+            self._down_until = time.monotonic() + self.retry_seconds
+            return None
+        if self._down_until:
+            logger.info("Rate limit store reachable again")
+            self._down_until = 0.0
+        return result
+
+
+def parse_trusted_proxies(proxies: Iterable[str]) -> Tuple[IPNetwork, ...]:
+    """Networks of the TRUSTED_PROXIES entries (single addresses become /32 or /128)."""
+    return tuple(ipaddress.ip_network(proxy.strip(), strict=False) for proxy in proxies if proxy.strip())
+
+
+def _is_trusted(address: Optional[str], trusted_proxies: Sequence[IPNetwork]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address or "")
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def forwarded_client_ip(
+    peer: Optional[str],
+    forwarded_for: Optional[str],
+    trusted_proxies: Sequence[IPNetwork]
+) -> Optional[str]:
+    """
+    The client IP of a request that reached us from `peer`.
+
+    A peer that isn't a trusted proxy is the client, whatever the header says. Otherwise
+    the forwarded-for hops are read from the right (the entry our own proxy added) past
+    any other trusted proxies; the first address left is the client. Entries further left
+    were sent by the client and are never trusted.
+    """
+    if not forwarded_for or not _is_trusted(peer, trusted_proxies):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+class LoginThrottle:
+    """
+    Limits login attempts per client IP and per email.
+
+    `check` runs before any database or bcrypt work, so throttled attempts cost
+    next to nothing. It takes a token from both buckets; `succeeded` returns them.
+    """
+
+    def __init__(self, store, ip_burst: int, ip_per_minute: float, email_burst: int, email_per_minute: float):
+        self.store = store
+        self.ip_limit = (ip_burst, ip_per_minute / 60)
+        self.email_limit = (email_burst, email_per_minute / 60)
+        self.allowed = 0
+        self.throttled_ip = 0
+        self.throttled_email = 0
+
+    async def check(self, client_ip: Optional[str], email: str) -> None:
+        """Raise 429 when either the IP or the email bucket is empty."""
+        retry_after = await self.store.take(self._ip_key(client_ip), *self.ip_limit)
+        if retry_after:
+            self.throttled_ip += 1
+            raise self._too_many(retry_after)
+
+        retry_after = await self.store.take(self._email_key(email), *self.email_limit)
+        if retry_after:
+            self.throttled_email += 1
+            raise self._too_many(retry_after)
+
+        self.allowed += 1
+
+    async def succeeded(self, client_ip: Optional[str], email: str) -> None:
+        """Give back the tokens of a successful login, so only failed attempts count."""
+        await self.store.give_back(self._ip_key(client_ip), self.ip_limit[0])
+        await self.store.give_back(self._email_key(email), self.email_limit[0])
+
+    @staticmethod
+    def _ip_key(client_ip: Optional[str]) -> str:
+        return f"ip:{client_ip or 'unknown'}"
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"email:{email.strip().lower()}"
+
+    @staticmethod
+    def _too_many(retry_after: float) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    def stats(self) -> dict:
+        stats = {
+            "store": type(self.store).__name__,
+            "allowed": self.allowed,
+            "throttled_ip": self.throttled_ip,
+            "throttled_email": self.throttled_email,
+        }
+        if isinstance(self.store, RedisBucketStore):
+            stats["store_available"] = self.store.available
+            stats["store_failures"] = self.store.failures
+        return stats
+
+
+def _create_login_throttle() -> Optional[LoginThrottle]:
+    if not LOGIN_RATE_LIMIT_ENABLED:
+        return None
+    store = RedisBucketStore(str(RATE_LIMIT_REDIS_URL)) if RATE_LIMIT_REDIS_URL is not None else InMemoryBucketStore()
+    return LoginThrottle(
+        store,
+        LOGIN_RATE_IP_BURST,
+        LOGIN_RATE_IP_PER_MINUTE,
+        LOGIN_RATE_EMAIL_BURST,
+        LOGIN_RATE_EMAIL_PER_MINUTE,
+    )
+
+
+login_throttle = _create_login_throttle()
+trusted_proxies = parse_trusted_proxies(TRUSTED_PROXIES)
@@ -2,7 +2,9 @@
 Standard API response formats for consistent responses across all endpoints.
 """
 from typing import Any, Optional, List, TypeVar, Generic
+from fastapi.responses import Response
 from pydantic import BaseModel
+from pydantic_core import to_json
 
 T = TypeVar('T')
 
@@ -62,28 +64,65 @@ class PaginatedResponse(BaseModel, Generic[T]):
         total: int,
         page: int = 1,
         page_size: int = 10,
-        message: str = "Data retrieved successfully"
+        message: str = "Data retrieved successfully",
+        next_cursor: Optional[str] = None
     ) -> "PaginatedResponse[T]":
-        """Create a paginated response."""
-        total_pages = (total + page_size - 1) // page_size
-        
+        """Create a paginated response. `next_cursor` is the keyset cursor for the following page."""
         return cls(
             success=True,
             message=message,
             data=data,
-            meta={
-                "pagination": {
-                    "total": total,
-                    "page": page,
-                    "page_size": page_size,
-                    "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
-                }
-            }
+            meta=pagination_meta(total, page, page_size, next_cursor)
         )
 
 
+def pagination_meta(
+    total: int,
+    page: int,
+    page_size: int,
+    next_cursor: Optional[str] = None,
+    has_next: Optional[bool] = None
+) -> dict:
+    """
+    Build the `meta` block shared by paginated responses.
+
+    List endpoints fetch one row past the page, so `next_cursor` is set exactly when
+    another page exists, in both offset and cursor mode. Pass `has_next` for lists
+    that page without cursors.
+    """
+    total_pages = (total + page_size - 1) // page_size
+
+    return {
+        "pagination": {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "has_next": next_cursor is not None if has_next is None else has_next,
+            "has_prev": page > 1,
+            "next_cursor": next_cursor
+        }
+    }
+
+
+class ModelJSONResponse(Response):
+    """
+    JSON response serialized straight from already-built pydantic models.
+
+    Returning a Response from a route skips FastAPI's response_model handling, which
+    dumps the model, validates it again and encodes the result with json.dumps. The
+    controllers validate their models once when building them, so pydantic's serializer
+    can write the bytes directly (about 4x faster for a 2000-message session; see
+    benchmarks/serialization.py). Keep `response_model` on the route for the OpenAPI
+    schema, and only wrap controllers that return exactly that model.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
 # Common response types for convenience
 class MessageResponse(BaseModel):
     """Simple message response."""
@@ -126,7 +165,8 @@ def paginated_response(
     total: int,
     page: int = 1,
     page_size: int = 10,
-    message: str = "Data retrieved successfully"
+    message: str = "Data retrieved successfully",
+    next_cursor: Optional[str] = None
 ) -> PaginatedResponse:
     """Helper function to create paginated response."""
     return PaginatedResponse.create(
@@ -134,5 +174,6 @@ def paginated_response(
         total=total,
         page=page,
         page_size=page_size,
-        message=message
+        message=message,
+        next_cursor=next_cursor
     )
@@ -0,0 +1,183 @@
+"""
+Row-to-DTO serializers shared by the controllers.
+
+Each function accepts ORM instances or plain result rows with the same column names,
+so hot read paths can select just the `*_COLUMNS` below instead of hydrating ORM
+objects. Lists are validated in one call through a TypeAdapter rather than one model
+constructor per row.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import TypeAdapter
+
+from src.models.agent import Agent, AgentRead
+from src.models.chat import ChatSession, ChatSessionRead, Message, MessageRead
+from src.models.customer import CustomerRead
+from src.models.data_schema import CollectedData, CollectedDataRead
+from src.models.user import UserRead
+
+# Columns MessageRead / CollectedDataRead / ChatSessionRead are built from
+MESSAGE_READ_COLUMNS = (
+    Message.id, Message.session_id, Message.sender, Message.receiver, Message.content, Message.created_at
+)
+COLLECTED_DATA_READ_COLUMNS = (
+    CollectedData.id, CollectedData.session_id, CollectedData.field_id, CollectedData.answer, CollectedData.created_at
+)
+CHAT_SESSION_READ_COLUMNS = (
+    ChatSession.id, ChatSession.agent_id, ChatSession.customer_name, ChatSession.customer_email,
+    ChatSession.session_closed, ChatSession.started_at, ChatSession.ended_at,
+    ChatSession.created_at, ChatSession.updated_at
+)
+
+_message_list = TypeAdapter(List[MessageRead])
+_collected_data_list = TypeAdapter(List[CollectedDataRead])
+_chat_session_list = TypeAdapter(List[ChatSessionRead])
+_agent_list = TypeAdapter(List[AgentRead])
+
+
+def iso(value: Optional[datetime]) -> Optional[str]:
+    """Format a timestamp the way every read schema exposes it."""
+    return value.isoformat() if value is not None else None
+
+
+def _message_fields(message: Any) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "session_id": message.session_id,
+        "sender": message.sender,
+        "receiver": message.receiver,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _collected_data_fields(data: Any) -> Dict[str, Any]:
+    return {
+        "id": data.id,
+        "session_id": data.session_id,
+        "field_id": data.field_id,
+        "answer": data.answer,
+        "created_at": data.created_at.isoformat(),
+    }
+
+
+def _chat_session_fields(chat_session: Any) -> Dict[str, Any]:
+    # started_at / ended_at are datetimes on the read schema; the rest are strings
+    return {
+        "id": chat_session.id,
+        "agent_id": chat_session.agent_id,
+        "customer_name": chat_session.customer_name,
+        "customer_email": chat_session.customer_email,
+        "session_closed": chat_session.session_closed,
+        "started_at": chat_session.started_at,
+        "ended_at": chat_session.ended_at,
+        "created_at": chat_session.created_at.isoformat(),
+        "updated_at": iso(chat_session.updated_at),
+    }
+
+
+def _agent_fields(
+    agent: Agent,
+    chat_session_count: int,
+    open_session_count: int,
+    recent_sessions: Optional[Iterable[Any]]
+) -> Dict[str, Any]:
+    """AgentRead fields for an agent with its schemas and fields loaded."""
+    return {
+        "id": agent.id,
+        "name": agent.name,
+        "description": agent.description,
+        "system_prompt": agent.system_prompt,
+        "user_instructions": agent.user_instructions,
+        "webhook_url": agent.webhook_url,
+        "chat_url": agent.chat_url,
+        "user_id": agent.user_id,
+        "created_at": agent.created_at.isoformat(),
+        "updated_at": iso(agent.updated_at),
+        "data_schemas": [
+            {
+                "id": schema.id,
+                "agent_id": schema.agent_id,
+                "type": schema.type,
+                "created_at": schema.created_at.isoformat(),
+                "fields": [
+                    {
+                        "id": field.id,
+                        "schema_id": field.schema_id,
+                        "key": field.key,
+                        "question": field.question,
+                        "data_type": field.data_type,
+                        "required": field.required,
+                        "validation_rules": field.validation_rules,
+                        "created_at": field.created_at.isoformat(),
+                    }
+                    for field in schema.fields
+                ],
+            }
+            for schema in agent.data_schemas
+        ],
+        "chat_session_count": chat_session_count,
+        "open_session_count": open_session_count,
+        # Only present when requested
+        "recent_sessions": None if recent_sessions is None else [
+            _chat_session_fields(chat_session) for chat_session in recent_sessions
+        ],
+    }
+
+
+def message_read(message: Any) -> MessageRead:
+    return MessageRead.model_validate(_message_fields(message))
+
+
+def message_reads(messages: Iterable[Any]) -> List[MessageRead]:
+    return _message_list.validate_python([_message_fields(message) for message in messages])
+
+
+def collected_data_reads(collected_data: Iterable[Any]) -> List[CollectedDataRead]:
+    return _collected_data_list.validate_python([_collected_data_fields(data) for data in collected_data])
+
+
+def chat_session_read(chat_session: Any) -> ChatSessionRead:
+    return ChatSessionRead.model_validate(_chat_session_fields(chat_session))
+
+
+def chat_session_reads(chat_sessions: Iterable[Any]) -> List[ChatSessionRead]:
+    return _chat_session_list.validate_python([_chat_session_fields(chat_session) for chat_session in chat_sessions])
+
+
+def customer_read(customer: Any) -> CustomerRead:
+    return CustomerRead.model_validate({
+        "id": customer.id,
+        "agent_id": customer.agent_id,
+        "name": customer.name,
+        "email": customer.email,
+        "created_at": customer.created_at.isoformat(),
+    })
+
+
+def user_read(user: Any) -> UserRead:
+    return UserRead.model_validate({
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "created_at": user.created_at.isoformat(),
+        "updated_at": iso(user.updated_at),
+    })
+
+
+def agent_read(
+    agent: Agent,
+    chat_session_count: int = 0,
+    open_session_count: int = 0,
+    recent_sessions: Optional[Iterable[Any]] = None
+) -> AgentRead:
+    """Build AgentRead from an agent with its data schemas and fields loaded."""
+    return AgentRead.model_validate(_agent_fields(agent, chat_session_count, open_session_count, recent_sessions))
+
+
+def agent_reads(agents: Iterable[Agent], summaries: Iterable[tuple]) -> List[AgentRead]:
+    """Build AgentReads in bulk; `summaries` yields (chat_session_count, open_session_count, recent_sessions) per agent."""
+    return _agent_list.validate_python([
+        _agent_fields(agent, *summary) for agent, summary in zip(agents, summaries)
+    ])
@@ -0,0 +1,85 @@
+"""
+Server-Sent Events framing for live session streams.
+
+Event ids are the stream cursor "<last message id>-<last collected data id>", so a
+reconnecting client's Last-Event-ID says exactly which rows it has already seen.
+"""
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from src.database.broadcast import StreamEvent, Subscription, session_broadcaster
+
+# Rows ids already delivered on a stream: (last message id, last collected data id)
+StreamCursor = Tuple[int, int]
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Keep reverse proxies (nginx) from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[StreamCursor]:
+    """Parse a Last-Event-ID produced by `event_stream`."""
+    if not event_id:
+        return None
+    try:
+        message_id, data_id = event_id.split("-")
+        return int(message_id), int(data_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Last-Event-ID"
+        )
+
+
+def format_event(event_id: str, kind: str, payload: bytes) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode("ascii"), kind.encode("ascii"), payload)
+
+
+def _advance(cursor: StreamCursor, kind: str, row_id: int) -> StreamCursor:
+    message_id, data_id = cursor
+    if kind == "message":
+        return max(message_id, row_id), data_id
+    return message_id, max(data_id, row_id)
+
+
+async def event_stream(
+    subscription: Subscription,
+    cursor: StreamCursor,
+    backlog: List[StreamEvent],
+    keepalive_seconds: float,
+    retry_ms: int = 3000
+) -> AsyncIterator[bytes]:
+    """
+    Yield the replayed backlog, then live rows until the client disconnects.
+
+    Live rows that were already part of the backlog (committed between subscribing and
+    the replay query) are skipped. Idle streams only wake up to send a keep-alive comment.
+    """
+    try:
+        yield b"retry: %d\n\n" % retry_ms
+        replayed = set()
+        for kind, _session_id, row_id, payload in backlog:
+            replayed.add((kind, row_id))
+            cursor = _advance(cursor, kind, row_id)
+            yield format_event("%d-%d" % cursor, kind, payload)
+
+        while True:
+            try:
+                stream_event = await asyncio.wait_for(subscription.queue.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if stream_event is None:
+                # Fell too far behind; the client reconnects and replays from its last id
+                return
+            kind, _session_id, row_id, payload = stream_event
+            if (kind, row_id) in replayed:
+                continue
+            cursor = _advance(cursor, kind, row_id)
+            yield format_event("%d-%d" % cursor, kind, payload)
+    finally:
+        session_broadcaster.unsubscribe(subscription)
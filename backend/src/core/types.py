@@ -1,11 +1,28 @@
 """
 Type definitions for the application.
 """
+from datetime import datetime
 from typing import TypedDict, Optional
 
+from pydantic import BaseModel, ConfigDict
+
 
 class JWTPayload(TypedDict):
     """JWT token payload structure."""
     sub: str  # subject (user email)
+    uid: int  # user id
+    ver: int  # user's token version when issued
     exp: int  # expiration timestamp
     iat: Optional[int]  # issued at timestamp
+
+
+class Principal(BaseModel):
+    """The authenticated user as seen by routes; cached, so it carries no password hash."""
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    name: str
+    email: str
+    token_version: int = 0
+    created_at: datetime
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,399 @@
+"""
+Dispatcher for calls to agent webhooks.
+
+One `httpx.AsyncClient` is shared by every request in the worker, so calls to the
+same webhook host reuse keep-alive connections instead of paying a TCP/TLS handshake
+per chat turn. Calls are capped globally (the pool size) and per agent, so one slow
+agent cannot take every connection; callers wait at most the webhook timeout for a
+slot. A call is only retried when the webhook cannot have acted on it: the connection
+was never made, or it answered 429/503 with Retry-After (it refused the work and said
+when to come back). 502/504 and read timeouts may come from a proxy after the webhook
+already ran, and retrying them could run an agent turn twice. Every attempt of a call
+carries the same Idempotency-Key header so webhooks can also drop duplicates
+themselves. Retries use jittered exponential backoff; failures surface as
+HTTPException (502/503/504), like any other error the controllers raise.
+
+Webhook URLs are user input, so the URL must be http(s) and its host must resolve only
+to public addresses, keeping agents from reaching internal services through the gateway;
+redirects are not followed. The check runs when an agent is saved and again inside the
+connection pool for every new connection, which connects to the very addresses it just
+checked: a host whose DNS answer changes between a check and the connect (DNS rebinding)
+cannot slip an internal address past it. WEBHOOK_ALLOW_PRIVATE_NETWORKS lifts the
+address check for self-hosted webhooks.
+"""
+import asyncio
+import ipaddress
+import random
+import socket
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+from fastapi import HTTPException, status
+from pydantic_core import to_json
+
+from src.core.config import (
+    WEBHOOK_TIMEOUT_SECONDS,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+    WEBHOOK_MAX_CONCURRENCY_PER_AGENT,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_RETRY_BASE_SECONDS,
+    WEBHOOK_RETRY_MAX_SECONDS,
+    WEBHOOK_ALLOW_PRIVATE_NETWORKS,
+)
+
+# Replies meaning the webhook refused the request; retried only when they carry Retry-After
+RETRY_STATUSES = frozenset({429, 503})
+
+# Latencies kept per agent for the percentiles in stats()
+LATENCY_WINDOW = 512
+
+
+class UnsafeWebhookURL(ValueError):
+    """A webhook URL the gateway refuses to call."""
+
+
+def parse_webhook_url(url: str) -> Tuple[str, int]:
+    """Return the host and port of an http(s) webhook URL."""
+    try:
+        parsed = urlsplit(url)
+        port = parsed.port
+    except ValueError:
+        raise UnsafeWebhookURL("not a valid URL")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise UnsafeWebhookURL("must be an http or https URL with a host")
+    return parsed.hostname, port or (443 if parsed.scheme == "https" else 80)
+
+
+def check_webhook_addresses(host: str, addresses: Iterable[str]) -> None:
+    """Refuse hosts resolving to loopback, private, link-local or otherwise non-public addresses."""
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            raise UnsafeWebhookURL(f"{host} resolves to a non-public address")
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Addresses `host` resolves to, in the resolver's order, without duplicates."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+class CheckedAddressBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that resolves webhook hosts itself and connects only to the addresses
+    it checked. httpcore still sends the original host in the Host header and as the TLS
+    server name, so only the address lookup moves here.
+    """
+
+    def __init__(self, dispatcher: "WebhookDispatcher"):
+        self.dispatcher = dispatcher
+        self.backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None
+    ) -> httpcore.AsyncNetworkStream:
+        error: Optional[Exception] = None
+        for address in await self.dispatcher.resolve(host, port):
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                error = exc
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        raise httpcore.ConnectError("webhooks are not called over unix sockets")
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+@dataclass(eq=False)
+class AgentWebhookStats:
+    """Concurrency slot and counters for one agent's webhook."""
+
+    semaphore: asyncio.Semaphore
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    busy: int = 0
+    waiting: int = 0
+    in_flight: int = 0
+    time_total: float = 0.0
+    time_max: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, elapsed: float) -> None:
+        self.time_total += elapsed
+        self.time_max = max(self.time_max, elapsed)
+        self.latencies.append(elapsed)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 3)
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "busy": self.busy,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.time_total * 1000 / self.requests, 3) if self.requests else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.time_max * 1000, 3),
+        }
+
+
+class WebhookDispatcher:
+    """Posts JSON to agent webhooks over a shared connection pool, with limits and retries."""
+
+    def __init__(
+        self,
+        timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_concurrency_per_agent: int,
+        max_retries: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        allow_private_networks: bool = False,
+        resolver: Callable[[str, int], Awaitable[List[str]]] = resolve_host
+    ):
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.max_concurrency_per_agent = max_concurrency_per_agent
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.allow_private_networks = allow_private_networks
+        self.resolver = resolver
+        self._client: Optional[httpx.AsyncClient] = None
+        # Never more calls in flight than pooled connections, so none wait inside httpx
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._agents: Dict[int, AgentWebhookStats] = {}
+
+    def start(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Create the pooled client; pass a transport to point webhooks at a local stub."""
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits)
+            # httpx has no public hook for the network backend, so its pool is replaced
+            transport._pool = httpcore.AsyncConnectionPool(
+                ssl_context=httpx.create_ssl_context(),
+                max_connections=self.limits.max_connections,
+                max_keepalive_connections=self.limits.max_keepalive_connections,
+                keepalive_expiry=self.limits.keepalive_expiry,
+                network_backend=CheckedAddressBackend(self)
+            )
+        # A redirect could point a checked URL at an internal address
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout, limits=self.limits, transport=transport, follow_redirects=False
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _agent(self, agent_id: int) -> AgentWebhookStats:
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = self._agents[agent_id] = AgentWebhookStats(asyncio.Semaphore(self.max_concurrency_per_agent))
+        return agent
+
+    async def check_url(self, url: str) -> None:
+        """Raise UnsafeWebhookURL unless `url` is http(s) and its host resolves to public addresses."""
+        host, port = parse_webhook_url(url)
+        if not self.allow_private_networks:
+            await self.resolve(host, port)
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """Resolve a webhook host, raising UnsafeWebhookURL for non-public addresses unless allowed."""
+        try:
+            addresses = await self.resolver(host, port)
+        except socket.gaierror:
+            raise UnsafeWebhookURL(f"{host} does not resolve")
+        if not addresses:
+            raise UnsafeWebhookURL(f"{host} does not resolve")
+        if not self.allow_private_networks:
+            check_webhook_addresses(host, addresses)
+        return addresses
+
+    async def post_json(self, agent_id: int, url: str, payload: Any, idempotency_key: Optional[str] = None) -> Any:
+        """
+        POST `payload` (models, dicts, lists) to an agent's webhook and return the decoded JSON reply.
+
+        `idempotency_key` is sent as the Idempotency-Key header on every attempt; a random
+        one is used when the caller has none.
+        """
+        if self._client is None:
+            self.start()
+
+        agent = self._agent(agent_id)
+        agent.requests += 1
+        start = time.perf_counter()
+        try:
+            try:
+                parse_webhook_url(url)
+                async with self._slot(agent):
+                    # New connections check the addresses they connect to (CheckedAddressBackend)
+                    response = await self._send(agent, url, to_json(payload), idempotency_key or uuid.uuid4().hex)
+            except UnsafeWebhookURL as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Agent webhook URL is not allowed: {exc}"
+                )
+            return self._decode(response)
+        except HTTPException:
+            agent.failures += 1
+            raise
+        finally:
+            agent.record(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def _slot(self, agent: AgentWebhookStats) -> AsyncIterator[None]:
+        """Hold one of the agent's slots and one global slot for the duration of a call."""
+        agent.waiting += 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                # Per agent first, so calls queued behind a saturated agent hold no global slot
+                await agent.semaphore.acquire()
+                try:
+                    await self._semaphore.acquire()
+                except BaseException:
+                    agent.semaphore.release()
+                    raise
+        except TimeoutError:
+            agent.busy += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Agent webhook is busy"
+            )
+        finally:
+            agent.waiting -= 1
+
+        agent.in_flight += 1
+        try:
+            yield
+        finally:
+            agent.in_flight -= 1
+            self._semaphore.release()
+            agent.semaphore.release()
+
+    async def _send(self, agent: AgentWebhookStats, url: str, body: bytes, idempotency_key: str) -> httpx.Response:
+        """Send the request, retrying only when the webhook cannot have acted on it."""
+        headers = {"Content-Type": "application/json", "Idempotency-Key": idempotency_key}
+        error: Optional[httpx.HTTPError] = None
+        retry_after: Optional[str] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                agent.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+            retry_after = None
+            try:
+                response = await self._client.post(url, content=body, headers=headers)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                # Never sent; a read timeout, by contrast, may have been processed already
+                error = exc
+                continue
+            except httpx.TimeoutException:
+                agent.timeouts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Agent webhook timed out"
+                )
+            except httpx.HTTPError:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail="Agent webhook is unreachable"
+                )
+            retry_after = response.headers.get("Retry-After")
+            if response.status_code not in RETRY_STATUSES or retry_after is None or attempt == self.max_retries:
+                return response
+
+        if isinstance(error, httpx.TimeoutException):
+            agent.timeouts += 1
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Agent webhook timed out"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Agent webhook is unreachable"
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Exponential backoff with jitter, at least the webhook's Retry-After, capped."""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1))
+        # Half fixed, half random, so retries from many callers spread out
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return min(delay, self.retry_max_seconds)
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Any:
+        if response.is_error:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Agent webhook returned {response.status_code}"
+            )
+        try:
+            return response.json()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Agent webhook returned invalid JSON"
+            )
+
+    def stats(self) -> dict:
+        agents = {agent_id: agent.stats() for agent_id, agent in self._agents.items()}
+        totals = {
+            key: sum(agent[key] for agent in agents.values())
+            for key in ("requests", "failures", "retries", "timeouts", "busy", "waiting", "in_flight")
+        }
+        return {
+            **totals,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "max_concurrency_per_agent": self.max_concurrency_per_agent,
+            "max_retries": self.max_retries,
+            "allow_private_networks": self.allow_private_networks,
+            "agents": agents,
+        }
+
+
+webhook_dispatcher = WebhookDispatcher(
+    WEBHOOK_TIMEOUT_SECONDS,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_MAX_KEEPALIVE_CONNECTIONS,
+    WEBHOOK_MAX_CONCURRENCY_PER_AGENT,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_RETRY_BASE_SECONDS,
+    WEBHOOK_RETRY_MAX_SECONDS,
+    WEBHOOK_ALLOW_PRIVATE_NETWORKS
+)
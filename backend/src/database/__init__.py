@@ -2,10 +2,36 @@
 Database package - connection and session management.
 """
 
-from .connection import engine, create_db_and_tables, get_session
+from .connection import (
+    engine,
+    async_engine,
+    replica_engine,
+    async_replica_engine,
+    create_db_and_tables,
+    get_session,
+    get_db_session,
+    get_read_session,
+    db_session,
+    run_db,
+    record_write,
+    DBSession,
+    get_pool_stats,
+)
+from .schema import index_available
 
 __all__ = [
     "engine",
+    "async_engine",
+    "replica_engine",
+    "async_replica_engine",
     "create_db_and_tables", 
     "get_session",
+    "get_db_session",
+    "get_read_session",
+    "db_session",
+    "run_db",
+    "record_write",
+    "DBSession",
+    "get_pool_stats",
+    "index_available",
 ]
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+In-process fan-out of committed chat rows to live session streams.
+
+Controllers call `session_broadcaster.publish(session, kind, session_id, row_id, model)`
+next to an insert. Like invalidation events, the rows are only delivered once the
+session commits, so a stream never shows a message that was rolled back. The group
+commit buffer, which writes through a bare connection, calls `deliver` itself after
+its transaction commits.
+
+Delivery is local to this worker process: a stream sees rows written by the worker it
+is connected to, and anything else when it reconnects (replay runs from the database).
+"""
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import event
+from sqlmodel import Session
+
+from src.core.config import SESSION_STREAM_MAX_QUEUED
+
+# Rows waiting for the session to commit
+_PENDING_KEY = "broadcast_events"
+
+# (kind, session_id, row_id, JSON payload)
+StreamEvent = Tuple[str, int, int, bytes]
+
+
+@dataclass(eq=False)
+class Subscription:
+    """One open stream. `None` on the queue means the stream fell behind and must reconnect."""
+
+    session_id: int
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+class SessionBroadcaster:
+    """Routes committed message and collected-data rows to the streams of their session."""
+
+    def __init__(self, max_queued: int = 256):
+        self.max_queued = max_queued
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, session_id: int) -> Subscription:
+        """Open a stream for a session; must be called on the event loop."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(session_id, asyncio.Queue(self.max_queued))
+        self._subscribers[session_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.session_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.session_id]
+
+    def watching(self, session_id: int) -> bool:
+        """Whether any stream in this worker follows the session."""
+        return session_id in self._subscribers
+
+    def publish(self, session: Session, kind: str, session_id: int, row_id: int, model: BaseModel) -> None:
+        """Queue a row on the database session; it is delivered only if the session commits."""
+        # Nothing to serialize when nobody in this worker is watching the session
+        if self.watching(session_id):
+            session.info.setdefault(_PENDING_KEY, []).append((kind, session_id, row_id, to_json(model)))
+
+    def deliver(self, events: List[StreamEvent]) -> None:
+        """Hand committed rows to their streams; safe to call from any thread."""
+        loop = self._loop
+        if not events or loop is None or loop.is_closed():
+            return
+        try:
+            if asyncio.get_running_loop() is loop:
+                self._deliver(events)
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(self._deliver, events)
+
+    def _deliver(self, events: List[StreamEvent]) -> None:
+        for stream_event in events:
+            for subscription in list(self._subscribers.get(stream_event[1], ())):
+                try:
+                    subscription.queue.put_nowait(stream_event)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    # A slow reader is cut off rather than buffered without bound; it
+                    # resumes from its Last-Event-ID and replays from the database
+                    self.overflows += 1
+                    self.unsubscribe(subscription)
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._subscribers),
+            "streams": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+            "max_queued": self.max_queued,
+        }
+
+
+session_broadcaster = SessionBroadcaster(SESSION_STREAM_MAX_QUEUED)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed(session: Session) -> None:
+    session_broadcaster.deliver(session.info.pop(_PENDING_KEY, None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_uncommitted(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -2,30 +2,120 @@
 Database connection and session management.
 """
 from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Secret
+from starlette.requests import Request
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncGenerator, Callable, Generator, Optional, TypeVar, Union
 import logging
-from src.core.config import DATABASE_URL, DEBUG  
+import time
+from src.core.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    USE_ASYNC_DATABASE,
+    DEBUG,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_POOL_USE_LIFO,
+    REPLICA_DATABASE_URL,
+    ASYNC_REPLICA_DATABASE_URL,
+    REPLICA_STALENESS_SECONDS,
+)
+from .pool import instrumented_pool_class
+from .schema import upgrade_schema
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Either session type can be handed to controllers through `run_db`
+DBSession = Union[AsyncSession, Session]
+
+# Read-your-writes marker returned after a commit and echoed back by clients
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "captor_last_write"
+
 # Get database URL from settings
 database_url = str(DATABASE_URL)
 print(f"Using database: {database_url}")
 logger.info(f"Using database: {database_url.split('://')[0]}://[connection details hidden]")
 
+
+def _engine_kwargs(url: str, pool_name: str, async_driver: bool = False) -> dict:
+    """Build engine settings, including the configured queue pool for PostgreSQL."""
+    engine_kwargs = {
+        "echo": DEBUG,  # Log SQL queries in debug mode
+    }
+
+    # Add connection pool settings for PostgreSQL
+    if url.startswith("postgresql"):
+        engine_kwargs.update({
+            "poolclass": instrumented_pool_class(pool_name, async_driver),
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,    # Recycle connections after this many seconds
+            "pool_pre_ping": DB_POOL_PRE_PING,  # Verify connections before use
+            "pool_use_lifo": DB_POOL_USE_LIFO,  # Reuse hot connections so idle ones can expire
+        })
+
+    return engine_kwargs
+
+
 # Create database engine with appropriate settings
-engine_kwargs = {
-    "echo": DEBUG,  # Log SQL queries in debug mode
-}
+engine = create_engine(database_url, **_engine_kwargs(database_url, "primary"))
+
+
+def _resolve_async_url(url: str, override: Optional[Secret]) -> Optional[str]:
+    """Return the async driver URL, or None to fall back to the sync engine."""
+    if not USE_ASYNC_DATABASE:
+        return None
+    if override is not None:
+        return str(override)
+    if url.startswith("postgresql"):
+        # postgresql:// and postgresql+psycopg2:// both map onto asyncpg
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    # SQLite (local development) keeps using the sync engine
+    return None
+
+
+async_database_url = _resolve_async_url(database_url, ASYNC_DATABASE_URL)
+async_engine = (
+    create_async_engine(async_database_url, **_engine_kwargs(async_database_url, "primary_async", async_driver=True))
+    if async_database_url else None
+)
 
-# Add connection pool settings for PostgreSQL
-if database_url.startswith("postgresql"):
-    engine_kwargs.update({
-        "pool_pre_ping": True,   # Verify connections before use
-        "pool_recycle": 3600,    # Recycle connections after 1 hour
-    })
+# Optional read replica; read-only endpoints fall back to the primary without it
+replica_url = str(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL is not None else None
+replica_engine = create_engine(replica_url, **_engine_kwargs(replica_url, "replica")) if replica_url else None
+async_replica_url = _resolve_async_url(replica_url, ASYNC_REPLICA_DATABASE_URL) if replica_url else None
+async_replica_engine = (
+    create_async_engine(async_replica_url, **_engine_kwargs(async_replica_url, "replica_async", async_driver=True))
+    if async_replica_url else None
+)
 
-engine = create_engine(database_url, **engine_kwargs)
+
+def get_pool_stats() -> dict:
+    """Report live pool state and checkout counters for every engine."""
+    engines = {
+        "primary": engine,
+        "primary_async": async_engine,
+        "replica": replica_engine,
+        "replica_async": async_replica_engine,
+    }
+    stats = {}
+    for name, db_engine in engines.items():
+        if db_engine is None:
+            continue
+        pool = db_engine.pool
+        stats[name] = pool.stats.snapshot(pool) if hasattr(pool, "stats") else {"status": pool.status()}
+    return stats
 
 
 def create_db_and_tables():
@@ -33,6 +123,7 @@ def create_db_and_tables():
     try:
         logger.info("Creating database tables...")
         SQLModel.metadata.create_all(engine)
+        upgrade_schema(engine)
         logger.info("Database tables created successfully!")
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
@@ -43,9 +134,99 @@ def create_db_and_tables():
 def get_session() -> Generator[Session, None, None]:
     """
     Get database session.
-    
+
     Yields:
         Session: Database session.
     """
     with Session(engine) as session:
         yield session
+
+
+@asynccontextmanager
+async def _session_scope(bind: Engine, async_bind: Optional[AsyncEngine]) -> AsyncGenerator[DBSession, None]:
+    """Open an AsyncSession when an async engine is available, else a sync Session."""
+    if async_bind is None:
+        with Session(bind) as session:
+            yield session
+    else:
+        async with AsyncSession(async_bind) as session:
+            yield session
+
+
+def db_session() -> AsyncContextManager[DBSession]:
+    """
+    Open a primary database session outside of a request's dependencies.
+
+    For long-lived connections (WebSockets), which should hold a session only for
+    the duration of each unit of work rather than for the whole connection.
+    """
+    return _session_scope(engine, async_engine)
+
+
+async def get_db_session(request: Request) -> AsyncGenerator[DBSession, None]:
+    """
+    Get a primary database session for async routes.
+
+    Yields an AsyncSession when the async engine is configured, otherwise a
+    sync Session (SQLite fallback). Commits are recorded on the request so the
+    response can tell the client it must read its own writes from the primary.
+
+    Yields:
+        DBSession: Database session.
+    """
+    async with _session_scope(engine, async_engine) as session:
+        session.info["request"] = request
+        yield session
+
+
+def _recent_write_at(request: Request) -> Optional[float]:
+    """Read the last-write timestamp the client echoes back (header or cookie)."""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[DBSession, None]:
+    """
+    Get a read-only database session, routed to the replica when possible.
+
+    Falls back to the primary when no replica is configured, or when the client
+    wrote within REPLICA_STALENESS_SECONDS (read-your-writes).
+
+    Yields:
+        DBSession: Database session.
+    """
+    last_write = _recent_write_at(request)
+    if replica_engine is None or (last_write is not None and time.time() - last_write < REPLICA_STALENESS_SECONDS):
+        async with _session_scope(engine, async_engine) as session:
+            yield session
+    else:
+        async with _session_scope(replica_engine, async_replica_engine) as session:
+            yield session
+
+
+def record_write(session: DBSession) -> None:
+    """Mark the owning request as having written to the primary."""
+    request = session.info.get("request")
+    if request is not None:
+        request.state.db_last_write = time.time()
+
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    record_write(session)
+
+
+async def run_db(session: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a sync, session-based callable from async code.
+
+    With an AsyncSession the callable runs through `run_sync`, so all I/O goes
+    through the async driver and no worker thread is held. With a sync Session
+    it is dispatched to the threadpool instead.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
@@ -0,0 +1,264 @@
+"""
+Write-behind group commit for chat messages.
+
+When GROUP_COMMIT_ENABLED is set, the single-message append endpoints hand their
+message to `message_buffer` instead of committing it themselves. A background task
+writes everything queued within GROUP_COMMIT_MAX_DELAY_MS (or as soon as
+GROUP_COMMIT_MAX_ROWS are waiting) in one transaction, so many concurrent chat turns
+share one commit and one fsync.
+
+Guarantees:
+- Durability: a request is only answered after the transaction holding its message
+  has committed. When a row is rejected (a constraint or data error) the batch is split
+  and retried, so only the request owning that row gets the error; when the database
+  itself fails every request in the batch gets the error. stop() flushes everything
+  still queued, and messages queued when the process dies were never acknowledged.
+- Ordering: batches are flushed one at a time in submission order, and created_at is
+  taken at submission, so messages of a session keep the order they were sent to this
+  worker process. There is no ordering across worker processes.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Union
+
+from fastapi import HTTPException, status
+from pydantic_core import to_json
+from sqlalchemy import Connection, insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import GROUP_COMMIT_MAX_DELAY_MS, GROUP_COMMIT_MAX_ROWS
+from src.models.chat import ChatSession, Message, MessageRead
+from .connection import engine, async_engine
+from .broadcast import session_broadcaster
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by a row rather than by the database; the rest of its batch can still commit
+ROW_ERRORS = (IntegrityError, DataError)
+
+
+@dataclass
+class PendingMessage:
+    """A message waiting for the next group commit."""
+
+    session_id: int
+    sender: str
+    receiver: str
+    content: str
+    close_session: bool
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def read(self, message_id: int) -> MessageRead:
+        return MessageRead(
+            id=message_id,
+            session_id=self.session_id,
+            sender=self.sender,
+            receiver=self.receiver,
+            content=self.content,
+            created_at=self.created_at.isoformat()
+        )
+
+
+def _write_batch(connection: Connection, batch: List[PendingMessage]) -> List[Optional[int]]:
+    """Insert a batch in one transaction; returns the new ids (None for a missing session)."""
+    session_ids = {pending.session_id for pending in batch}
+    existing = set(connection.execute(select(ChatSession.id).where(ChatSession.id.in_(session_ids))).scalars())
+    valid = [pending for pending in batch if pending.session_id in existing]
+
+    message_ids = {}
+    if valid:
+        rows = [
+            {
+                "session_id": pending.session_id,
+                "sender": pending.sender,
+                "receiver": pending.receiver,
+                "content": pending.content,
+                "created_at": pending.created_at,
+            }
+            for pending in valid
+        ]
+        if connection.dialect.insert_returning:
+            # One executemany; RETURNING rows come back in parameter order
+            result = connection.execute(insert(Message).returning(Message.id, sort_by_parameter_order=True), rows)
+            ids = list(result.scalars())
+        else:
+            ids = [connection.execute(insert(Message), row).inserted_primary_key[0] for row in rows]
+        message_ids = {id(pending): message_id for pending, message_id in zip(valid, ids)}
+
+    closed = {pending.session_id for pending in valid if pending.close_session}
+    if closed:
+        connection.execute(update(ChatSession).where(ChatSession.id.in_(closed)).values(session_closed=True))
+
+    return [message_ids.get(id(pending)) for pending in batch]
+
+
+def _write_batch_sync(batch: List[PendingMessage]) -> List[Optional[int]]:
+    with engine.begin() as connection:
+        return _write_batch(connection, batch)
+
+
+class MessageWriteBuffer:
+    """Queues chat messages and commits them in groups from one background task."""
+
+    def __init__(self, max_delay_ms: float, max_rows: int):
+        self.max_delay = max_delay_ms / 1000
+        self.max_rows = max_rows
+        self._pending: List[PendingMessage] = []
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.flushes = 0
+        self.rows = 0
+        self.failures = 0
+        self.row_failures = 0
+        self.splits = 0
+        self.max_batch = 0
+        self.flush_time_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    def start(self) -> None:
+        """Start the flusher task on the running event loop."""
+        # Events bind to the loop that first waits on them, so create them here
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the flusher task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._has_pending.set()
+        await self._task
+        self._task = None
+
+    async def submit(
+        self,
+        session_id: int,
+        sender: str,
+        receiver: str,
+        content: str,
+        close_session: bool = False
+    ) -> MessageRead:
+        """Queue a message and wait until it has been committed."""
+        if not self.running:
+            raise RuntimeError("Message write buffer is not running")
+
+        pending = PendingMessage(session_id, sender, receiver, content, close_session)
+        self._pending.append(pending)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+
+        message_id = await asyncio.shield(pending.future)
+        return pending.read(message_id)
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            if not self._stopping and len(self._pending) < self.max_rows:
+                # Give concurrent requests a moment to join this commit
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self._pending = self._pending[:self.max_rows], self._pending[self.max_rows:]
+            if len(self._pending) < self.max_rows:
+                self._full.clear()
+            if not self._pending:
+                self._has_pending.clear()
+
+            if batch:
+                await self._flush(batch)
+            # Checked after every pass: stop() may have been called while the queue drained
+            if self._stopping and not self._pending:
+                return
+
+    async def _write(self, batch: List[PendingMessage]) -> List[Optional[int]]:
+        if async_engine is not None:
+            async with async_engine.begin() as connection:
+                return await connection.run_sync(_write_batch, batch)
+        return await run_in_threadpool(_write_batch_sync, batch)
+
+    async def _write_isolating(self, batch: List[PendingMessage]) -> List[Union[int, None, Exception]]:
+        """Write a batch; on a row error, split it in halves so only the offending rows fail."""
+        try:
+            return await self._write(batch)
+        except ROW_ERRORS as exc:
+            if len(batch) == 1:
+                logger.warning("Group commit rejected a message for session %d: %s", batch[0].session_id, exc)
+                self.row_failures += 1
+                return [exc]
+            self.splits += 1
+            # Halves are written in order, so a session's messages keep their order
+            middle = len(batch) // 2
+            return await self._write_isolating(batch[:middle]) + await self._write_isolating(batch[middle:])
+
+    async def _flush(self, batch: List[PendingMessage]) -> None:
+        start = time.perf_counter()
+        try:
+            results = await self._write_isolating(batch)
+        except Exception as exc:
+            logger.exception("Group commit of %d messages failed", len(batch))
+            self.failures += 1
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        self.flushes += 1
+        self.rows += sum(isinstance(result, int) for result in results)
+        self.max_batch = max(self.max_batch, len(batch))
+        self.flush_time_total += time.perf_counter() - start
+
+        # Live session streams get the committed messages too
+        session_broadcaster.deliver([
+            ("message", pending.session_id, message_id, to_json(pending.read(message_id)))
+            for pending, message_id in zip(batch, results)
+            if isinstance(message_id, int) and session_broadcaster.watching(pending.session_id)
+        ])
+
+        for pending, message_id in zip(batch, results):
+            if pending.future.done():
+                continue
+            if isinstance(message_id, Exception):
+                pending.future.set_exception(message_id)
+            elif message_id is None:
+                pending.future.set_exception(HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Session not found"
+                ))
+            else:
+                pending.future.set_result(message_id)
+
+    def stats(self) -> dict:
+        """Report flush counters for the internal stats endpoint."""
+        return {
+            "running": self.running,
+            "queued": len(self._pending),
+            "flushes": self.flushes,
+            "rows": self.rows,
+            "failures": self.failures,
+            "row_failures": self.row_failures,
+            "splits": self.splits,
+            "avg_batch": round(self.rows / self.flushes, 2) if self.flushes else 0.0,
+            "max_batch": self.max_batch,
+            "avg_flush_ms": round(self.flush_time_total * 1000 / self.flushes, 3) if self.flushes else 0.0,
+            "max_delay_ms": self.max_delay * 1000,
+            "max_rows": self.max_rows,
+        }
+
+
+message_buffer = MessageWriteBuffer(GROUP_COMMIT_MAX_DELAY_MS, GROUP_COMMIT_MAX_ROWS)
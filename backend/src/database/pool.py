@@ -0,0 +1,80 @@
+"""
+Connection pool instrumentation.
+"""
+import threading
+import time
+from typing import Dict, Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    """Counters for one connection pool, safe to update from any thread."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Record how long a checkout waited for a connection."""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def snapshot(self, pool: Pool) -> dict:
+        """Return the counters together with the pool's live state."""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self.wait_time_total * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout and counts pool timeouts."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+# Stats live outside the pool object so they survive engine.dispose()/pool.recreate()
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def instrumented_pool_class(name: str, async_driver: bool = False) -> Type[QueuePool]:
+    """Build a queue pool class that reports into `pool_stats[name]`."""
+    stats = pool_stats.setdefault(name, PoolStats(name))
+    base = AsyncAdaptedQueuePool if async_driver else QueuePool
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPoolMixin, base), {"stats": stats})
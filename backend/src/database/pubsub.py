@@ -0,0 +1,237 @@
+"""
+Cross-worker cache invalidation.
+
+Controllers call `invalidation_bus.publish(session, kind, key)` next to a mutation.
+The event is delivered to this process's handlers once the session commits, and to
+the other worker processes through the configured backend:
+
+- `PostgresBackend`: `pg_notify` runs inside the committing transaction, so other
+  workers only hear about committed changes. Each worker keeps one asyncpg connection
+  LISTENing, started from the app lifespan; after a reconnect every local cache is
+  reset, since events may have been missed.
+- `InMemoryBackend`: delivers between buses attached to the same backend object in
+  one process. Used for SQLite development and for tests.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlmodel import Session
+
+from src.core.config import INVALIDATION_BACKEND
+from .connection import database_url
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "captor_invalidate"
+
+# Events waiting for the session to commit
+_PENDING_KEY = "invalidation_events"
+
+Event = Tuple[str, Hashable]
+
+
+class InvalidationBus:
+    """Routes invalidation events to local handlers and to other workers."""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.backend: Optional["InvalidationBackend"] = None
+        self._handlers: Dict[str, List[Callable[[Hashable], object]]] = defaultdict(list)
+        self._resets: List[Callable[[], object]] = []
+
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, kind: str, handler: Callable[[Hashable], object], reset: Optional[Callable[[], object]] = None) -> None:
+        """Call `handler(key)` for every `kind` event, and `reset()` when events may have been lost."""
+        self._handlers[kind].append(handler)
+        if reset is not None:
+            self._resets.append(reset)
+
+    def publish(self, session: Session, kind: str, key: Hashable) -> None:
+        """Queue an event on the session; it is sent only if the session commits."""
+        session.info.setdefault(_PENDING_KEY, []).append((kind, key))
+
+    def dispatch(self, kind: str, key: Hashable) -> None:
+        for handler in self._handlers.get(kind, ()):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("Invalidation handler for %s failed", kind)
+
+    def reset(self) -> None:
+        for reset in self._resets:
+            reset()
+
+    def receive(self, origin: str, kind: str, key: Hashable) -> None:
+        """Handle an event from another worker (our own were dispatched at commit)."""
+        if origin == self.origin:
+            return
+        self.received += 1
+        self.dispatch(kind, key)
+
+    async def start(self, backend: "InvalidationBackend") -> None:
+        self.backend = backend
+        await backend.start(self)
+
+    async def stop(self) -> None:
+        if self.backend is not None:
+            await self.backend.stop(self)
+            self.backend = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "connected": self.backend.connected if self.backend else False,
+            "published": self.published,
+            "received": self.received,
+        }
+
+    def _encode(self, kind: str, key: Hashable) -> str:
+        return json.dumps({"origin": self.origin, "kind": kind, "key": key}, separators=(",", ":"))
+
+    def _decode(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            self.receive(data["origin"], data["kind"], data["key"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation event: %r", payload)
+
+
+class InvalidationBackend:
+    """Transport for invalidation events between workers."""
+
+    connected = False
+
+    async def start(self, bus: InvalidationBus) -> None:
+        self.connected = True
+
+    async def stop(self, bus: InvalidationBus) -> None:
+        self.connected = False
+
+    def before_commit(self, bus: InvalidationBus, session: Session, events: List[Event]) -> None:
+        """Called inside the transaction that is about to commit."""
+
+    def after_commit(self, bus: InvalidationBus, events: List[Event]) -> None:
+        """Called once the transaction has committed."""
+
+
+class InMemoryBackend(InvalidationBackend):
+    """Delivers to every bus started on this backend object (one process)."""
+
+    def __init__(self):
+        self.buses: Set[InvalidationBus] = set()
+
+    async def start(self, bus: InvalidationBus) -> None:
+        self.buses.add(bus)
+        self.connected = True
+
+    async def stop(self, bus: InvalidationBus) -> None:
+        self.buses.discard(bus)
+        self.connected = bool(self.buses)
+
+    def after_commit(self, bus: InvalidationBus, events: List[Event]) -> None:
+        for other in list(self.buses):
+            for kind, key in events:
+                other.receive(bus.origin, kind, key)
+
+
+class PostgresBackend(InvalidationBackend):
+    """NOTIFY inside the writing transaction, LISTEN on a dedicated asyncpg connection."""
+
+    def __init__(self, url: str, max_backoff: float = 30.0):
+        # asyncpg takes a plain libpq-style DSN without the SQLAlchemy driver suffix
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.max_backoff = max_backoff
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, bus: InvalidationBus) -> None:
+        self._task = asyncio.create_task(self._listen(bus))
+
+    async def stop(self, bus: InvalidationBus) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    def before_commit(self, bus: InvalidationBus, session: Session, events: List[Event]) -> None:
+        for kind, key in events:
+            session.exec(select(func.pg_notify(INVALIDATION_CHANNEL, bus._encode(kind, key))))
+
+    async def _listen(self, bus: InvalidationBus) -> None:
+        import asyncpg
+
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _connection: closed.set())
+                await connection.add_listener(
+                    INVALIDATION_CHANNEL, lambda _connection, _pid, _channel, payload: bus._decode(payload)
+                )
+                self.connected = True
+                backoff = 1.0
+                # Anything published while we weren't listening is lost
+                bus.reset()
+                await closed.wait()
+                logger.warning("Invalidation listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+                raise
+            except Exception:
+                logger.exception("Invalidation listener failed; retrying in %.0fs", backoff)
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+def create_backend() -> Optional[InvalidationBackend]:
+    """Pick the backend from INVALIDATION_BACKEND ("auto", "postgres", "memory" or "none")."""
+    backend = INVALIDATION_BACKEND
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgresql") else "memory"
+    if backend == "postgres":
+        return PostgresBackend(database_url)
+    if backend == "memory":
+        return InMemoryBackend()
+    return None
+
+
+invalidation_bus = InvalidationBus()
+
+
+@event.listens_for(Session, "before_commit")
+def _send_invalidations(session: Session) -> None:
+    events = session.info.get(_PENDING_KEY)
+    if events and invalidation_bus.backend is not None:
+        invalidation_bus.backend.before_commit(invalidation_bus, session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_invalidations(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if not events:
+        return
+    invalidation_bus.published += len(events)
+    for kind, key in events:
+        invalidation_bus.dispatch(kind, key)
+    if invalidation_bus.backend is not None:
+        invalidation_bus.backend.after_commit(invalidation_bus, events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,73 @@
+"""
+Startup upgrades for databases created by an older release.
+
+`create_all` only creates missing tables, so columns and indexes added to existing
+models never reach a database that already has those tables. `upgrade_schema` adds them
+after `create_all`. New columns must be nullable or have a server default, which existing
+rows take (users.token_version starts at 0). An index that cannot be built (for example
+a unique index over rows that already collide) is logged and recorded in
+`missing_indexes`, and the code relying on it falls back to a slower path instead of
+failing at runtime.
+"""
+import logging
+from typing import Set
+
+from sqlalchemy import Column, Engine, Index, inspect
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+# Model indexes this database does not have; see index_available()
+missing_indexes: Set[str] = set()
+
+
+def index_available(name: str) -> bool:
+    """Whether a model index exists in the database (queries may rely on it)."""
+    return name not in missing_indexes
+
+
+def _create_index(bind: Engine, index: Index) -> bool:
+    try:
+        index.create(bind, checkfirst=True)
+        return True
+    except Exception as exc:
+        # Another worker may have created it concurrently
+        if index.name in {item["name"] for item in inspect(bind).get_indexes(index.table.name)}:
+            return True
+        logger.error(f"Could not create index {index.name} on {index.table.name}: {exc}")
+        return False
+
+
+def _add_column(bind: Engine, column: Column) -> None:
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(
+            f"Cannot add {column.table.name}.{column.name} to existing rows: "
+            f"it is NOT NULL without a server default"
+        )
+    table = bind.dialect.identifier_preparer.format_table(column.table)
+    ddl = CreateColumn(column).compile(dialect=bind.dialect)
+    # Workers start together; PostgreSQL can skip a column another one just added
+    if_not_exists = "IF NOT EXISTS " if bind.dialect.name == "postgresql" else ""
+    logger.info(f"Adding column {column.table.name}.{column.name}...")
+    with bind.begin() as connection:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {if_not_exists}{ddl}")
+
+
+def upgrade_schema(bind: Engine) -> None:
+    """Bring tables created by an older release up to the current models."""
+    inspector = inspect(bind)
+    missing_indexes.clear()
+    for table in SQLModel.metadata.sorted_tables:
+        columns = {item["name"] for item in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                _add_column(bind, column)
+
+        existing = {item["name"] for item in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda item: item.name):
+            if index.name in existing:
+                continue
+            logger.info(f"Creating index {index.name} on {table.name}...")
+            if not _create_index(bind, index):
+                missing_indexes.add(index.name)
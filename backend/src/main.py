@@ -5,9 +5,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from src.core.config import APP_NAME, DEBUG
-from src.routes import auth_routes, user_routes, agent_routes, chat_routes
-from src.database import create_db_and_tables
+from src.core.config import APP_NAME, DEBUG, GROUP_COMMIT_ENABLED
+from src.routes import auth_routes, user_routes, agent_routes, chat_routes, internal_routes
+from src.database import create_db_and_tables, async_engine, async_replica_engine
+from src.database.connection import LAST_WRITE_HEADER
+from src.database.group_commit import message_buffer
+from src.database.pubsub import invalidation_bus, create_backend
+from src.core.middleware import ReadYourWritesMiddleware
+from src.core.auth import password_hasher
+from src.core.webhooks import webhook_dispatcher
 
 
 
@@ -16,7 +22,21 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Create database tables on startup
     create_db_and_tables()
+    # Listen for cache invalidations from other workers
+    invalidation_backend = create_backend()
+    if invalidation_backend is not None:
+        await invalidation_bus.start(invalidation_backend)
+    if GROUP_COMMIT_ENABLED:
+        message_buffer.start()
     yield
+    # Commit whatever is still queued before the engines go away
+    await message_buffer.stop()
+    await invalidation_bus.stop()
+    password_hasher.shutdown()
+    await webhook_dispatcher.aclose()
+    for db_engine in (async_engine, async_replica_engine):
+        if db_engine is not None:
+            await db_engine.dispose()
 
 
 app = FastAPI(
@@ -34,13 +54,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[LAST_WRITE_HEADER],
 )
 
+# Routes read-your-writes clients to the primary after they commit
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers with prefixes
 app.include_router(auth_routes.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(user_routes.router, prefix="/api/users", tags=["users"])
 app.include_router(agent_routes.router, prefix="/api/agents", tags=["agents"])
 app.include_router(chat_routes.router, prefix="/api/chat", tags=["chat"])
+app.include_router(internal_routes.router, prefix="/api/internal", tags=["internal"])
 
 
 @app.get("/")
@@ -3,6 +3,7 @@ Agent model for AI agents created by users.
 """
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from .base import BaseTable
 from .data_schema import AgentDataFieldCreate, AgentDataSchemaRead, AgentDataFieldUpdate
 from .chat import ChatSessionRead
@@ -29,8 +30,14 @@ class Agent(AgentBase, BaseTable, table=True):
     """Agent table for AI agents created by users."""
     
     __tablename__ = "agents"
-    
-    user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
+    __table_args__ = (
+        # A user's agents, newest first, with keyset pagination
+        Index("ix_agents_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Public chat links resolve by chat_url; NULLs (no link yet) don't collide
+        Index("ux_agents_chat_url", "chat_url", unique=True),
+    )
+
+    user_id: int = Field(foreign_key="users.id", nullable=False)
     
     # Relationships
     user: "User" = Relationship(back_populates="agents")
@@ -70,7 +77,9 @@ class AgentRead(AgentBase):
     created_at: str
     updated_at: Optional[str] = None
     data_schemas: List[AgentDataSchemaRead] = []
-    chat_sessions: List[ChatSessionRead] = []
+    chat_session_count: int = 0
+    open_session_count: int = 0
+    recent_sessions: Optional[List[ChatSessionRead]] = None  # only included when requested
 
 
 class AgentUpdate(SQLModel):
@@ -4,7 +4,7 @@ Chat session and message models.
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING, Any
 from sqlmodel import SQLModel, Field, Relationship, Column
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 from .base import BaseTable
 
 if TYPE_CHECKING:
@@ -26,8 +26,17 @@ class ChatSession(ChatSessionBase, BaseTable, table=True):
     """Chat session table for conversation instances between customer & agent."""
 
     __tablename__ = "chat_sessions"
-
-    agent_id: int = Field(foreign_key="agents.id", nullable=False, index=True)
+    __table_args__ = (
+        # Agent session lists, counts and keyset pages
+        Index("ix_chat_sessions_agent_id_created_at_id", "agent_id", "created_at", "id"),
+        # One session per customer; get-or-create inserts with ON CONFLICT DO NOTHING on it
+        Index(
+            "ux_chat_sessions_agent_id_customer",
+            "agent_id", "customer_name", "customer_email", unique=True
+        ),
+    )
+
+    agent_id: int = Field(foreign_key="agents.id", nullable=False)
 
     # Relationships
     agent: "Agent" = Relationship(back_populates="chat_sessions")
@@ -63,8 +72,12 @@ class Message(MessageBase, BaseTable, table=True):
     """Message table for conversation history."""
     
     __tablename__ = "messages"
-    
-    session_id: int = Field(foreign_key="chat_sessions.id", nullable=False, index=True)
+    __table_args__ = (
+        # Session history in order, and message windows on (created_at, id)
+        Index("ix_messages_session_id_created_at_id", "session_id", "created_at", "id"),
+    )
+
+    session_id: int = Field(foreign_key="chat_sessions.id", nullable=False)
     
     # Relationships
     session: "ChatSession" = Relationship(back_populates="messages")
@@ -3,6 +3,7 @@ Customer model for end-users who interact with agent links.
 """
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from .base import BaseTable
 
 if TYPE_CHECKING:
@@ -21,8 +22,12 @@ class Customer(CustomerBase, BaseTable, table=True):
     """Customer table for end-users who interact with agent links."""
 
     __tablename__ = "customers"
+    __table_args__ = (
+        # One customer per email and agent; serves the get-or-create lookup
+        Index("ux_customers_agent_id_email", "agent_id", "email", unique=True),
+    )
 
-    agent_id: int = Field(foreign_key="agents.id", nullable=False, index=True)
+    agent_id: int = Field(foreign_key="agents.id", nullable=False)
 
     # Relationships
     agent: "Agent" = Relationship(back_populates="customers")
@@ -3,7 +3,7 @@ Dynamic agent data schema models.
 """
 from typing import Optional, List, TYPE_CHECKING, Any
 from sqlmodel import SQLModel, Field, Relationship, Column
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 from .base import BaseTable
 
 if TYPE_CHECKING:
@@ -90,8 +90,12 @@ class CollectedData(CollectedDataBase, BaseTable, table=True):
     """Collected data table for data collected during sessions."""
 
     __tablename__ = "collected_data"
+    __table_args__ = (
+        # A session's collected data in the order it was given
+        Index("ix_collected_data_session_id_created_at", "session_id", "created_at"),
+    )
 
-    session_id: int = Field(foreign_key="chat_sessions.id", nullable=False, index=True)
+    session_id: int = Field(foreign_key="chat_sessions.id", nullable=False)
     field_id: int = Field(foreign_key="agent_data_fields.id", nullable=False, index=True)
 
     # Relationships
@@ -124,6 +128,7 @@ class AgentDataSchemaUpdate(SQLModel):
 class AgentDataFieldUpdate(SQLModel):
     """Agent data field update schema."""
 
+    id: Optional[int] = None  # existing field to update; omitted for new fields
     key: Optional[str] = None
     question: Optional[str] = None
     data_type: Optional[str] = None
@@ -22,6 +22,8 @@ class User(UserBase, BaseTable, table=True):
     __tablename__ = "users"
     
     password_hash: str = Field(max_length=255, nullable=False)
+    # Tokens carry the version they were issued under; bumping it revokes them
+    token_version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
     
     # Relationships
     agents: List["Agent"] = Relationship(back_populates="user")
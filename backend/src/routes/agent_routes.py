@@ -1,96 +1,122 @@
 """Agent Routes"""
 
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session
 
-from src.database import get_session
+from src.database import get_db_session, get_read_session, DBSession
 from src.models.agent import Agent, AgentRead, AgentUpdate, AgentCreate, AgentChatUrlUpdate
-from src.models.user import User
-from src.core.dependencies import get_current_active_user
-from src.controllers.agent_controller import AgentController
-from src.core.responses import APIResponse, PaginatedResponse, MessageResponse
+from src.core.dependencies import get_current_user_id
+from src.controllers.agent_controller import AsyncAgentController
+from src.core.responses import APIResponse, PaginatedResponse, MessageResponse, ModelJSONResponse
 
 
 
 router = APIRouter()
 
 @router.get("/", response_model=PaginatedResponse[AgentRead])
-def get_agents(
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)],
+async def get_agents(
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)],
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    sessions_limit: int = Query(0, ge=0, le=50),
+    sessions_offset: int = Query(0, ge=0)
 ):
-    """Get list of agents."""
-    return AgentController.get_agents(session, user_id=current_user.id, skip=skip, limit=limit)
+    """
+    Get list of agents. Use `cursor` (from meta.pagination.next_cursor) for keyset pagination,
+    and sessions_limit to include each agent's most recent sessions.
+    """
+    return ModelJSONResponse(await AsyncAgentController.get_agents(
+        session,
+        user_id=current_user_id,
+        skip=skip,
+        limit=limit,
+        sessions_limit=sessions_limit,
+        sessions_offset=sessions_offset,
+        cursor=cursor
+    ))
 
 
 @router.post("/create-agent", response_model=APIResponse[AgentRead])
-def create_agent(
+async def create_agent(
     agent_create_data: AgentCreate,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)]
 ):
     """Create a new agent."""
-    return AgentController.create_agent(session, agent_create_data, current_user.id)
+    return ModelJSONResponse(await AsyncAgentController.create_agent(session, agent_create=agent_create_data, user_id=current_user_id))
 
 
 @router.get("/{agent_id}", response_model=APIResponse[AgentRead])
-def get_agent_by_id(
+async def get_agent_by_id(
     agent_id: int,
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[DBSession, Depends(get_read_session)],
+    sessions_limit: int = Query(0, ge=0, le=50),
+    sessions_offset: int = Query(0, ge=0)
 ):
-    """Get agent by ID (public endpoint)."""
-    return AgentController.get_agent_by_id(session, agent_id)
+    """Get agent by ID (public endpoint). Set sessions_limit to include recent sessions."""
+    return ModelJSONResponse(await AsyncAgentController.get_agent_by_id(
+        session,
+        agent_id=agent_id,
+        sessions_limit=sessions_limit,
+        sessions_offset=sessions_offset
+    ))
 
 
 @router.put("/{agent_id}", response_model=APIResponse[AgentRead])
-def update_agent(
+async def update_agent(
     agent_id: int,
     agent_update_data: AgentUpdate,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)]
 ):
     """Update agent by ID."""
-    return AgentController.update_agent(session, agent_id, agent_update_data)
+    return ModelJSONResponse(await AsyncAgentController.update_agent(session, agent_id=agent_id, agent_update=agent_update_data))
 
 
 @router.delete("/{agent_id}", response_model=MessageResponse)
-def delete_agent(
+async def delete_agent(
     agent_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)]
 ):
     """Delete agent by ID."""
-    return AgentController.delete_agent(session, agent_id)
+    return await AsyncAgentController.delete_agent(session, agent_id=agent_id)
 
 
 @router.get("/by-chat-url/{chat_url}", response_model=APIResponse[AgentRead])
-def get_agent_by_chat_url(
+async def get_agent_by_chat_url(
     chat_url: str,
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[DBSession, Depends(get_read_session)],
+    sessions_limit: int = Query(0, ge=0, le=50),
+    sessions_offset: int = Query(0, ge=0)
 ):
-    """Get agent by chat URL."""
-    return AgentController.get_agent_by_chat_url(session, chat_url)
+    """Get agent by chat URL. Set sessions_limit to include recent sessions."""
+    return ModelJSONResponse(await AsyncAgentController.get_agent_by_chat_url(
+        session,
+        chat_url=chat_url,
+        sessions_limit=sessions_limit,
+        sessions_offset=sessions_offset
+    ))
 
 
 @router.post("/{agent_id}/add-chat-url", response_model=APIResponse[AgentRead])
-def add_chat_url(
+async def add_chat_url(
     agent_id: int,
     chat_url_data: AgentChatUrlUpdate,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)]
 ):
     """Add chat URL to an agent."""
-    return AgentController.add_chat_url(session, agent_id, chat_url_data.chat_url, current_user.id)
+    return ModelJSONResponse(await AsyncAgentController.add_chat_url(session, agent_id=agent_id, chat_url=chat_url_data.chat_url, user_id=current_user_id))
 
 
 @router.delete("/{agent_id}/chat-url", response_model=APIResponse[AgentRead])
-def remove_chat_url(
+async def remove_chat_url(
     agent_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user_id: Annotated[int, Depends(get_current_user_id)]
 ):
     """Remove chat URL from an agent."""
-    return AgentController.remove_chat_url(session, agent_id, current_user.id)
\ No newline at end of file
+    return ModelJSONResponse(await AsyncAgentController.remove_chat_url(session, agent_id=agent_id, user_id=current_user_id))
\ No newline at end of file
@@ -1,16 +1,18 @@
 """
 Authentication routes - Route definitions for user authentication.
 """
-from typing import Annotated
-from fastapi import APIRouter, Depends, Form
-from sqlmodel import Session
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Form, Request
 from pydantic import BaseModel
 
-from src.database import get_session
-from src.models.user import User, UserRead
+from src.database import get_db_session, DBSession
+from src.models.user import UserRead
 from src.core.dependencies import get_current_active_user
-from src.controllers.auth_controller import AuthController
-from src.core.responses import APIResponse
+from src.core.types import Principal
+from src.controllers.auth_controller import AuthController, AsyncAuthController
+from src.core.responses import APIResponse, MessageResponse
+from src.core.config import FORWARDED_FOR_HEADER
+from src.core.rate_limit import forwarded_client_ip, login_throttle, trusted_proxies
 
 
 router = APIRouter()
@@ -36,12 +38,12 @@ class UserLogin(BaseModel):
 
 
 @router.post("/signup", response_model=APIResponse[UserRead])
-def signup(
+async def signup(
     user_data: UserSignup,
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[DBSession, Depends(get_db_session)]
 ):
     """Register a new user."""
-    return AuthController.create_user(
+    return await AsyncAuthController.create_user(
         session=session,
         name=user_data.name,
         email=user_data.email,
@@ -49,36 +51,58 @@ def signup(
     )
 
 
+def _client_ip(request: Request) -> Optional[str]:
+    """The client's IP, read from the forwarded-for header when a trusted proxy sent the request."""
+    peer = request.client.host if request.client else None
+    return forwarded_client_ip(peer, request.headers.get(FORWARDED_FOR_HEADER), trusted_proxies)
+
+
+async def _login(request: Request, session: DBSession, email: str, password: str) -> APIResponse[dict]:
+    """Authenticate under the login throttle: over-limit attempts are rejected before any
+    database or bcrypt work, and successful ones don't count against the limits."""
+    if login_throttle is None:
+        return await AsyncAuthController.authenticate_user(session=session, email=email, password=password)
+
+    client_ip = _client_ip(request)
+    await login_throttle.check(client_ip, email)
+    response = await AsyncAuthController.authenticate_user(session=session, email=email, password=password)
+    await login_throttle.succeeded(client_ip, email)
+    return response
+
+
 @router.post("/login", response_model=APIResponse[dict])
-def login(
+async def login(
+    request: Request,
     email: Annotated[str, Form()],
     password: Annotated[str, Form()],
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[DBSession, Depends(get_db_session)]
 ):
     """Authenticate user and return access token."""
-    return AuthController.authenticate_user(
-        session=session,
-        email=email,
-        password=password
-    )
+    return await _login(request, session, email, password)
 
 
 @router.post("/login-json", response_model=APIResponse[dict])
-def login_json(
+async def login_json(
+    request: Request,
     user_data: UserLogin,
-    session: Annotated[Session, Depends(get_session)]
+    session: Annotated[DBSession, Depends(get_db_session)]
 ):
     """Authenticate user with JSON payload and return access token."""
-    return AuthController.authenticate_user(
-        session=session,
-        email=user_data.email,
-        password=user_data.password
-    )
+    return await _login(request, session, user_data.email, user_data.password)
 
 
 @router.get("/me", response_model=APIResponse[UserRead])
-def get_current_user_profile(
-    current_user: Annotated[User, Depends(get_current_active_user)]
+async def get_current_user_profile(
+    current_user: Annotated[Principal, Depends(get_current_active_user)]
 ):
     """Get current user profile."""
     return AuthController.get_user_profile(current_user)
+
+
+@router.post("/revoke-tokens", response_model=MessageResponse)
+async def revoke_tokens(
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
+    session: DBSession = Depends(get_db_session)
+):
+    """Revoke all access tokens of the current user, including this one."""
+    return await AsyncAuthController.revoke_tokens(session, user_id=current_user.id)
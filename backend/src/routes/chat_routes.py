@@ -1,14 +1,19 @@
 """Chat Routes"""
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
-from typing import Annotated
-
-from src.database import get_session
-from src.models.user import User
-from src.core.dependencies import get_current_active_user
+from fastapi import APIRouter, Depends, Header, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from src.database import get_db_session, get_read_session, db_session, DBSession
+from src.core.dependencies import get_current_user_id
+from src.core.responses import ModelJSONResponse
+from src.core.config import SESSION_STREAM_KEEPALIVE_SECONDS
+from src.core.sse import SSE_HEADERS, event_stream, parse_event_id
+from src.database.broadcast import session_broadcaster
+from src.controllers.gateway_controller import ChatGateway
 from src.controllers.chat_controller import (
-    ChatController,
+    AsyncChatController,
     GetOrCreateSessionRequest,
     GetOrCreateSessionResponse,
     AppendFirstMessageRequest,
@@ -19,6 +24,8 @@ from src.controllers.chat_controller import (
     AppendAiMessageWithDataResponse,
     AppendUserMessageRequest,
     AppendUserMessageResponse,
+    AppendBatchRequest,
+    AppendBatchResponse,
     ConversationWithAgent,
     GetConversationsResponse,
     GetSessionDetailsRequest,
@@ -31,95 +38,182 @@ router = APIRouter()
 
 
 @router.post("/get-or-create-session", response_model=GetOrCreateSessionResponse)
-def get_or_create_session(
+async def get_or_create_session(
     request: GetOrCreateSessionRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_db_session)
 ):
     """Get existing session or create new customer and session."""
-    return ChatController.get_or_create_session(
+    return ModelJSONResponse(await AsyncChatController.get_or_create_session(
         session=session,
         agent_id=request.agent_id,
         customer_name=request.customer_name,
-        customer_email=request.customer_email
-    )
+        customer_email=request.customer_email,
+        message_limit=request.message_limit
+    ))
 
 
 @router.post("/append-first-message", response_model=AppendFirstMessageResponse)
-def append_first_message(
+async def append_first_message(
     request: AppendFirstMessageRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_db_session)
 ):
     """Append a message to an existing session (public endpoint)."""
-    return ChatController.append_first_message(
+    return ModelJSONResponse(await AsyncChatController.append_first_message(
         session=session,
         sender=request.sender,
         receiver=request.receiver,
         content=request.content,
         session_id=request.session_id
-    )
+    ))
 
 
 @router.post("/append-ai-message-with-data", response_model=AppendAiMessageWithDataResponse)
-def append_ai_message_with_data(
+async def append_ai_message_with_data(
     request: AppendAiMessageWithDataRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_db_session)
 ):
     """Append an AI message and collected data to an existing session (public endpoint)."""
-    return ChatController.append_ai_message_with_data(
+    return ModelJSONResponse(await AsyncChatController.append_ai_message_with_data(
         session=session,
         content=request.content,
         session_id=request.session_id,
         collected_data=request.collected_data,
         session_closed=request.session_closed
-    )
+    ))
+
+
+@router.post("/append-batch", response_model=AppendBatchResponse)
+async def append_batch(
+    request: AppendBatchRequest,
+    session: DBSession = Depends(get_db_session)
+):
+    """Append messages and collected data, and close sessions, in one transaction (public endpoint)."""
+    return ModelJSONResponse(await AsyncChatController.append_batch(
+        session=session,
+        messages=request.messages,
+        collected_data=request.collected_data,
+        close_session_ids=request.close_session_ids
+    ))
 
 
 @router.post("/append-ai-message", response_model=AppendAiMessageResponse)
-def append_ai_message(
+async def append_ai_message(
     request: AppendAiMessageRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_db_session)
 ):
     """Append an AI message to an existing session (public endpoint)."""
-    return ChatController.append_ai_message(
+    return ModelJSONResponse(await AsyncChatController.append_ai_message(
         session=session,
         content=request.content,
         session_id=request.session_id,
         session_closed=request.session_closed
-    )
+    ))
 
 
 @router.post("/append-user-message", response_model=AppendUserMessageResponse)
-def append_user_message(
+async def append_user_message(
     request: AppendUserMessageRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_db_session)
 ):
     """Append a user message to an existing session (public endpoint)."""
-    return ChatController.append_user_message(
+    return ModelJSONResponse(await AsyncChatController.append_user_message(
         session=session,
         content=request.content,
         session_id=request.session_id
-    )
+    ))
 
 
 @router.get("/get-conversations", response_model=GetConversationsResponse)
-def get_conversations(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    session: Session = Depends(get_session)
+async def get_conversations(
+    current_user_id: Annotated[int, Depends(get_current_user_id)],
+    session: DBSession = Depends(get_read_session),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    sort_by: Literal["created_at", "started_at", "updated_at", "customer_name", "customer_email"] = Query("created_at"),
+    sort_order: Literal["asc", "desc"] = Query("desc"),
+    agent_id: Optional[int] = Query(None),
+    session_closed: Optional[bool] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    customer_email: Optional[str] = Query(None)
 ):
-    """Get all chat sessions for the current user's agents (authenticated endpoint)."""
-    return ChatController.get_conversations(
+    """
+    Get chat sessions for the current user's agents (authenticated endpoint).
+    Supports filtering, sorting and pagination; use `cursor` (from meta.pagination.next_cursor)
+    for keyset pagination when sorting by created_at.
+    """
+    return ModelJSONResponse(await AsyncChatController.get_conversations(
         session=session,
-        user_id=current_user.id
-    )
+        user_id=current_user_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        agent_id=agent_id,
+        session_closed=session_closed,
+        date_from=date_from,
+        date_to=date_to,
+        customer_email=customer_email
+    ))
 
 
 @router.post("/get-session-details", response_model=GetSessionDetailsResponse)
-def get_session_details(
+async def get_session_details(
     request: GetSessionDetailsRequest,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_read_session)
 ):
-    """Get all messages and collected data for a specific session (public endpoint)."""
-    return ChatController.get_session_details(
+    """Get messages and collected data for a specific session, optionally windowed (public endpoint)."""
+    return ModelJSONResponse(await AsyncChatController.get_session_details(
         session=session,
-        session_id=request.session_id
+        session_id=request.session_id,
+        message_limit=request.message_limit,
+        before_id=request.before_id,
+        after_id=request.after_id
+    ))
+
+
+@router.get("/session-events/{session_id}")
+async def session_events(
+    session_id: int,
+    last_event_id: Optional[str] = Header(None),
+    after: Optional[str] = Query(None)
+):
+    """
+    Stream new messages and collected data of a session as Server-Sent Events (public endpoint).
+
+    Events are `message` and `collected_data`, with the row as JSON. Reconnecting clients
+    send `Last-Event-ID` (or `after`, for a first connection) to replay what they missed.
+    The database is only used for that replay, through a session closed before streaming:
+    a dependency session would hold a pooled connection for the life of the stream.
+    """
+    # Subscribe before the replay query so nothing committed in between is lost
+    subscription = session_broadcaster.subscribe(session_id)
+    try:
+        async with db_session() as session:
+            cursor, backlog = await AsyncChatController.get_stream_backlog(
+                session,
+                session_id=session_id,
+                after=parse_event_id(last_event_id or after)
+            )
+    except BaseException:
+        session_broadcaster.unsubscribe(subscription)
+        raise
+
+    return StreamingResponse(
+        event_stream(subscription, cursor, backlog, SESSION_STREAM_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
     )
+
+
+@router.websocket("/ws/{session_id}")
+async def chat_gateway(websocket: WebSocket, session_id: int):
+    """
+    Chat over a WebSocket (public endpoint).
+
+    Each `{"type": "message", "content": ...}` frame is stored, sent to the agent's
+    webhook, and answered with an `ack` frame and then a `reply` frame.
+    """
+    await ChatGateway(websocket, session_id).run()
@@ -0,0 +1,85 @@
+"""
+Internal routes - Operational endpoints for monitoring the running worker.
+"""
+from fastapi import APIRouter, Depends
+
+from src.database import get_pool_stats
+from src.database.group_commit import message_buffer
+from src.database.pubsub import invalidation_bus
+from src.database.broadcast import session_broadcaster
+from src.core.cache import agent_cache, principal_cache
+from src.core.auth import password_hasher
+from src.core.rate_limit import login_throttle
+from src.core.webhooks import webhook_dispatcher
+from src.core.dependencies import require_internal_access
+from src.core.responses import APIResponse, success_response
+
+
+router = APIRouter(dependencies=[Depends(require_internal_access)])
+
+
+@router.get("/pool-stats", response_model=APIResponse[dict])
+async def pool_stats():
+    """Get connection pool usage for this worker process."""
+    return success_response(
+        data=get_pool_stats(),
+        message="Pool statistics retrieved successfully"
+    )
+
+
+@router.get("/group-commit-stats", response_model=APIResponse[dict])
+async def group_commit_stats():
+    """Get write-behind group commit counters for this worker process."""
+    return success_response(
+        data=message_buffer.stats(),
+        message="Group commit statistics retrieved successfully"
+    )
+
+
+@router.get("/cache-stats", response_model=APIResponse[dict])
+async def cache_stats():
+    """Get in-process cache sizes and hit rates for this worker process."""
+    return success_response(
+        data={
+            "agents": agent_cache.stats(),
+            "principals": principal_cache.stats(),
+            "invalidation": invalidation_bus.stats(),
+        },
+        message="Cache statistics retrieved successfully"
+    )
+
+
+@router.get("/password-hasher-stats", response_model=APIResponse[dict])
+async def password_hasher_stats():
+    """Get bcrypt worker pool queue depth and timings for this worker process."""
+    return success_response(
+        data=password_hasher.stats(),
+        message="Password hasher statistics retrieved successfully"
+    )
+
+
+@router.get("/rate-limit-stats", response_model=APIResponse[dict])
+async def rate_limit_stats():
+    """Get login throttling counters for this worker process."""
+    return success_response(
+        data=login_throttle.stats() if login_throttle is not None else {"enabled": False},
+        message="Rate limit statistics retrieved successfully"
+    )
+
+
+@router.get("/stream-stats", response_model=APIResponse[dict])
+async def stream_stats():
+    """Get live session stream counters for this worker process."""
+    return success_response(
+        data=session_broadcaster.stats(),
+        message="Stream statistics retrieved successfully"
+    )
+
+
+@router.get("/webhook-stats", response_model=APIResponse[dict])
+async def webhook_stats():
+    """Get agent webhook client counters for this worker process."""
+    return success_response(
+        data=webhook_dispatcher.stats(),
+        message="Webhook statistics retrieved successfully"
+    )
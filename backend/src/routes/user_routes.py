@@ -1,14 +1,14 @@
 """
 User routes - Route definitions for user management.
 """
-from typing import Annotated, List
+from typing import Annotated, Optional, List
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session
 
-from src.database import get_session
-from src.models.user import User, UserRead, UserUpdate
+from src.database import get_db_session, get_read_session, DBSession
+from src.models.user import UserRead, UserUpdate
 from src.core.dependencies import get_current_active_user
-from src.controllers.user_controller import UserController
+from src.core.types import Principal
+from src.controllers.user_controller import AsyncUserController
 from src.core.responses import APIResponse, PaginatedResponse, MessageResponse
 
 
@@ -16,42 +16,43 @@ router = APIRouter()
 
 
 @router.get("/", response_model=PaginatedResponse[UserRead])
-def get_users(
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)],
+async def get_users(
+    session: Annotated[DBSession, Depends(get_read_session)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ):
-    """Get list of users."""
-    return UserController.get_users(session, skip=skip, limit=limit)
+    """Get list of users. Use `cursor` (from meta.pagination.next_cursor) for keyset pagination."""
+    return await AsyncUserController.get_users(session, skip=skip, limit=limit, cursor=cursor)
 
 
 @router.get("/{user_id}", response_model=APIResponse[UserRead])
-def get_user(
+async def get_user(
     user_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)]
 ):
     """Get user by ID."""
-    return UserController.get_user_by_id(session, user_id)
+    return await AsyncUserController.get_user_by_id(session, user_id=user_id)
 
 
 @router.put("/{user_id}", response_model=APIResponse[UserRead])
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)]
 ):
     """Update user information."""
-    return UserController.update_user(session, user_id, user_update)
+    return await AsyncUserController.update_user(session, user_id=user_id, user_update=user_update)
 
 
 @router.delete("/{user_id}", response_model=MessageResponse)
-def delete_user(
+async def delete_user(
     user_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    session: Annotated[DBSession, Depends(get_db_session)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)]
 ):
     """Delete user."""
-    return UserController.delete_user(session, user_id)
+    return await AsyncUserController.delete_user(session, user_id=user_id)
@@ -0,0 +1,87 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database.
+
+Settings are read from the environment when `src` is first imported, so they are set
+here before any test module imports the application.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+
+_db_dir = tempfile.mkdtemp(prefix="captor-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_db_dir}/test.db",
+    "DEBUG": "false",
+    "INTERNAL_API_TOKEN": "test-token",
+    "BCRYPT_ROUNDS": "4",
+    "LOGIN_RATE_LIMIT_ENABLED": "false",
+    # Measure the database, not the response cache
+    "AGENT_CACHE_TTL_SECONDS": "0",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.database import engine
+from src.main import app
+
+INTERNAL_HEADERS = {"X-Internal-Token": "test-token"}
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client: TestClient) -> dict:
+    """Sign up a fresh user and return its Authorization header."""
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/api/auth/signup", json={"name": "Test", "email": email, "password": "password1"})
+    assert response.status_code == 200, response.text
+    response = client.post("/api/auth/login-json", json={"email": email, "password": "password1"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def create_agent(client: TestClient, headers: dict, name: str = "agent", fields: int = 2) -> dict:
+    response = client.post("/api/agents/create-agent", headers=headers, json={
+        "name": name,
+        "type": "qa",
+        "agent_data_fields": [{"question": f"q{i}", "data_type": "string"} for i in range(fields)],
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+@pytest.fixture
+def agent(client: TestClient, auth_headers: dict) -> dict:
+    return create_agent(client, auth_headers)
+
+
+@pytest.fixture
+def chat_session(client: TestClient, agent: dict) -> dict:
+    response = client.post("/api/chat/get-or-create-session", json={
+        "agent_id": agent["id"], "customer_name": "Customer", "customer_email": "customer@example.com"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["session"]
+
+
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    """Collect the SQL statements executed on the primary engine inside the block."""
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
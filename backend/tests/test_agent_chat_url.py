@@ -0,0 +1,73 @@
+"""Chat URLs are unique across agents."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.controllers.agent_controller import AgentController
+from tests.conftest import create_agent
+
+
+def test_chat_url_taken_by_another_agent_is_rejected(client, auth_headers):
+    first = create_agent(client, auth_headers, "first")
+    second = create_agent(client, auth_headers, "second")
+    assert client.post(
+        f"/api/agents/{first['id']}/add-chat-url", headers=auth_headers, json={"chat_url": "taken"}
+    ).status_code == 200
+
+    response = client.post(f"/api/agents/{second['id']}/add-chat-url", headers=auth_headers, json={"chat_url": "taken"})
+    assert response.status_code == 400
+
+
+def test_unique_index_violation_is_a_conflict(client, auth_headers):
+    # update-agent has no pre-check, like two add-chat-url calls racing past theirs
+    first = create_agent(client, auth_headers, "first")
+    second = create_agent(client, auth_headers, "second")
+    client.post(f"/api/agents/{first['id']}/add-chat-url", headers=auth_headers, json={"chat_url": "raced"})
+
+    response = client.put(f"/api/agents/{second['id']}", headers=auth_headers, json={"chat_url": "raced"})
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"] == "Chat URL is already in use by another agent"
+
+    # The session was rolled back and the agent is unchanged
+    assert client.get(f"/api/agents/{second['id']}").json()["data"]["chat_url"] is None
+    assert client.get("/api/agents/by-chat-url/raced").json()["data"]["id"] == first["id"]
+
+
+class PostgresError(Exception):
+    def __init__(self, constraint_name: str):
+        super().__init__(f"duplicate key value violates unique constraint \"{constraint_name}\"")
+        self.diag = SimpleNamespace(constraint_name=constraint_name)
+
+
+class FailingSession:
+    def __init__(self, orig: Exception):
+        self.orig = orig
+        self.rolled_back = False
+
+    def commit(self):
+        raise IntegrityError("UPDATE agents ...", {}, self.orig)
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.mark.parametrize("orig", [
+    Exception("NOT NULL constraint failed: agents.name"),
+    Exception("FOREIGN KEY constraint failed"),
+    PostgresError("agents_user_id_fkey"),
+])
+def test_other_integrity_errors_are_not_reported_as_chat_url_conflicts(orig):
+    session = FailingSession(orig)
+
+    with pytest.raises(IntegrityError):
+        AgentController._commit_agent(session)
+    assert session.rolled_back
+
+
+@pytest.mark.parametrize("orig", [
+    Exception("UNIQUE constraint failed: agents.chat_url"),
+    PostgresError("ux_agents_chat_url"),
+])
+def test_chat_url_violation_is_recognised_on_each_backend(orig):
+    assert AgentController._violates_chat_url_index(IntegrityError("UPDATE agents ...", {}, orig))
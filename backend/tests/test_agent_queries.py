@@ -0,0 +1,78 @@
+"""Statement counts of the agent endpoints must not grow with the number of agents, schemas or fields."""
+from tests.conftest import count_statements, create_agent
+
+
+def test_agent_list_statements_do_not_grow_with_agents(client, auth_headers):
+    create_agent(client, auth_headers, "first")
+    with count_statements() as one_agent:
+        response = client.get("/api/agents/", headers=auth_headers)
+    assert response.status_code == 200 and len(response.json()["data"]) == 1
+
+    for i in range(5):
+        create_agent(client, auth_headers, f"agent-{i}", fields=i + 1)
+    with count_statements() as six_agents:
+        response = client.get("/api/agents/", headers=auth_headers)
+    assert response.status_code == 200 and len(response.json()["data"]) == 6
+
+    assert len(six_agents) == len(one_agent), six_agents
+
+
+def test_agent_list_with_recent_sessions_statements_do_not_grow(client, auth_headers):
+    agents = [create_agent(client, auth_headers, f"agent-{i}") for i in range(3)]
+    for agent in agents:
+        for n in range(3):
+            client.post("/api/chat/get-or-create-session", json={
+                "agent_id": agent["id"], "customer_name": "C", "customer_email": f"c{n}@example.com"
+            })
+
+    with count_statements() as statements:
+        response = client.get("/api/agents/", headers=auth_headers, params={"sessions_limit": 2})
+    assert response.status_code == 200
+    assert all(len(agent["recent_sessions"]) == 2 for agent in response.json()["data"])
+
+    create_agent(client, auth_headers, "one-more")
+    with count_statements() as more:
+        client.get("/api/agents/", headers=auth_headers, params={"sessions_limit": 2})
+    assert len(more) == len(statements), more
+
+
+def test_agent_detail_statements_do_not_grow_with_fields(client, auth_headers):
+    small = create_agent(client, auth_headers, "small", fields=1)
+    large = create_agent(client, auth_headers, "large", fields=12)
+
+    with count_statements() as small_statements:
+        assert client.get(f"/api/agents/{small['id']}").status_code == 200
+    with count_statements() as large_statements:
+        response = client.get(f"/api/agents/{large['id']}")
+    assert response.status_code == 200
+    assert len(response.json()["data"]["data_schemas"][0]["fields"]) == 12
+
+    assert len(large_statements) == len(small_statements) <= 4, large_statements
+
+
+def test_cached_agent_has_current_session_counts(client, auth_headers, monkeypatch):
+    from src.core.cache import agent_cache
+
+    monkeypatch.setattr(agent_cache, "ttl_seconds", 60)
+    agent = create_agent(client, auth_headers)
+    client.post(f"/api/agents/{agent['id']}/add-chat-url", headers=auth_headers, json={"chat_url": "counted"})
+    try:
+        # Both lookups are cached while the agent has no sessions
+        assert client.get(f"/api/agents/{agent['id']}").json()["data"]["chat_session_count"] == 0
+        assert client.get("/api/agents/by-chat-url/counted").json()["data"]["chat_session_count"] == 0
+
+        chat_session = client.post("/api/chat/get-or-create-session", json={
+            "agent_id": agent["id"], "customer_name": "C", "customer_email": "counted@example.com"
+        }).json()["session"]
+        hits = agent_cache.hits
+        data = client.get(f"/api/agents/{agent['id']}").json()["data"]
+        assert agent_cache.hits == hits + 1
+        assert (data["chat_session_count"], data["open_session_count"]) == (1, 1)
+
+        client.post("/api/chat/append-ai-message", json={
+            "session_id": chat_session["id"], "content": "bye", "session_closed": True
+        })
+        data = client.get("/api/agents/by-chat-url/counted").json()["data"]
+        assert (data["chat_session_count"], data["open_session_count"]) == (1, 0)
+    finally:
+        agent_cache.clear()
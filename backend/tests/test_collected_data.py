@@ -0,0 +1,38 @@
+"""
+Collected data is only written to the session the request is for.
+"""
+from tests.conftest import create_agent
+
+
+def session_details(client, session_id: int) -> dict:
+    return client.post("/api/chat/get-session-details", json={"session_id": session_id}).json()
+
+
+def test_item_for_another_session_is_rejected(client, auth_headers, agent, chat_session):
+    # A session of another agent, and a field of that agent: valid together, but not here
+    other_agent = create_agent(client, auth_headers, "other")
+    other_session = client.post("/api/chat/get-or-create-session", json={
+        "agent_id": other_agent["id"], "customer_name": "Other", "customer_email": "other@example.com"
+    }).json()["session"]
+    other_field_id = other_agent["data_schemas"][0]["fields"][0]["id"]
+
+    response = client.post("/api/chat/append-ai-message-with-data", json={
+        "session_id": chat_session["id"], "content": "noted",
+        "collected_data": [{"session_id": other_session["id"], "field_id": other_field_id, "answer": "injected"}]
+    })
+
+    assert response.status_code == 400, response.text
+    assert session_details(client, other_session["id"])["collected_data"] == []
+    assert session_details(client, chat_session["id"])["messages"] == []
+
+
+def test_item_for_the_request_session_is_stored(client, agent, chat_session):
+    field_id = agent["data_schemas"][0]["fields"][0]["id"]
+
+    response = client.post("/api/chat/append-ai-message-with-data", json={
+        "session_id": chat_session["id"], "content": "noted",
+        "collected_data": [{"session_id": chat_session["id"], "field_id": field_id, "answer": "yes"}]
+    })
+
+    assert response.status_code == 200, response.text
+    assert [data["answer"] for data in session_details(client, chat_session["id"])["collected_data"]] == ["yes"]
@@ -0,0 +1,27 @@
+"""Conversation list pagination, as walked by the dashboard."""
+from tests.conftest import create_agent
+
+
+def test_following_next_cursor_returns_every_conversation(client, auth_headers):
+    agent = create_agent(client, auth_headers)
+    created = set()
+    for n in range(7):
+        response = client.post("/api/chat/get-or-create-session", json={
+            "agent_id": agent["id"], "customer_name": "C", "customer_email": f"c{n}@example.com"
+        })
+        created.add(response.json()["session"]["id"])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/chat/get-conversations", headers=auth_headers, params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen += [conversation["id"] for conversation in body["conversations"]]
+        pages += 1
+        cursor = body["meta"]["pagination"]["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) and set(seen) == created
@@ -0,0 +1,56 @@
+"""
+get-or-create-session: one session per customer however the first visits interleave, and
+a returning customer's history read in one query.
+"""
+from sqlmodel import Session, func, select
+
+from src.controllers.chat_controller import ChatController
+from src.database import engine
+from src.models.chat import ChatSession
+from src.models.customer import Customer
+from tests.conftest import count_statements
+
+
+def test_first_visit_racing_past_the_lookup_reuses_the_session(client, agent):
+    payload = {"agent_id": agent["id"], "customer_name": "Racer", "customer_email": "racer@example.com"}
+    first = client.post("/api/chat/get-or-create-session", json=payload).json()
+
+    # A second request that read "no session" before the first one committed
+    with Session(engine) as session:
+        customer = session.get(Customer, first["customer"]["id"])
+        chat_session, created = ChatController._insert_session(session, agent["id"], customer)
+        session_id = chat_session.id
+        session.commit()
+        count = session.exec(
+            select(func.count(ChatSession.id)).where(ChatSession.customer_email == "racer@example.com")
+        ).one()
+
+    assert not created
+    assert session_id == first["session"]["id"]
+    assert count == 1
+
+
+def test_returning_customer_history_is_one_read(client, agent, chat_session):
+    field_id = agent["data_schemas"][0]["fields"][0]["id"]
+    for n in range(5):
+        client.post("/api/chat/append-user-message", json={"session_id": chat_session["id"], "content": f"m{n}"})
+    client.post("/api/chat/append-ai-message-with-data", json={
+        "session_id": chat_session["id"], "content": "noted",
+        "collected_data": [{"session_id": chat_session["id"], "field_id": field_id, "answer": "yes"}]
+    })
+
+    payload = {
+        "agent_id": agent["id"], "customer_name": "Customer", "customer_email": "customer@example.com",
+        "message_limit": 3
+    }
+    with count_statements() as statements:
+        response = client.post("/api/chat/get-or-create-session", json=payload)
+    body = response.json()
+
+    assert response.status_code == 200, response.text
+    assert not body["is_new_session"]
+    assert [message["content"] for message in body["messages"]] == ["m3", "m4", "noted"]
+    assert body["has_more_messages"]
+    assert [(data["field_id"], data["answer"]) for data in body["collected_data"]] == [(field_id, "yes")]
+    # Customer and session lookup, then messages and collected data together
+    assert len([statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]) == 2
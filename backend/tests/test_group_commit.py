@@ -0,0 +1,89 @@
+"""
+Group commit buffer: acknowledged messages are committed, in order, and one bad row only
+fails its own request.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.database.group_commit import MessageWriteBuffer
+from src.models.chat import Message
+
+
+def run(coro):
+    # A hung flusher fails the test instead of blocking the run
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def stored_messages(session_id: int) -> list:
+    with Session(engine) as session:
+        return session.exec(
+            select(Message).where(Message.session_id == session_id).order_by(Message.created_at, Message.id)
+        ).all()
+
+
+def test_stop_flushes_a_message_queued_at_shutdown(chat_session):
+    async def scenario():
+        buffer = MessageWriteBuffer(max_delay_ms=50, max_rows=100)
+        buffer.start()
+        submitted = asyncio.create_task(buffer.submit(chat_session["id"], "User", "Assistant", "last words"))
+        await asyncio.sleep(0)
+        await buffer.stop()
+        return await submitted
+
+    message = run(scenario())
+
+    assert [row.id for row in stored_messages(chat_session["id"])] == [message.id]
+
+
+def test_messages_commit_in_submission_order(chat_session):
+    async def scenario():
+        # 40 messages over batches of at most 7
+        buffer = MessageWriteBuffer(max_delay_ms=5, max_rows=7)
+        buffer.start()
+        try:
+            return await asyncio.gather(*[
+                buffer.submit(chat_session["id"], "User", "Assistant", f"message {i}") for i in range(40)
+            ])
+        finally:
+            await buffer.stop()
+
+    acknowledged = run(scenario())
+
+    stored = stored_messages(chat_session["id"])
+    assert [row.content for row in stored] == [f"message {i}" for i in range(40)]
+    assert [row.id for row in stored] == [message.id for message in acknowledged]
+
+
+def test_rejected_row_fails_only_its_request(chat_session):
+    async def scenario():
+        buffer = MessageWriteBuffer(max_delay_ms=20, max_rows=100)
+        buffer.start()
+        try:
+            # content is NOT NULL, so the middle message violates a constraint
+            return await asyncio.gather(*[
+                buffer.submit(chat_session["id"], "User", "Assistant", None if i == 5 else f"message {i}")
+                for i in range(10)
+            ], return_exceptions=True), buffer.stats()
+        finally:
+            await buffer.stop()
+
+    results, stats = run(scenario())
+
+    assert isinstance(results[5], IntegrityError)
+    assert all(not isinstance(result, Exception) for i, result in enumerate(results) if i != 5)
+    assert [row.content for row in stored_messages(chat_session["id"])] == [
+        f"message {i}" for i in range(10) if i != 5
+    ]
+    assert stats["row_failures"] == 1
+    assert stats["failures"] == 0
+
+
+def test_submit_requires_a_running_buffer(chat_session):
+    buffer = MessageWriteBuffer(max_delay_ms=5, max_rows=10)
+
+    with pytest.raises(RuntimeError):
+        run(buffer.submit(chat_session["id"], "User", "Assistant", "hello"))
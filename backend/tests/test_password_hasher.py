@@ -0,0 +1,84 @@
+"""
+Password hasher queue accounting: callers that give up must not keep their queue slot,
+and requests that will fail anyway don't queue for it.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.controllers import auth_controller
+from src.core.auth import PasswordHasher
+
+
+def test_abandoned_calls_release_their_queue_slot():
+    hasher = PasswordHasher(workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def scenario():
+        # Occupy the only worker, then let two queued callers time out
+        blocker = asyncio.create_task(hasher._run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(hasher._run(lambda: "late"), timeout=0.05)
+        assert hasher.stats()["queued"] == 0
+
+        release.set()
+        await blocker
+        # Both slots are free again
+        return await asyncio.gather(hasher._run(lambda: "a"), hasher._run(lambda: "b"))
+
+    try:
+        assert asyncio.run(scenario()) == ["a", "b"]
+        stats = hasher.stats()
+        assert stats["queued"] == 0
+        assert stats["running"] == 0
+        assert stats["rejected"] == 0
+        # The abandoned calls were never run
+        assert stats["completed"] == 3
+    finally:
+        hasher.shutdown()
+
+
+def test_full_queue_is_refused():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        # One call running and one waiting fill the worker and the queue
+        blocker = asyncio.create_task(hasher._run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(hasher._run(lambda: None))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as refused:
+            await hasher._run(lambda: None)
+        release.set()
+        await asyncio.gather(blocker, queued)
+        return refused.value
+
+    try:
+        refused = asyncio.run(scenario())
+        assert refused.status_code == 503
+        assert refused.headers == {"Retry-After": "1"}
+    finally:
+        hasher.shutdown()
+
+
+def test_signup_with_a_taken_email_does_not_hash(client, monkeypatch):
+    payload = {"name": "Taken", "email": "taken@example.com", "password": "password1"}
+    assert client.post("/api/auth/signup", json=payload).status_code == 200
+
+    hashed = []
+
+    async def hash_password(password):
+        hashed.append(password)
+        return "unused"
+
+    monkeypatch.setattr(auth_controller.password_hasher, "hash", hash_password)
+    response = client.post("/api/auth/signup", json=payload)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    assert hashed == []
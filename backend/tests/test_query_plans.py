@@ -0,0 +1,103 @@
+"""
+Query plans of the hot lookups: the statements the endpoints actually run are captured
+and re-run under EXPLAIN QUERY PLAN, so a dropped index or a rewritten query that can no
+longer use one fails here rather than in production.
+"""
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import event
+
+from src.database import engine
+from tests.conftest import create_agent
+
+# A full pass over one of the application tables
+FULL_SCAN = re.compile(r"\bSCAN (agents|chat_sessions|messages|customers|collected_data)\b")
+# A sort the query could have read in index order instead
+TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY")
+
+
+@contextmanager
+def capture_queries() -> Iterator[List[Tuple[str, tuple]]]:
+    queries: List[Tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append((statement, parameters))
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+
+def query_plans(queries: List[Tuple[str, tuple]], marker: str = "") -> List[str]:
+    """EXPLAIN QUERY PLAN of every captured statement containing `marker`, one line per statement."""
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in queries:
+            if marker in statement:
+                rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                plans.append(" | ".join(row[-1] for row in rows))
+    assert plans, f"no captured statement contains {marker!r}"
+    return plans
+
+
+def assert_no_full_scans(queries: List[Tuple[str, tuple]]) -> None:
+    for plan in query_plans(queries):
+        assert not FULL_SCAN.search(plan), plan
+        assert not TEMP_SORT.search(plan), plan
+
+
+def test_agent_by_chat_url_uses_unique_index(client, auth_headers, agent):
+    client.post(f"/api/agents/{agent['id']}/add-chat-url", headers=auth_headers, json={"chat_url": "plan-url"})
+    with capture_queries() as queries:
+        assert client.get("/api/agents/by-chat-url/plan-url").status_code == 200
+
+    assert "USING INDEX ux_agents_chat_url" in query_plans(queries, "WHERE agents.chat_url")[0]
+    assert_no_full_scans(queries)
+
+
+def test_agent_list_uses_user_and_session_indexes(client, auth_headers):
+    agent = create_agent(client, auth_headers)
+    client.post("/api/chat/get-or-create-session", json={
+        "agent_id": agent["id"], "customer_name": "C", "customer_email": "c@example.com"
+    })
+    with capture_queries() as queries:
+        response = client.get("/api/agents/", headers=auth_headers, params={"sessions_limit": 2})
+    assert response.status_code == 200
+
+    assert all("ix_agents_user_id_created_at_id" in plan for plan in query_plans(queries, "WHERE agents.user_id"))
+    assert all(
+        "ix_chat_sessions_agent_id_created_at_id" in plan
+        for plan in query_plans(queries, "FROM chat_sessions")
+    )
+    assert_no_full_scans(queries)
+
+
+def test_get_or_create_session_uses_customer_and_session_indexes(client, agent):
+    payload = {"agent_id": agent["id"], "customer_name": "C", "customer_email": "plan@example.com"}
+    client.post("/api/chat/get-or-create-session", json=payload)
+    with capture_queries() as queries:
+        assert client.post("/api/chat/get-or-create-session", json=payload).status_code == 200
+
+    plans = " ".join(query_plans(queries))
+    assert "USING INDEX ux_customers_agent_id_email" in plans
+    assert "USING INDEX ux_chat_sessions_agent_id_customer" in plans
+    assert "USING INDEX ix_collected_data_session_id_created_at" in plans
+    assert_no_full_scans(queries)
+
+
+def test_session_details_reads_messages_by_index(client, chat_session):
+    for n in range(3):
+        client.post("/api/chat/append-user-message", json={"content": f"m{n}", "session_id": chat_session["id"]})
+    with capture_queries() as queries:
+        assert client.post("/api/chat/get-session-details", json={"session_id": chat_session["id"]}).status_code == 200
+
+    assert all(
+        "ix_messages_session_id_created_at_id" in plan
+        for plan in query_plans(queries, "FROM messages")
+    )
+    assert_no_full_scans(queries)
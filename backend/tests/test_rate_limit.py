@@ -0,0 +1,133 @@
+"""
+Login rate limiting: bucket stores, the client IP behind trusted proxies, and the login
+routes charging only failed attempts.
+"""
+import asyncio
+import logging
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.rate_limit import (
+    InMemoryBucketStore,
+    LoginThrottle,
+    RedisBucketStore,
+    forwarded_client_ip,
+    parse_trusted_proxies,
+)
+from src.main import app
+from src.routes import auth_routes
+
+
+def test_in_memory_bucket_refuses_after_burst():
+    store = InMemoryBucketStore()
+
+    async def scenario():
+        return [await store.take("ip:1", 3, 1 / 60) for _ in range(4)]
+
+    delays = asyncio.run(scenario())
+
+    assert delays[:3] == [0, 0, 0]
+    assert 0 < delays[3] <= 60
+
+
+def test_unreachable_redis_logs_once_and_backs_off(caplog):
+    pytest.importorskip("redis")
+    # Nothing listens on port 1
+    store = RedisBucketStore("redis://127.0.0.1:1/0", retry_seconds=60)
+    tries = []
+    original = store._take
+
+    async def take(*args, **kwargs):
+        tries.append(1)
+        return await original(*args, **kwargs)
+
+    store._take = take
+
+    async def scenario():
+        return [await store.take("ip:1", 5, 1) for _ in range(10)]
+
+    with caplog.at_level(logging.WARNING, logger="src.core.rate_limit"):
+        delays = asyncio.run(scenario())
+
+    # Local buckets took over, and Redis was only tried once within the retry interval
+    assert delays == [0] * 5 + [pytest.approx(1, abs=0.1)] * 5
+    assert len(tries) == 1
+    assert not store.available
+    warnings = [record for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert warnings[0].exc_info is None
+
+
+def test_given_back_token_can_be_taken_again():
+    store = InMemoryBucketStore()
+
+    async def scenario():
+        delays = [await store.take("email:a", 2, 1 / 60) for _ in range(2)]
+        await store.give_back("email:a", 2)
+        await store.give_back("email:unknown", 2)
+        return delays + [await store.take("email:a", 2, 1 / 60), await store.take("email:a", 2, 1 / 60)]
+
+    delays = asyncio.run(scenario())
+
+    assert delays[:3] == [0, 0, 0]
+    assert delays[3] > 0
+
+
+PROXIES = parse_trusted_proxies(["10.0.0.0/8", "192.0.2.7"])
+
+
+@pytest.mark.parametrize("peer, forwarded_for, client_ip", [
+    # Direct clients can't choose their address with the header
+    ("203.0.113.9", "198.51.100.1", "203.0.113.9"),
+    ("10.0.0.2", None, "10.0.0.2"),
+    ("10.0.0.2", "198.51.100.1", "198.51.100.1"),
+    # Entries added by the client itself, left of the real one, are ignored
+    ("10.0.0.2", "1.2.3.4, 198.51.100.1", "198.51.100.1"),
+    # Chained proxies are skipped from the right
+    ("10.0.0.2", "198.51.100.1, 192.0.2.7, 10.1.1.1", "198.51.100.1"),
+    ("10.0.0.2", "10.1.1.1, 192.0.2.7", "10.1.1.1"),
+    ("testclient", "198.51.100.1", "testclient"),
+])
+def test_client_ip_is_forwarded_only_by_trusted_proxies(peer, forwarded_for, client_ip):
+    assert forwarded_client_ip(peer, forwarded_for, PROXIES) == client_ip
+
+
+@pytest.fixture
+def throttled(client, monkeypatch) -> LoginThrottle:
+    """Login throttle of 2 attempts per IP and 3 per email, with 10.0.0.0/8 as the proxy."""
+    throttle = LoginThrottle(InMemoryBucketStore(), 2, 1 / 60, 3, 1 / 60)
+    monkeypatch.setattr(auth_routes, "login_throttle", throttle)
+    monkeypatch.setattr(auth_routes, "trusted_proxies", parse_trusted_proxies(["10.0.0.0/8"]))
+    return throttle
+
+
+def signup(client) -> dict:
+    user = {"name": "Throttled", "email": f"{uuid.uuid4().hex}@example.com", "password": "password1"}
+    assert client.post("/api/auth/signup", json=user).status_code == 200
+    return user
+
+
+def test_successful_logins_are_not_charged(client, throttled):
+    user = signup(client)
+    credentials = {"email": user["email"], "password": user["password"]}
+
+    assert [client.post("/api/auth/login-json", json=credentials).status_code for _ in range(5)] == [200] * 5
+
+    wrong = {"email": user["email"], "password": "wrong"}
+    assert [client.post("/api/auth/login-json", json=wrong).status_code for _ in range(3)] == [401, 401, 429]
+
+
+def test_clients_behind_the_proxy_have_their_own_buckets(client, throttled):
+    proxy = TestClient(app, client=("10.0.0.2", 50000))
+
+    def attempt(client_ip: str) -> int:
+        return proxy.post(
+            "/api/auth/login-json",
+            json={"email": f"{uuid.uuid4().hex}@example.com", "password": "wrong"},
+            headers={"X-Forwarded-For": client_ip}
+        ).status_code
+
+    assert [attempt("198.51.100.1") for _ in range(3)] == [401, 401, 429]
+    assert attempt("198.51.100.2") == 401
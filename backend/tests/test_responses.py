@@ -0,0 +1,31 @@
+"""
+ModelJSONResponse must produce the same JSON as FastAPI's response_model path it replaces.
+"""
+import asyncio
+import json
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.controllers.chat_controller import GetSessionDetailsResponse
+
+
+def default_body(model) -> bytes:
+    field = create_model_field(name="Response", type_=type(model), mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=model, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def test_session_details_match_response_model_output(client, chat_session):
+    for content in ("hello", "naïve ✓ \"quoted\" </script>"):
+        response = client.post("/api/chat/append-user-message", json={"session_id": chat_session["id"], "content": content})
+        assert response.status_code == 200, response.text
+
+    response = client.post("/api/chat/get-session-details", json={"session_id": chat_session["id"]})
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    model = GetSessionDetailsResponse.model_validate_json(response.content)
+    assert response.json() == json.loads(default_body(model))
+    assert [message["content"] for message in response.json()["messages"]][-1] == "naïve ✓ \"quoted\" </script>"
@@ -0,0 +1,82 @@
+"""
+Startup schema upgrades for databases created before the current models.
+"""
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import SQLModel
+
+from src.database import schema
+from src.database.schema import index_available, upgrade_schema
+
+
+def index_names(bind, table: str) -> set:
+    return {item["name"] for item in inspect(bind).get_indexes(table)}
+
+
+def test_upgrade_creates_missing_indexes(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/old.db")
+    SQLModel.metadata.create_all(bind)
+    with bind.begin() as conn:
+        conn.execute(text("DROP INDEX ux_customers_agent_id_email"))
+        conn.execute(text("DROP INDEX ix_messages_session_id_created_at_id"))
+
+    try:
+        upgrade_schema(bind)
+
+        assert "ux_customers_agent_id_email" in index_names(bind, "customers")
+        assert "ix_messages_session_id_created_at_id" in index_names(bind, "messages")
+        assert index_available("ux_customers_agent_id_email")
+    finally:
+        schema.missing_indexes.clear()
+        bind.dispose()
+
+
+def test_unbuildable_unique_index_is_reported_missing(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/old.db")
+    SQLModel.metadata.create_all(bind)
+    with bind.begin() as conn:
+        conn.execute(text("DROP INDEX ux_customers_agent_id_email"))
+        # Rows that collide on (agent_id, email); SQLite does not enforce the agent foreign key here
+        for _ in range(2):
+            conn.execute(text("INSERT INTO customers (agent_id, name, email, created_at) VALUES (1, 'c', 'c@example.com', '2024-01-01')"))
+
+    try:
+        upgrade_schema(bind)
+
+        assert "ux_customers_agent_id_email" not in index_names(bind, "customers")
+        assert not index_available("ux_customers_agent_id_email")
+    finally:
+        schema.missing_indexes.clear()
+        bind.dispose()
+
+
+def test_get_or_create_without_unique_index(client, agent):
+    """Without the unique index the customer is looked up instead of upserted."""
+    schema.missing_indexes.add("ux_customers_agent_id_email")
+    try:
+        payload = {"agent_id": agent["id"], "customer_name": "Customer", "customer_email": "fallback@example.com"}
+        first = client.post("/api/chat/get-or-create-session", json=payload)
+        second = client.post("/api/chat/get-or-create-session", json=payload)
+    finally:
+        schema.missing_indexes.clear()
+
+    assert first.status_code == 200, first.text
+    assert second.status_code == 200, second.text
+    assert first.json()["session"]["id"] == second.json()["session"]["id"]
+
+
+def test_upgrade_adds_token_version_to_existing_users(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/old.db")
+    SQLModel.metadata.create_all(bind)
+    with bind.begin() as conn:
+        conn.execute(text("INSERT INTO users (name, email, password_hash, created_at, updated_at) VALUES ('u', 'u@example.com', 'x', '2024-01-01', '2024-01-01')"))
+        conn.execute(text("ALTER TABLE users DROP COLUMN token_version"))
+
+    try:
+        upgrade_schema(bind)
+
+        assert "token_version" in {item["name"] for item in inspect(bind).get_columns("users")}
+        with bind.connect() as conn:
+            assert conn.execute(text("SELECT token_version FROM users")).scalar_one() == 0
+    finally:
+        schema.missing_indexes.clear()
+        bind.dispose()
@@ -0,0 +1,32 @@
+"""
+Session event streams replay the backlog without holding a database connection.
+"""
+import asyncio
+
+from src.database import engine
+from src.routes.chat_routes import session_events
+
+
+def test_stream_replays_backlog_and_returns_its_connection(client, chat_session):
+    for content in ("first", "second"):
+        response = client.post("/api/chat/append-user-message", json={"session_id": chat_session["id"], "content": content})
+        assert response.status_code == 200, response.text
+
+    async def scenario():
+        # Resuming from the start replays both messages
+        response = await session_events(chat_session["id"], last_event_id="0-0", after=None)
+        stream = response.body_iterator
+        try:
+            # The response is streaming, but its replay session is already closed
+            checked_out = engine.pool.checkedout()
+            chunks = [await anext(stream) for _ in range(3)]
+        finally:
+            await stream.aclose()
+        return checked_out, chunks
+
+    checked_out, chunks = asyncio.run(scenario())
+
+    assert checked_out == 0
+    assert chunks[0].startswith(b"retry:")
+    assert b"event: message" in chunks[1] and b'"first"' in chunks[1]
+    assert b'"second"' in chunks[2]
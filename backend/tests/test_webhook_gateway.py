@@ -0,0 +1,149 @@
+"""
+WebSocket gateway against a stub webhook app, and the webhook URL checks that keep agents
+from reaching internal addresses.
+"""
+import asyncio
+import json
+from typing import Iterator, List
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+from sqlmodel import Session
+
+from src.controllers import gateway_controller
+from src.core.webhooks import UnsafeWebhookURL, WebhookDispatcher, webhook_dispatcher
+from src.database import engine
+from src.models.agent import Agent
+from tests.test_webhooks import LocalWebhook
+
+STUB_URL = "http://webhook.stub/hook"
+
+
+@pytest.fixture
+def stub_webhook(monkeypatch) -> Iterator[List[dict]]:
+    """Point the dispatcher at an in-process webhook; yields the payloads it received."""
+    received: List[dict] = []
+    stub = FastAPI()
+
+    @stub.post("/hook")
+    async def hook(request: Request):
+        payload = await request.json()
+        received.append(payload)
+        if payload["user_message"] == "fail":
+            return Response(status_code=500)
+        if payload["user_message"] == "bad":
+            return {"unexpected": True}
+        return {"content": f"echo {payload['user_message']}", "session_closed": payload["user_message"] == "bye"}
+
+    # The stub's host is not a public address
+    monkeypatch.setattr(webhook_dispatcher, "allow_private_networks", True)
+    webhook_dispatcher.start(transport=httpx.ASGITransport(stub))
+    yield received
+    asyncio.run(webhook_dispatcher.aclose())
+
+
+def set_webhook(client, headers: dict, agent_id: int, url: str):
+    return client.put(f"/api/agents/{agent_id}", headers=headers, json={"webhook_url": url})
+
+
+def turn(ws, content: str) -> dict:
+    ws.send_text(json.dumps({"type": "message", "content": content}))
+    ack = ws.receive_json()
+    assert ack["type"] == "ack" and ack["message"]["content"] == content, ack
+    return ws.receive_json()
+
+
+def test_gateway_relays_turns_to_the_webhook(client, auth_headers, agent, chat_session, stub_webhook):
+    assert set_webhook(client, auth_headers, agent["id"], STUB_URL).status_code == 200
+
+    with client.websocket_connect(f"/api/chat/ws/{chat_session['id']}") as ws:
+        reply = turn(ws, "hello")
+        assert reply["type"] == "reply" and reply["ai_message"]["content"] == "echo hello", reply
+        assert stub_webhook[-1]["is_new_session"]
+        assert stub_webhook[-1]["user_message_id"] == stub_webhook[-1]["messages"][-1]["id"]
+
+        error = turn(ws, "fail")
+        assert error == {"type": "error", "detail": "Agent webhook returned 500"}
+        error = turn(ws, "bad")
+        assert error["type"] == "error" and "no ai_message or content" in error["detail"]
+
+        reply = turn(ws, "bye")
+        assert reply["session"]["session_closed"]
+
+    details = client.post("/api/chat/get-session-details", json={"session_id": chat_session["id"]}).json()
+    assert [message["content"] for message in details["messages"]] == [
+        "hello", "echo hello", "fail", "bad", "bye", "echo bye"
+    ]
+
+
+def test_webhook_history_is_capped(client, auth_headers, agent, chat_session, stub_webhook, monkeypatch):
+    monkeypatch.setattr(gateway_controller, "WEBHOOK_MAX_HISTORY_MESSAGES", 3)
+    for i in range(5):
+        client.post("/api/chat/append-user-message", json={"session_id": chat_session["id"], "content": f"old {i}"})
+    assert set_webhook(client, auth_headers, agent["id"], STUB_URL).status_code == 200
+
+    with client.websocket_connect(f"/api/chat/ws/{chat_session['id']}") as ws:
+        turn(ws, "first")
+        turn(ws, "second")
+
+    assert [message["content"] for message in stub_webhook[0]["messages"]] == ["old 3", "old 4", "first"]
+    assert [message["content"] for message in stub_webhook[1]["messages"]] == ["first", "echo first", "second"]
+    assert not stub_webhook[0]["is_new_session"]
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:5678/webhook",
+    "http://localhost/webhook",
+    "http://10.0.0.7/webhook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/webhook",
+    "http://[::ffff:192.168.1.1]/webhook",
+    "ftp://93.184.216.34/webhook",
+    "http:///webhook",
+    "http://93.184.216.34:99999/webhook",
+])
+def test_unsafe_webhook_urls_are_refused(url):
+    dispatcher = WebhookDispatcher(1, 1, 1, 1, 0, 0.01, 0.01)
+
+    with pytest.raises(UnsafeWebhookURL):
+        asyncio.run(dispatcher.check_url(url))
+
+
+def test_public_webhook_address_is_accepted():
+    dispatcher = WebhookDispatcher(1, 1, 1, 1, 0, 0.01, 0.01)
+
+    asyncio.run(dispatcher.check_url("https://93.184.216.34/webhook"))
+
+
+def test_internal_webhook_url_is_refused_when_saved(client, auth_headers, agent):
+    response = set_webhook(client, auth_headers, agent["id"], "http://169.254.169.254/latest/meta-data/")
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid webhook URL")
+
+    response = client.post("/api/agents/create-agent", headers=auth_headers, json={
+        "name": "agent", "type": "qa", "agent_data_fields": [], "webhook_url": "http://127.0.0.1:5678/webhook"
+    })
+    assert response.status_code == 400
+
+
+def test_internal_webhook_url_is_refused_when_called(client, agent, chat_session, monkeypatch):
+    with LocalWebhook() as local:
+        # Stored before validation existed (or DNS changed since it was saved)
+        with Session(engine) as session:
+            stored = session.get(Agent, agent["id"])
+            stored.webhook_url = f"http://127.0.0.1:{local.port}/webhook"
+            session.add(stored)
+            session.commit()
+        monkeypatch.setattr(webhook_dispatcher, "allow_private_networks", False)
+
+        try:
+            with client.websocket_connect(f"/api/chat/ws/{chat_session['id']}") as ws:
+                error = turn(ws, "hello")
+        finally:
+            asyncio.run(webhook_dispatcher.aclose())
+
+    assert error["type"] == "error"
+    assert error["detail"].startswith("Agent webhook URL is not allowed")
+    assert local.connections == 0
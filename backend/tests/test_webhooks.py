@@ -0,0 +1,253 @@
+"""
+Webhook dispatcher: retries only for calls the webhook cannot have acted on, the
+per-agent and global concurrency limits, and connections only to checked addresses.
+"""
+import asyncio
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from src.core.webhooks import WebhookDispatcher
+
+
+class StubWebhook:
+    """In-process webhook recording every attempt, behind a transport that can fail to connect."""
+
+    def __init__(self):
+        self.attempts: Counter = Counter()
+        self.keys: List[str] = []
+        self.in_flight = 0
+        self.peak = 0
+        app = FastAPI()
+
+        @app.post("/{mode}")
+        async def hook(mode: str, request: Request):
+            self.attempts[mode] += 1
+            self.keys.append(request.headers.get("Idempotency-Key"))
+            if mode == "refused-twice" and self.attempts[mode] < 3:
+                return Response(status_code=503 if self.attempts[mode] == 1 else 429, headers={"Retry-After": "0"})
+            if mode in ("502", "504", "503"):
+                return Response(status_code=int(mode))
+            if mode == "slow":
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                await asyncio.sleep(0.05)
+                self.in_flight -= 1
+            return await request.json()
+
+        self.inner = httpx.ASGITransport(app)
+        stub = self
+
+        class Transport(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                if request.url.path == "/unreachable":
+                    stub.attempts["unreachable"] += 1
+                    raise httpx.ConnectError("connection refused")
+                if request.url.path == "/read-timeout":
+                    stub.attempts["read-timeout"] += 1
+                    raise httpx.ReadTimeout("no response")
+                return await stub.inner.handle_async_request(request)
+
+        self.transport = Transport()
+
+
+class LocalWebhook:
+    """A real HTTP server on 127.0.0.1 counting the connections it accepts."""
+
+    def __init__(self):
+        self.connections = 0
+        self.hosts: List[str] = []
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def setup(self):
+                webhook.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                webhook.hosts.append(self.headers["Host"])
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+
+    def __enter__(self) -> "LocalWebhook":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def dispatcher(stub: StubWebhook, timeout: float = 1.0, per_agent: int = 3, connections: int = 8) -> WebhookDispatcher:
+    webhooks = WebhookDispatcher(
+        timeout, connections, 4, per_agent,
+        max_retries=2, retry_base_seconds=0.01, retry_max_seconds=0.05, allow_private_networks=True
+    )
+    webhooks.start(transport=stub.transport)
+    return webhooks
+
+
+def call(webhooks: WebhookDispatcher, mode: str, **kwargs):
+    async def scenario():
+        try:
+            return await webhooks.post_json(1, f"http://webhook.stub/{mode}", {"mode": mode}, **kwargs)
+        finally:
+            await webhooks.aclose()
+    return asyncio.run(scenario())
+
+
+def test_refusals_with_retry_after_are_retried_with_one_key():
+    stub = StubWebhook()
+    webhooks = dispatcher(stub)
+
+    assert call(webhooks, "refused-twice", idempotency_key="message-7") == {"mode": "refused-twice"}
+    assert stub.attempts["refused-twice"] == 3
+    assert stub.keys == ["message-7"] * 3
+    assert webhooks.stats()["retries"] == 2
+
+
+@pytest.mark.parametrize("mode", ["502", "503", "504"])
+def test_replies_that_may_follow_processing_are_not_retried(mode):
+    stub = StubWebhook()
+    webhooks = dispatcher(stub)
+
+    with pytest.raises(HTTPException) as failed:
+        call(webhooks, mode)
+
+    assert failed.value.status_code == 502
+    assert failed.value.detail == f"Agent webhook returned {mode}"
+    assert stub.attempts[mode] == 1
+    assert stub.keys[0]
+
+
+def test_connection_failures_are_retried():
+    stub = StubWebhook()
+    webhooks = dispatcher(stub)
+
+    with pytest.raises(HTTPException) as failed:
+        call(webhooks, "unreachable")
+
+    assert failed.value.status_code == 502
+    assert stub.attempts["unreachable"] == 3
+
+
+def test_read_timeouts_are_not_retried():
+    stub = StubWebhook()
+    webhooks = dispatcher(stub)
+
+    with pytest.raises(HTTPException) as failed:
+        call(webhooks, "read-timeout")
+
+    assert failed.value.status_code == 504
+    assert stub.attempts["read-timeout"] == 1
+    assert webhooks.stats()["timeouts"] == 1
+
+
+def test_calls_are_capped_per_agent_and_globally():
+    stub = StubWebhook()
+    webhooks = dispatcher(stub, per_agent=3, connections=8)
+
+    async def scenario():
+        try:
+            replies = await asyncio.gather(*[
+                webhooks.post_json(1, "http://webhook.stub/slow", {"i": i}) for i in range(9)
+            ])
+            agent_peak, stub.peak = stub.peak, 0
+            await asyncio.gather(*[
+                webhooks.post_json(agent_id, "http://webhook.stub/slow", {}) for agent_id in range(10, 15) for _ in range(3)
+            ])
+            return replies, agent_peak, stub.peak
+        finally:
+            await webhooks.aclose()
+
+    replies, agent_peak, global_peak = asyncio.run(scenario())
+
+    assert [reply["i"] for reply in replies] == list(range(9))
+    assert agent_peak == 3
+    assert global_peak == 8
+    stats = webhooks.stats()
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+
+
+def test_call_waiting_longer_than_the_timeout_is_busy():
+    stub = StubWebhook()
+    webhooks = dispatcher(stub, timeout=0.08, per_agent=1)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*[
+                webhooks.post_json(1, "http://webhook.stub/slow", {}) for _ in range(3)
+            ], return_exceptions=True)
+        finally:
+            await webhooks.aclose()
+
+    results = asyncio.run(scenario())
+
+    busy = [result for result in results if isinstance(result, HTTPException)]
+    assert [result.status_code for result in busy] == [503]
+    assert webhooks.stats()["busy"] == 1
+
+
+def test_host_rebinding_to_a_private_address_after_the_check_is_refused():
+    lookups = []
+
+    async def rebinding_resolver(host, port):
+        # Public when the agent is saved, loopback by the time the call connects
+        lookups.append(host)
+        return ["93.184.216.34"] if len(lookups) == 1 else ["127.0.0.1"]
+
+    webhooks = WebhookDispatcher(1, 4, 4, 2, 2, 0.01, 0.05, resolver=rebinding_resolver)
+
+    with LocalWebhook() as local:
+        url = f"http://rebind.test:{local.port}/hook"
+
+        async def scenario():
+            await webhooks.check_url(url)
+            try:
+                return await webhooks.post_json(1, url, {"secret": False})
+            finally:
+                await webhooks.aclose()
+
+        with pytest.raises(HTTPException) as refused:
+            asyncio.run(scenario())
+
+    assert refused.value.status_code == 502
+    assert refused.value.detail.startswith("Agent webhook URL is not allowed")
+    assert lookups == ["rebind.test", "rebind.test"]
+    assert local.connections == 0
+
+
+def test_connection_goes_to_the_resolved_address_with_the_original_host():
+    async def resolver(host, port):
+        return ["127.0.0.1"]
+
+    webhooks = WebhookDispatcher(1, 4, 4, 2, 0, 0.01, 0.05, allow_private_networks=True, resolver=resolver)
+
+    with LocalWebhook() as local:
+        async def scenario():
+            webhooks.start()
+            try:
+                return await webhooks.post_json(1, f"http://hook.test:{local.port}/hook", {"turn": 1})
+            finally:
+                await webhooks.aclose()
+
+        reply = asyncio.run(scenario())
+
+    assert reply == {"turn": 1}
+    assert local.hosts == [f"hook.test:{local.port}"]
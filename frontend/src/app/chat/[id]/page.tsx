@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useRef, useEffect, useCallback, use } from "react"
+import { useState, useRef, useEffect, useLayoutEffect, useCallback, use } from "react"
 import { Send, Info } from "lucide-react"
 import Image from "next/image"
 import { Button } from "@/components/ui/button"
@@ -10,7 +10,7 @@ import ChatLoginModal from "@/components/shared/ChatLoginModal"
 import ChatLoadingScreen from "@/components/shared/ChatLoadingScreen"
 import { useDispatch, useSelector } from "react-redux"
 import type { AppDispatch, RootState } from "@/store/store"
-import { agentsAPI } from "@/lib/api"
+import { agentsAPI, chatAPI, MESSAGE_PAGE_SIZE } from "@/lib/api"
 import type { CreateSessionRequest } from "@/types/agents"
 import type { WebhookResponse } from "@/types/general"
 import {
@@ -18,6 +18,7 @@ import {
     setLoading,
     setAgentData,
     addMessage,
+    prependMessages,
     appendCollectedData,
     updateSessionClosed,
     initializeStore
@@ -49,7 +50,12 @@ export default function ChatPage({ params }: ChatPageProps) {
     const [showTyping, setShowTyping] = useState(false)
     const [isAIResponseLoading, setIsAIResponseLoading] = useState(false)
     const messagesEndRef = useRef<HTMLDivElement>(null)
+    const messagesContainerRef = useRef<HTMLDivElement>(null)
     const isLoadingRef = useRef(false)
+    const isLoadingOlderRef = useRef(false)
+    // Distance from the bottom to keep while older messages are prepended
+    const restoreScrollRef = useRef<number | null>(null)
+    const skipScrollToBottomRef = useRef(false)
 
     // Redux hooks
     const dispatch = useDispatch<AppDispatch>()
@@ -97,8 +103,8 @@ export default function ChatPage({ params }: ChatPageProps) {
         try {
             const response = await agentsAPI.getAgent(agentId)
             if (response.success && response.data) {
-                // Exclude chat_sessions from the agent data as requested
-                const { chat_sessions, ...agentData } = response.data
+                // Exclude recent_sessions from the agent data as requested
+                const { recent_sessions, ...agentData } = response.data
                 dispatch(setAgentData(agentData))
             } else {
                 console.error("Failed to fetch agent details:", response.message)
@@ -164,9 +170,52 @@ export default function ChatPage({ params }: ChatPageProps) {
         }
     }, [sessionData, firstMessageInitialized, initializeFirstMessage])
 
+    // Only the latest messages come with the session; fetch older ones when scrolled to the top
+    const loadOlderMessages = useCallback(async () => {
+        const sessionId = sessionData?.session?.id
+        const oldest = sessionData?.messages[0]
+        if (!sessionId || !oldest || !sessionData?.has_more_messages || isLoadingOlderRef.current) return
+        isLoadingOlderRef.current = true
+        try {
+            const resp = await chatAPI.getSessionDetails(sessionId, {
+                message_limit: MESSAGE_PAGE_SIZE,
+                before_id: oldest.id
+            })
+            const container = messagesContainerRef.current
+            if (container) {
+                restoreScrollRef.current = container.scrollHeight - container.scrollTop
+            }
+            dispatch(prependMessages({ messages: resp.messages, has_more_messages: !!resp.has_more_messages }))
+        } catch (err) {
+            console.error("Error loading older messages:", err)
+        } finally {
+            isLoadingOlderRef.current = false
+        }
+    }, [sessionData, dispatch])
+
+    const handleMessagesScroll = () => {
+        if ((messagesContainerRef.current?.scrollTop ?? 1) <= 40) {
+            loadOlderMessages()
+        }
+    }
+
+    // Keep the reader's place when older messages are prepended
+    useLayoutEffect(() => {
+        const container = messagesContainerRef.current
+        if (container && restoreScrollRef.current !== null) {
+            container.scrollTop = container.scrollHeight - restoreScrollRef.current
+            restoreScrollRef.current = null
+            skipScrollToBottomRef.current = true
+        }
+    }, [messages.length])
+
     // Handle scrolling and store initialization
     useEffect(() => {
-        scrollToBottom()
+        if (skipScrollToBottomRef.current) {
+            skipScrollToBottomRef.current = false
+        } else {
+            scrollToBottom()
+        }
         // Initialize store for Redux DevTools
         console.log('Initializing Chat Store for Redux DevTools...')
         dispatch(initializeStore())
@@ -379,7 +428,10 @@ export default function ChatPage({ params }: ChatPageProps) {
             </div>
 
             {/* Chat Messages */}
-            <div className="flex-1 overflow-y-auto p-4 space-y-4">
+            <div ref={messagesContainerRef} onScroll={handleMessagesScroll} className="flex-1 overflow-y-auto p-4 space-y-4">
+                {sessionData?.has_more_messages && (
+                    <div className="text-center text-xs text-gray-500">Scroll up for earlier messages</div>
+                )}
                 {formattedMessages.length === 0 ? (
                     <div className="flex items-center justify-center h-full">
                         <div className="text-center space-y-2">
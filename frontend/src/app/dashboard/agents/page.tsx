@@ -55,8 +55,8 @@ function transformAgentForDisplay(agent: Agent): DisplayAgent {
             day: '2-digit'
         })
 
-    // Calculate conversations handled from chat sessions
-    const conversationsHandled = agent.chat_sessions.length
+    // Conversations handled comes from the session count summary
+    const conversationsHandled = agent.chat_session_count
 
     return {
         id: agent.id,
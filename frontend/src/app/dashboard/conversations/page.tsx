@@ -1,7 +1,7 @@
 "use client"
-import { useEffect, useMemo, useState } from "react"
+import { useEffect, useLayoutEffect, useMemo, useRef, useState } from "react"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
-import { chatAPI } from "@/lib/api"
+import { chatAPI, MESSAGE_PAGE_SIZE } from "@/lib/api"
 import type { ConversationListItem, ConversationsResponse, SessionDetailsResponse } from "@/types/general"
 
 function formatDate(dateStr: string | null | undefined) {
@@ -31,8 +31,14 @@ export default function ConversationsPage() {
     const [list, setList] = useState<ConversationListItem[]>([])
     const [isLoading, setIsLoading] = useState(false)
     const [error, setError] = useState<string | null>(null)
+    const [nextCursor, setNextCursor] = useState<string | null>(null)
+    const [isLoadingMore, setIsLoadingMore] = useState(false)
     const [selectedId, setSelectedId] = useState<number | null>(null)
     const [details, setDetails] = useState<SessionDetailsResponse | null>(null)
+    const transcriptRef = useRef<HTMLDivElement>(null)
+    const isLoadingOlderRef = useRef(false)
+    // Distance from the bottom to keep while older messages are prepended
+    const restoreScrollRef = useRef<number | null>(null)
     const selectedConversation = useMemo(() => list.find(c => c.id === selectedId) || null, [list, selectedId])
 
     useEffect(() => {
@@ -43,6 +49,7 @@ export default function ConversationsPage() {
                 const resp: ConversationsResponse = await chatAPI.getConversations()
                 const conversations = resp.conversations || []
                 setList(conversations)
+                setNextCursor(resp.meta?.pagination?.next_cursor ?? null)
                 if (conversations.length > 0) {
                     setSelectedId(conversations[0].id)
                 }
@@ -55,11 +62,28 @@ export default function ConversationsPage() {
         run()
     }, [])
 
+    // Older conversations are fetched a page at a time, on request
+    const loadMore = async () => {
+        if (!nextCursor || isLoadingMore) return
+        setIsLoadingMore(true)
+        try {
+            const resp: ConversationsResponse = await chatAPI.getConversations(nextCursor)
+            const seen = new Set(list.map(c => c.id))
+            setList([...list, ...(resp.conversations || []).filter(c => !seen.has(c.id))])
+            setNextCursor(resp.meta?.pagination?.next_cursor ?? null)
+        } catch (e: any) {
+            setError(e?.message || "Failed to load conversations")
+        } finally {
+            setIsLoadingMore(false)
+        }
+    }
+
     useEffect(() => {
         const loadDetails = async () => {
             if (!selectedId) return
             try {
-                const resp = await chatAPI.getSessionDetails(selectedId)
+                // Latest messages only; older ones load when the transcript is scrolled back
+                const resp = await chatAPI.getSessionDetails(selectedId, { message_limit: MESSAGE_PAGE_SIZE })
                 setDetails(resp)
             } catch (e) {
                 console.error(e)
@@ -68,6 +92,37 @@ export default function ConversationsPage() {
         loadDetails()
     }, [selectedId])
 
+    const loadOlderMessages = async () => {
+        const oldest = details?.messages?.[0]
+        if (!details || !oldest || !details.has_more_messages || isLoadingOlderRef.current) return
+        isLoadingOlderRef.current = true
+        try {
+            const resp = await chatAPI.getSessionDetails(details.session.id, {
+                message_limit: MESSAGE_PAGE_SIZE,
+                before_id: oldest.id
+            })
+            const transcript = transcriptRef.current
+            if (transcript) {
+                restoreScrollRef.current = transcript.scrollHeight - transcript.scrollTop
+            }
+            setDetails(current => current && current.session.id === resp.session.id
+                ? { ...current, messages: [...resp.messages, ...current.messages], has_more_messages: resp.has_more_messages }
+                : current)
+        } catch (e) {
+            console.error(e)
+        } finally {
+            isLoadingOlderRef.current = false
+        }
+    }
+
+    useLayoutEffect(() => {
+        const transcript = transcriptRef.current
+        if (transcript && restoreScrollRef.current !== null) {
+            transcript.scrollTop = transcript.scrollHeight - restoreScrollRef.current
+            restoreScrollRef.current = null
+        }
+    }, [details?.messages?.length])
+
     return (
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-6 max-h-screen overflow-y-scroll">
             {/* Left Panel - Conversations List */}
@@ -120,6 +175,16 @@ export default function ConversationsPage() {
                                     </div>
                                 </div>
                             ))}
+                            {nextCursor && (
+                                <button
+                                    type="button"
+                                    className="w-full px-6 py-3 text-sm text-purple-400 hover:bg-gray-700 disabled:opacity-50"
+                                    onClick={loadMore}
+                                    disabled={isLoadingMore}
+                                >
+                                    {isLoadingMore ? "Loading..." : "Load more conversations"}
+                                </button>
+                            )}
                             {(!isLoading && !error && list.length === 0) && (
                                 <div className="px-6 py-4 text-gray-400 text-sm">No conversations found.</div>
                             )}
@@ -140,7 +205,16 @@ export default function ConversationsPage() {
                     {/* Transcript Section */}
                     <div className="flex-1 flex flex-col">
                         <h3 className="text-lg font-semibold text-white mb-4">Transcript</h3>
-                        <div className="space-y-4 flex-1 overflow-y-auto">
+                        <div
+                            ref={transcriptRef}
+                            onScroll={() => {
+                                if ((transcriptRef.current?.scrollTop ?? 1) <= 40) loadOlderMessages()
+                            }}
+                            className="space-y-4 flex-1 overflow-y-auto"
+                        >
+                            {details?.has_more_messages && (
+                                <div className="text-center text-xs text-gray-500">Scroll up for earlier messages</div>
+                            )}
                             {details?.messages?.map((message) => {
                                 const isAssistant = message.sender === "Assistant"
                                 const content = parseMessageContent(message.content)
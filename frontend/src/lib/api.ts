@@ -1,7 +1,7 @@
 import axios from "axios";
 import type { SignupRequest, LoginRequest, LoginResponse, SignupResponse } from "@/types/auth";
 import type { CreateAgentRequest, ApiEnvelope, AgentsResponse, CreateSessionRequest, ChatSessionResponse, Agent } from "@/types/agents";
-import type { ConversationsResponse, SessionDetailsResponse } from "@/types/general";
+import type { ConversationsResponse, MessageWindow, SessionDetailsResponse } from "@/types/general";
 
 const api = axios.create({
     baseURL: process.env.NEXT_PUBLIC_BACKEND_BASE_URL || "http://localhost:8000",
@@ -11,6 +11,14 @@ const api = axios.create({
     withCredentials: true, // keep true if you might use cookies later
 });
 
+// 🔹 Time of our last write, echoed back so reads right after a write skip the
+// read replica (the backend's cookie is not sent when the API is on another site)
+const LAST_WRITE_HEADER = "X-Last-Write";
+const LAST_WRITE_KEY = "lastWrite";
+
+// 🔹 Messages loaded per page of chat history; older pages load when scrolling back
+export const MESSAGE_PAGE_SIZE = 50;
+
 // 🔹 Attach JWT token from localStorage (if exists)
 api.interceptors.request.use((config) => {
     if (typeof window !== "undefined") {
@@ -18,13 +26,23 @@ api.interceptors.request.use((config) => {
         if (token) {
             config.headers.Authorization = `Bearer ${token}`;
         }
+        const lastWrite = sessionStorage.getItem(LAST_WRITE_KEY);
+        if (lastWrite) {
+            config.headers[LAST_WRITE_HEADER] = lastWrite;
+        }
     }
     return config;
 });
 
-// 🔹 Handle errors globally
+// 🔹 Remember writes and handle errors globally
 api.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        const lastWrite = response.headers[LAST_WRITE_HEADER.toLowerCase()];
+        if (lastWrite && typeof window !== "undefined") {
+            sessionStorage.setItem(LAST_WRITE_KEY, String(lastWrite));
+        }
+        return response;
+    },
     (error) => {
         if (error.response?.status === 401) {
             if (typeof window !== "undefined") {
@@ -154,7 +172,10 @@ export const agentsAPI = {
 
     getOrCreateSession: async (requestData: CreateSessionRequest): Promise<ChatSessionResponse> => {
         try {
-            const response = await api.post('/api/chat/get-or-create-session', requestData)
+            const response = await api.post('/api/chat/get-or-create-session', {
+                message_limit: MESSAGE_PAGE_SIZE,
+                ...requestData
+            })
             return response.data
         } catch (error) {
             throw error
@@ -232,19 +253,29 @@ export const agentsAPI = {
 };
 
 // 🔹 Conversations / Chat API Functions
+const CONVERSATIONS_PAGE_SIZE = 50
+
 export const chatAPI = {
-    getConversations: async (): Promise<ConversationsResponse> => {
+    // One page per call; pass the previous page's meta.pagination.next_cursor for the next one
+    getConversations: async (cursor?: string | null, limit: number = CONVERSATIONS_PAGE_SIZE): Promise<ConversationsResponse> => {
         try {
-            const response = await api.get('/api/chat/get-conversations')
+            const params: Record<string, string | number> = { limit }
+            if (cursor) {
+                params.cursor = cursor
+            }
+            const response = await api.get('/api/chat/get-conversations', { params })
             return response.data
         } catch (error) {
             throw error
         }
     },
 
-    getSessionDetails: async (sessionId: number): Promise<SessionDetailsResponse> => {
+    getSessionDetails: async (
+        sessionId: number,
+        window: MessageWindow = { message_limit: MESSAGE_PAGE_SIZE }
+    ): Promise<SessionDetailsResponse> => {
         try {
-            const response = await api.post('/api/chat/get-session-details', { session_id: sessionId })
+            const response = await api.post('/api/chat/get-session-details', { session_id: sessionId, ...window })
             return response.data
         } catch (error) {
             throw error
@@ -7,7 +7,7 @@ import type {
     Agent
 } from '@/types/agents'
 
-type AgentWithoutSessions = Omit<Agent, 'chat_sessions'>
+type AgentWithoutSessions = Omit<Agent, 'recent_sessions'>
 
 interface ChatState {
     // Session data
@@ -57,6 +57,18 @@ const chatSlice = createSlice({
             }
         },
 
+        // Older messages loaded when scrolling back; skips any already present
+        prependMessages: (state, action: PayloadAction<{ messages: ChatMessage[]; has_more_messages: boolean }>) => {
+            if (state.sessionData) {
+                const seen = new Set(state.sessionData.messages.map(message => message.id))
+                state.sessionData.messages = [
+                    ...action.payload.messages.filter(message => !seen.has(message.id)),
+                    ...state.sessionData.messages
+                ]
+                state.sessionData.has_more_messages = action.payload.has_more_messages
+            }
+        },
+
         updateCollectedData: (state, action: PayloadAction<CollectedData>) => {
             if (state.sessionData) {
                 const existingIndex = state.sessionData.collected_data.findIndex(
@@ -102,6 +114,7 @@ export const {
     setError,
     setAgentData,
     addMessage,
+    prependMessages,
     updateCollectedData,
     appendCollectedData,
     updateSessionClosed,
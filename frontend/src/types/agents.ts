@@ -56,7 +56,9 @@ export interface Agent {
     created_at: string
     updated_at: string | null
     data_schemas: AgentDataSchema[]
-    chat_sessions: AgentChatSession[]
+    chat_session_count: number
+    open_session_count: number
+    recent_sessions?: AgentChatSession[] | null
 }
 
 export interface AgentsResponse {
@@ -71,6 +73,7 @@ export interface AgentsResponse {
             total_pages: number
             has_next: boolean
             has_prev: boolean
+            next_cursor: string | null
         }
     }
 }
@@ -125,12 +128,14 @@ export interface ChatSessionResponse {
     messages: ChatMessage[]
     collected_data: CollectedData[]
     is_new_session: boolean
+    has_more_messages?: boolean // older messages exist before the first one returned
 }
 
 export interface CreateSessionRequest {
     agent_id: number
     customer_name: string
     customer_email: string
+    message_limit?: number
 }
 
 
@@ -39,6 +39,17 @@ export interface ConversationListItem {
 
 export interface ConversationsResponse {
     conversations: ConversationListItem[]
+    meta?: {
+        pagination: {
+            total: number
+            page: number
+            page_size: number
+            total_pages: number
+            has_next: boolean
+            has_prev: boolean
+            next_cursor: string | null
+        }
+    }
 }
 
 // Session details types (for conversation details view)
@@ -69,4 +80,11 @@ export interface SessionDetailsResponse {
         field_id: number
         created_at: string
     }>
+    has_more_messages?: boolean // more messages exist past the window
+}
+
+// Message window for session details: the newest `message_limit`, or those before `before_id`
+export interface MessageWindow {
+    message_limit?: number
+    before_id?: number
 }
\ No newline at end of file